@@ -0,0 +1,110 @@
+"""Measure the memory used by parsed editoritems.
+
+This parses the editoritems.txt files in the given packages (folders or
+.bee_pack/.zip files), then copies each item the way exporting does. The
+memory allocated for each step is reported, along with the process RSS.
+Run it on two revisions to compare them:
+
+    python dev/editoritems_memory.py path/to/packages/
+"""
+import copy
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Iterator, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from srctools.filesys import FileSystem, RawFileSystem, ZipFileSystem
+from srctools.tokenizer import Tokenizer, Token
+
+from editoritems import Item
+
+
+def rss() -> str:
+    """Return the current resident set size, if it can be determined."""
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        return '{:,} bytes'.format(psutil.Process().memory_info().rss)
+    try:
+        import resource
+    except ImportError:
+        return 'unknown'
+    # This is the peak, in KB on Linux but bytes on Mac.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':
+        peak *= 1024
+    return '{:,} bytes (peak)'.format(peak)
+
+
+def find_packages(paths: List[str]) -> Iterator[FileSystem]:
+    """Open each package in these folders."""
+    for path in paths:
+        if os.path.isfile(path):
+            yield ZipFileSystem(path)
+            continue
+        if os.path.isfile(os.path.join(path, 'info.txt')):
+            yield RawFileSystem(path)
+            continue
+        for name in os.listdir(path):
+            yield from find_packages([os.path.join(path, name)])
+
+
+def parse_items(fsys: FileSystem) -> Iterator[Item]:
+    """Parse all the editoritems files in a package."""
+    with fsys:
+        for file in fsys.walk_folder('items'):
+            if not file.path.casefold().endswith('/editoritems.txt'):
+                continue
+            with file.open_str() as f:
+                tok = Tokenizer(f, file.path)
+                for tok_type, tok_value in tok:
+                    if tok_type is Token.STRING:
+                        if tok_value.casefold() != 'item':
+                            raise tok.error('Unknown item option "{}"!', tok_value)
+                        yield Item.parse_one(tok)
+                    elif tok_type is not Token.NEWLINE:
+                        raise tok.error(tok_type)
+
+
+def main(args: List[str]) -> None:
+    """Run the measurements."""
+    if not args:
+        print(__doc__)
+        return
+    print('RSS at start:', rss())
+    tracemalloc.start()
+
+    start = time.perf_counter()
+    items = [
+        item
+        for fsys in find_packages(args)
+        for item in parse_items(fsys)
+    ]
+    gc.collect()
+    parsed, parse_peak = tracemalloc.get_traced_memory()
+    print('Parsed {} items in {:.2f}s: {:,} bytes, peak {:,} bytes.'.format(
+        len(items), time.perf_counter() - start, parsed, parse_peak,
+    ))
+
+    # Exporting copies every item, then modifies the copies.
+    start = time.perf_counter()
+    copies = [copy.deepcopy(item) for item in items]
+    gc.collect()
+    copied, copy_peak = tracemalloc.get_traced_memory()
+    print('Copied {} items in {:.2f}s: {:,} bytes, peak {:,} bytes.'.format(
+        len(copies), time.perf_counter() - start,
+        copied - parsed, copy_peak,
+    ))
+    tracemalloc.stop()
+    print('RSS at end:', rss())
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
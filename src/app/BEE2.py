@@ -21,6 +21,8 @@ DEFAULT_SETTINGS = {
         'palette_save_settings': '0',
         'splash_stay_ontop': '1',
         'compact_splash': '0',
+        # Number of images kept loaded, excluding those currently displayed.
+        'img_cache_size': '500',
 
         # A token used to indicate the time the current cache/ was extracted.
         # This tells us whether to copy it to the game folder.
@@ -42,6 +44,8 @@ DEFAULT_SETTINGS = {
         'show_log_win': '0',
         # The lowest level which will be shown.
         'window_log_level': 'INFO',
+        # The number of lines kept in the log window.
+        'window_log_lines': '5000',
     },
 }
 
@@ -59,7 +63,8 @@ if utils.MAC:
 
 logWindow.init(
     GEN_OPTS.get_bool('Debug', 'show_log_win'),
-    GEN_OPTS['Debug']['window_log_level']
+    GEN_OPTS['Debug']['window_log_level'],
+    max(GEN_OPTS.get_int('Debug', 'window_log_lines', 5000), 1),
 )
 
 LOGGER.debug('Loading settings...')
@@ -41,6 +41,7 @@ COMPILE_DEFAULTS = {
         'use_voice_priority': '1',
         'packfile_dump_dir': '',
         'packfile_dump_enable': '0',
+        'compile_server': '0',
     },
     'Corridor': {
         'sp_entry': '1',
@@ -102,6 +103,10 @@ packfile_dump_enable = IntVar(
     value=COMPILE_CFG.get_bool('General', 'packfile_dump_enable')
 )
 
+compile_server_enable = IntVar(
+    value=COMPILE_CFG.get_bool('General', 'compile_server')
+)
+
 count_brush = IntVar(value=0)
 count_entity = IntVar(value=0)
 count_overlay = IntVar(value=0)
@@ -498,6 +503,7 @@ def make_widgets() -> None:
     make_setter('General', 'spawn_elev', start_in_elev)
     make_setter('Screenshot', 'del_old', cleanup_screenshot)
     make_setter('General', 'vrad_force_full', vrad_light_type)
+    make_setter('General', 'compile_server', compile_server_enable)
 
     ttk.Label(window, justify='center', text=_(
         "Options on this panel can be changed \n"
@@ -688,6 +694,22 @@ def make_comp_widgets(frame: ttk.Frame):
           " if you're intending to edit maps in Hammer.")
     )
 
+    if not utils.WIN:
+        # This requires fork(), which Windows doesn't have.
+        UI['compile_server'] = ttk.Checkbutton(
+            frame,
+            text=_('Keep compiler loaded'),
+            variable=compile_server_enable,
+        )
+        UI['compile_server'].grid(row=3, column=0, sticky=W)
+        add_tooltip(
+            UI['compile_server'],
+            _("After a compile, keep the compiler running in the background "
+              "for up to 30 minutes. This skips the startup time when "
+              "repeatedly compiling the same map. Changes to the compiler "
+              "restart it automatically.")
+        )
+
     count_frame = ttk.LabelFrame(
         frame,
         text=_('Last Compile:'),
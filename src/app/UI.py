@@ -6,6 +6,7 @@ import itertools
 import operator
 import random
 import math
+from concurrent.futures import Future
 
 from srctools import Property
 from app import music_conf, TK_ROOT
@@ -39,7 +40,7 @@ from app import (
     signage_ui,
 )
 
-from typing import List, Dict, Tuple, Optional, Set, Iterator
+from typing import List, Dict, Tuple, Optional, Iterator
 
 
 LOGGER = srctools.logger.get_logger(__name__)
@@ -58,8 +59,8 @@ pal_items = []  # type: List[PalItem]
 pal_picked_fake = []  # type: List[ttk.Label]
 # Labels for empty picker positions
 pal_items_fake = []  # type: List[ttk.Label]
-# The current filtering state.
-cur_filter: Optional[Set[Tuple[str, int]]] = None
+# The current filtering state - the visible items, mapped to their rank.
+cur_filter: Optional[Dict[Tuple[str, int], int]] = None
 
 ItemsBG = "#CDD0CE"  # Colour of the main background to match the menu image
 
@@ -84,6 +85,9 @@ item_opts = ConfigFile('item_configs.cfg')
 # in most fonts.
 CHR_GEAR = '☼ '
 
+# Set while an export is running in the background.
+_exporting = False
+
 
 class Item:
     """Represents an item that can appear on the list."""
@@ -415,6 +419,7 @@ def quit_application() -> None:
     item_opts.save_check()
     CompilerPane.COMPILE_CFG.save_check()
     gameMan.save()
+    img.save_thumbnails()
 
     # Destroy the TK windows, finalise logging, then quit.
     logging.shutdown()
@@ -723,7 +728,7 @@ def refresh_pal_ui() -> None:
     listbox.delete(0, END)
 
     for i, pal in enumerate(paletteLoader.pal_list):
-        if pal.settings is not None:
+        if pal.has_settings:
             listbox.insert(i, CHR_GEAR + pal.name)
         else:
             listbox.insert(i, pal.name)
@@ -759,8 +764,8 @@ def refresh_pal_ui() -> None:
     for val, pal in enumerate(paletteLoader.pal_list):
         menus['pal'].add_radiobutton(
             label=(
-                pal.name if pal.settings is None
-                else CHR_GEAR + pal.name
+                CHR_GEAR + pal.name if pal.has_settings
+                else pal.name
             ),
             variable=selectedPalette_radio,
             value=val,
@@ -769,8 +774,22 @@ def refresh_pal_ui() -> None:
     selectedPalette_radio.set(selectedPalette)
 
 
+def _set_exporting(exporting: bool) -> None:
+    """Record if an export is running, disabling the export commands."""
+    global _exporting
+    _exporting = exporting
+    UI['export_btn'].state(['disabled' if exporting else '!disabled'])
+    menus['file'].entryconfigure(
+        menus['file'].export_btn_index,
+        state='disabled' if exporting else 'normal',
+    )
+
+
 def export_editoritems(e=None):
     """Export the selected Items and Style into the chosen game."""
+    if _exporting:
+        LOGGER.info('Already exporting!')
+        return
 
     # Convert IntVar to boolean, and only export values in the selected style
     style_vals = StyleVarPane.tk_vars
@@ -806,28 +825,47 @@ def export_editoritems(e=None):
         item_opts.items()
     }
 
-    success, vpk_success = gameMan.selected_game.export(
-        style=chosen_style,
-        selected_objects={
-            # Specify the 'chosen item' for each object type
-            'Music': music_conf.export_data(),
-            'Skybox': skybox_win.chosen_id,
-            'QuotePack': voice_win.chosen_id,
-            'Elevator': elev_win.chosen_id,
+    game = gameMan.selected_game
+    selected_objects = {
+        # Specify the 'chosen item' for each object type
+        'Music': music_conf.export_data(),
+        'Skybox': skybox_win.chosen_id,
+        'QuotePack': voice_win.chosen_id,
+        'Elevator': elev_win.chosen_id,
 
-            'Item': (pal_data, item_versions, item_properties),
-            'StyleVar': style_vars,
-            'Signage': signage_ui.export_data(),
+        'Item': (pal_data, item_versions, item_properties),
+        'StyleVar': style_vars,
+        'Signage': signage_ui.export_data(),
 
-            # The others don't have one, so it defaults to None.
-        },
-        should_refresh=not GEN_OPTS.get_bool(
-            'General',
-            'preserve_BEE2_resource_dir',
-            False,
-        )
+        # The others don't have one, so it defaults to None.
+    }
+    should_refresh = not GEN_OPTS.get_bool(
+        'General',
+        'preserve_BEE2_resource_dir',
+        False,
     )
 
+    # Export on a background thread, so the UI keeps responding.
+    _set_exporting(True)
+    tk_tools.run_in_background(
+        'export',
+        lambda: game.export(
+            style=chosen_style,
+            selected_objects=selected_objects,
+            should_refresh=should_refresh,
+        ),
+        lambda future: _finish_export(future, pal_data),
+    )
+
+
+def _finish_export(
+    future: 'Future[Tuple[bool, bool]]',
+    pal_data: List[Tuple[str, int]],
+) -> None:
+    """After the export completes, save the palette and tell the user."""
+    _set_exporting(False)
+    success, vpk_success = future.result()
+
     if not success:
         return
 
@@ -1323,11 +1361,12 @@ def init_option(pane: SubPane) -> None:
 
     ttk.Separator(frame, orient='horizontal').grid(row=3, sticky="EW")
 
-    ttk.Button(
+    UI['export_btn'] = ttk.Button(
         frame,
         textvariable=EXPORT_CMD_VAR,
         command=export_editoritems,
-    ).grid(row=4, sticky="EW", padx=5)
+    )
+    UI['export_btn'].grid(row=4, sticky="EW", padx=5)
 
     props = ttk.Frame(frame, width="50")
     props.columnconfigure(1, weight=1)
@@ -1562,8 +1601,17 @@ def flow_picker(e=None):
     if width < 1:
         width = 1  # we got way too small, prevent division by zero
 
+    if cur_filter is None:
+        ordered_items = pal_items
+    else:
+        # Show the best search results first.
+        ordered_items = sorted(
+            pal_items,
+            key=lambda item: cur_filter.get((item.item.id, item.subKey), 0),
+        )
+
     i = 0
-    for item in pal_items:
+    for item in ordered_items:
         if item.needs_unlock and not style_unlocked:
             visible = False
         elif cur_filter is None:
@@ -1826,7 +1874,7 @@ def init_windows() -> None:
     )
     search_frame.grid(row=0, column=0, sticky='ew')
 
-    def update_filter(new_filter: Optional[Set[Tuple[str, int]]]) -> None:
+    def update_filter(new_filter: Optional[Dict[Tuple[str, int], int]]) -> None:
         """Refresh filtered items whenever it's changed."""
         global cur_filter
         cur_filter = new_filter
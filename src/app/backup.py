@@ -2,14 +2,19 @@
 
 """
 import atexit
+import hashlib
+import lzma
 import os
+import pickle
 import shutil
 import string
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from io import BytesIO, TextIOWrapper
-from typing import List, TYPE_CHECKING, Dict, Any
-from zipfile import ZipFile, ZIP_LZMA
+from typing import List, TYPE_CHECKING, Dict, Any, Optional, Set, Tuple, IO
+from zipfile import ZipFile, ZIP_LZMA, ZIP_STORED
 
 import loadScreen
 import srctools.logger
@@ -18,7 +23,8 @@ import tkinter as tk
 import utils
 from app.CheckDetails import CheckDetails, Item as CheckItem
 from FakeZip import FakeZip, zip_names, zip_open_bin
-from srctools import Property, KeyValError
+from srctools import Property, KeyValError, AtomicWriter
+from srctools.tokenizer import Tokenizer, Token, TokenSyntaxError
 from tkinter import filedialog
 from tkinter import messagebox
 from tkinter import ttk
@@ -42,6 +48,30 @@ AUTO_BACKUP_STAGE = 'BACKUP_ZIP'
 BACKUP_CHARS = set(string.ascii_letters + string.digits + '_-.')
 # Format for the backup filename
 AUTO_BACKUP_FILE = 'back_{game}{ind}.zip'
+# Format for incremental backups, which list the files in BLOB_FOLDER.
+AUTO_BACKUP_MANIFEST = 'back_{game}{ind}.bee2_backup'
+MANIFEST_EXT = '.bee2_backup'
+# In the backup folder, the files in incremental backups are compressed and
+# stored once, named by their hash.
+BLOB_FOLDER = 'blobs'
+
+# Incremental backups are done in the background. Only run one at a time.
+_backup_lock = threading.Lock()
+
+# The keys in P2C files we display.
+P2C_HEADER_KEYS = {
+    'title',
+    'description',
+    'coop',
+    'timestamp_created',
+    'timestamp_modified',
+}
+# Caches the headers of the puzzles in the game folder.
+P2C_CACHE_FILENAME = 'config/puzzle_cache.bin'
+# Increment to discard old caches if the format changes.
+P2C_CACHE_VERSION = 1
+# Absolute path -> (mtime, size), header. The header is None if invalid.
+_p2c_cache: Dict[str, Tuple[Tuple[int, int], Optional[Dict[str, str]]]] = {}
 
 HEADERS = ['Name', 'Mode', 'Date']
 
@@ -117,31 +147,20 @@ class P2C:
         path is the file path for the map inside the zip, without extension.
         zip_file is either a ZipFile or FakeZip object.
         """
-        # Some P2Cs may have non-ASCII characters in descriptions, so we
-        # need to read it as bytes and convert to utf-8 ourselves - zips
-        # don't convert encodings automatically for us.
-        try:
-            with zip_open_bin(zip_file, path + '.p2c') as file:
-                # Decode the P2C as UTF-8, and skip unknown characters.
-                # We're only using it for display purposes, so that should
-                # be sufficient.
-                with TextIOWrapper(
-                    file,
-                    encoding='utf-8',
-                    errors='replace',
-                ) as textfile:
-                    props = Property.parse(textfile, path)
-        except KeyValError:
+        return cls.from_header(path, zip_file, load_p2c_header(path, zip_file))
+
+    @classmethod
+    def from_header(cls, path, zip_file, header: Optional[Dict[str, str]]):
+        """Initialise from the result of load_p2c_header()."""
+        if header is None:
             # Silently fail if we can't parse the file. That way it's still
             # possible to backup.
-            LOGGER.warning('Failed parsing puzzle file!', path, exc_info=True)
-            props = Property('portal2_puzzle', [])
+            header = {}
             title = None
             desc = _('Failed to parse this puzzle file. It can still be backed up.')
         else:
-            props = props.find_key('portal2_puzzle', [])
-            title = props['title', None]
-            desc = props['description', _('No description found.')]
+            title = header.get('title')
+            desc = header.get('description', _('No description found.'))
 
         if title is None:
             title = '<' + path.rsplit('/', 1)[-1] + '.p2c>'
@@ -151,9 +170,9 @@ class P2C:
             zip_file=zip_file,
             title=title,
             desc=desc,
-            is_coop=srctools.conv_bool(props['coop', '0']),
-            create_time=Date(props['timestamp_created', '']),
-            mod_time=Date(props['timestamp_modified', '']),
+            is_coop=srctools.conv_bool(header.get('coop', '0')),
+            create_time=Date(header.get('timestamp_created', '')),
+            mod_time=Date(header.get('timestamp_modified', '')),
         )
 
     def copy(self):
@@ -242,31 +261,165 @@ class Date:
 # directories.
 
 
+def read_p2c_header(file: IO[str], filename: str) -> Dict[str, str]:
+    """Read the keys in P2C_HEADER_KEYS from a P2C file.
+
+    The map itself makes up most of the file, so we stop as soon as all the
+    keys are found instead of parsing everything.
+    """
+    header = {}  # type: Dict[str, str]
+    depth = 0
+    key = None  # type: Optional[str]
+    for tok_type, tok_value in Tokenizer(file, filename):
+        if tok_type is Token.BRACE_OPEN:
+            depth += 1
+            key = None
+        elif tok_type is Token.BRACE_CLOSE:
+            depth -= 1
+            key = None
+            if depth <= 0:
+                break
+        elif tok_type is Token.STRING and depth == 1:
+            if key is None:
+                key = tok_value.casefold()
+                continue
+            if key in P2C_HEADER_KEYS:
+                header[key] = tok_value
+                if len(header) == len(P2C_HEADER_KEYS):
+                    break
+            key = None
+    return header
+
+
+def load_p2c_header(path: str, zip_file) -> Optional[Dict[str, str]]:
+    """Read the header of a P2C file in a zip, or None if it's invalid."""
+    # Some P2Cs may have non-ASCII characters in descriptions, so we
+    # need to read it as bytes and convert to utf-8 ourselves - zips
+    # don't convert encodings automatically for us.
+    try:
+        with zip_open_bin(zip_file, path + '.p2c') as file:
+            # Decode the P2C as UTF-8, and skip unknown characters.
+            # We're only using it for display purposes, so that should
+            # be sufficient.
+            with TextIOWrapper(
+                file,
+                encoding='utf-8',
+                errors='replace',
+            ) as textfile:
+                return read_p2c_header(textfile, path)
+    except TokenSyntaxError:
+        LOGGER.warning('Failed parsing puzzle file "{}"!', path, exc_info=True)
+        return None
+
+
+def _load_p2c_cache() -> None:
+    """Read the cache of puzzle headers, if not already loaded."""
+    if _p2c_cache:
+        return
+    try:
+        with open(utils.conf_location(P2C_CACHE_FILENAME), 'rb') as f:
+            version, data = pickle.load(f)
+    except FileNotFoundError:
+        return
+    except Exception:
+        LOGGER.warning('Could not read puzzle cache:', exc_info=True)
+        return
+    if version == P2C_CACHE_VERSION:
+        _p2c_cache.update(data)
+
+
+def _p2c_file_key(filename: str) -> Optional[Tuple[int, int]]:
+    """Return the stat info used to determine if a puzzle changed."""
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Note: All the backup functions use zip files, but also work on FakeZip
+# directories.
+
+
 def load_backup(zip_file):
-    """Load in a backup file."""
-    maps = []
+    """Load in a backup file.
+
+    The puzzles are read in parallel. For the game folder, the headers are
+    cached between loads.
+    """
     puzzles = [
         file[:-4]  # Strip extension
         for file in
         zip_names(zip_file)
         if file.endswith('.p2c')
     ]
-    # Each P2C init requires reading in the properties file, so this may take
-    # some time. Use a loading screen.
+    headers = {}  # type: Dict[str, Optional[Dict[str, str]]]
+    # For the game folder, puzzle -> absolute path, cache key.
+    cache_keys = {}  # type: Dict[str, Tuple[str, Tuple[int, int]]]
+    to_parse = []  # type: List[str]
+    folder = None
+
+    if isinstance(zip_file, FakeZip):
+        _load_p2c_cache()
+        folder = os.path.normcase(os.path.abspath(zip_file.folder))
+        for file in puzzles:
+            path = os.path.join(folder, os.path.normcase(file + '.p2c'))
+            key = _p2c_file_key(path)
+            if key is None:
+                to_parse.append(file)
+                continue
+            cache_keys[file] = path, key
+            try:
+                cached_key, header = _p2c_cache[path]
+            except KeyError:
+                pass
+            else:
+                if cached_key == key:
+                    headers[file] = header
+                    continue
+            to_parse.append(file)
+    else:
+        to_parse = puzzles
+
+    # Reading each puzzle may take some time, so use a loading screen.
     reading_loader.set_length('READ', len(puzzles))
-    LOGGER.info('Loading {} maps..', len(puzzles))
+    LOGGER.info(
+        'Loading {} maps ({} cached)..',
+        len(puzzles), len(puzzles) - len(to_parse),
+    )
+    pool = ThreadPoolExecutor(thread_name_prefix='load_backup')
     with reading_loader:
-        for file in puzzles:
-            new_map = P2C.from_file(file, zip_file)
-            maps.append(new_map)
-            LOGGER.debug(
-                'Loading {} map "{}"',
-                'coop' if new_map.is_coop else 'sp',
-                new_map.title,
-            )
+        for _cached in headers:
             reading_loader.step('READ')
+        futures = {
+            pool.submit(load_p2c_header, file, zip_file): file
+            for file in to_parse
+        }
+        try:
+            for future in as_completed(futures):
+                headers[futures[future]] = future.result()
+                reading_loader.step('READ')
+        except loadScreen.Cancelled:
+            for future in futures:
+                future.cancel()
+            raise
+        finally:
+            pool.shutdown(wait=False)
+
+    maps = []
+    for file in puzzles:
+        new_map = P2C.from_header(file, zip_file, headers[file])
+        maps.append(new_map)
+        LOGGER.debug(
+            'Loading {} map "{}"',
+            'coop' if new_map.is_coop else 'sp',
+            new_map.title,
+        )
     LOGGER.info('Done!')
 
+    if folder is not None:
+        _update_p2c_cache(folder, cache_keys, headers)
+
     # It takes a while before the detail headers update positions,
     # so delay a refresh call.
     TK_ROOT.after(500, UI['game_details'].refresh)
@@ -274,6 +427,32 @@ def load_backup(zip_file):
     return maps
 
 
+def _update_p2c_cache(
+    folder: str,
+    cache_keys: Dict[str, Tuple[str, Tuple[int, int]]],
+    headers: Dict[str, Optional[Dict[str, str]]],
+) -> None:
+    """Store the headers of the puzzles in the game folder."""
+    new_cache = {
+        path: (key, headers[file])
+        for file, (path, key) in cache_keys.items()
+    }
+    changed = False
+    # Remove puzzles which were deleted, including those in subfolders.
+    prefix = os.path.join(folder, '')
+    for path in list(_p2c_cache):
+        if path.startswith(prefix) and path not in new_cache:
+            del _p2c_cache[path]
+            changed = True
+    for path, value in new_cache.items():
+        if _p2c_cache.get(path) != value:
+            _p2c_cache[path] = value
+            changed = True
+    if changed:
+        with AtomicWriter(str(utils.conf_location(P2C_CACHE_FILENAME)), is_bytes=True) as f:
+            pickle.dump((P2C_CACHE_VERSION, _p2c_cache), f, pickle.HIGHEST_PROTOCOL)
+
+
 def load_game(game: 'gameMan.Game'):
     """Callback for gameMan, load in files for a game."""
     game_name.set(game.name)
@@ -367,7 +546,6 @@ def auto_backup(game: 'gameMan.Game', loader: loadScreen.LoadScreen):
     # Keep this many previous
     extra_back_count = GEN_OPTS.get_int('General', 'auto_backup_count', 0)
 
-    to_backup = os.listdir(folder)
     backup_dir = GEN_OPTS.get_val('Directories', 'backup_loc', 'backups/')
 
     os.makedirs(backup_dir, exist_ok=True)
@@ -379,13 +557,52 @@ def auto_backup(game: 'gameMan.Game', loader: loadScreen.LoadScreen):
         valid_chars=BACKUP_CHARS,
     )
 
+    if not GEN_OPTS.get_bool('General', 'auto_backup_zip'):
+        # This is done in the background, so skip the stage.
+        loader.skip_stage(AUTO_BACKUP_STAGE)
+        threading.Thread(
+            target=_incremental_backup,
+            args=(game.name, safe_name, folder, backup_dir, extra_back_count),
+            name='auto_backup',
+        ).start()
+        return
+
+    to_backup = os.listdir(folder)
     loader.set_length(AUTO_BACKUP_STAGE, len(to_backup))
 
+    final_backup = _rotate_backups(
+        backup_dir,
+        AUTO_BACKUP_FILE,
+        safe_name,
+        extra_back_count,
+    )
+    LOGGER.info('Writing backup to "{}"', final_backup)
+    with open(final_backup, 'wb') as f:
+        with ZipFile(f, mode='w', compression=ZIP_LZMA) as zip_file:
+            for file in to_backup:
+                zip_file.write(
+                    os.path.join(folder, file),
+                    file,
+                    ZIP_LZMA,
+                )
+                loader.step(AUTO_BACKUP_STAGE)
+
+
+def _rotate_backups(
+    backup_dir: str,
+    filename: str,
+    safe_name: str,
+    extra_back_count: int,
+) -> str:
+    """Move each previous backup over by 1 index, and return the new filename.
+
+    filename is the format for the backup name.
+    """
     if extra_back_count:
         back_files = [
-            AUTO_BACKUP_FILE.format(game=safe_name, ind='')
+            filename.format(game=safe_name, ind='')
         ] + [
-            AUTO_BACKUP_FILE.format(game=safe_name, ind='_'+str(i+1))
+            filename.format(game=safe_name, ind='_'+str(i+1))
             for i in range(extra_back_count)
         ]
         # Move each file over by 1 index, ignoring missing ones
@@ -409,20 +626,121 @@ def auto_backup(game: 'gameMan.Game', loader: loadScreen.LoadScreen):
             except FileNotFoundError:
                 pass
 
-    final_backup = os.path.join(
+    return os.path.join(
         backup_dir,
-        AUTO_BACKUP_FILE.format(game=safe_name, ind=''),
+        filename.format(game=safe_name, ind=''),
     )
-    LOGGER.info('Writing backup to "{}"', final_backup)
-    with open(final_backup, 'wb') as f:
-        with ZipFile(f, mode='w', compression=ZIP_LZMA) as zip_file:
-            for file in to_backup:
-                zip_file.write(
-                    os.path.join(folder, file),
-                    file,
-                    ZIP_LZMA,
+
+
+def _blob_path(backup_dir: str, file_hash: str) -> str:
+    """The location of a compressed file in an incremental backup."""
+    return os.path.join(backup_dir, BLOB_FOLDER, file_hash[:2], file_hash)
+
+
+def _incremental_backup(
+    game_name: str,
+    safe_name: str,
+    folder: str,
+    backup_dir: str,
+    extra_back_count: int,
+) -> None:
+    """Write an incremental backup of the puzzles, in a background thread.
+
+    Each file is stored under its hash, so only new or changed puzzles
+    need to be compressed. The backup itself just lists the hashes.
+    """
+    start = time.perf_counter()
+    files = Property('Files', [])
+    changed = 0
+    with _backup_lock:
+        try:
+            for file in sorted(os.listdir(folder)):
+                path = os.path.join(folder, file)
+                if not os.path.isfile(path):
+                    continue
+                with open(path, 'rb') as f:
+                    data = f.read()
+                file_hash = hashlib.sha256(data).hexdigest()
+                files.append(Property(file, file_hash))
+
+                blob_path = _blob_path(backup_dir, file_hash)
+                if os.path.exists(blob_path):
+                    continue
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                with AtomicWriter(blob_path, is_bytes=True) as f:
+                    f.write(lzma.compress(data))
+                changed += 1
+
+            final_backup = _rotate_backups(
+                backup_dir,
+                AUTO_BACKUP_MANIFEST,
+                safe_name,
+                extra_back_count,
+            )
+            manifest = Property('Backup', [
+                Property('Game', game_name),
+                Property('Date', datetime.now().isoformat(' ', 'seconds')),
+                files,
+            ])
+            # Write this last, so it only references complete files.
+            with AtomicWriter(final_backup) as f:
+                for line in manifest.export():
+                    f.write(line)
+            _remove_unused_blobs(backup_dir)
+        except Exception:
+            LOGGER.exception('Could not backup puzzles:')
+            return
+    LOGGER.info(
+        'Backed up {} files to "{}" ({} changed) in {:.2f}s',
+        len(files), final_backup, changed, time.perf_counter() - start,
+    )
+
+
+def _remove_unused_blobs(backup_dir: str) -> None:
+    """Delete files which no incremental backup refers to anymore."""
+    used: Set[str] = set()
+    for filename in os.listdir(backup_dir):
+        if not filename.endswith(MANIFEST_EXT):
+            continue
+        try:
+            with open(os.path.join(backup_dir, filename)) as f:
+                props = Property.parse(f, filename)
+        except (OSError, KeyValError):
+            # We don't know what it uses, so don't delete anything.
+            LOGGER.warning('Could not read backup "{}":', filename, exc_info=True)
+            return
+        for prop in props.find_children('Backup', 'Files'):
+            used.add(prop.value)
+
+    blob_folder = os.path.join(backup_dir, BLOB_FOLDER)
+    for dirpath, dirnames, filenames in os.walk(blob_folder):
+        for filename in filenames:
+            # Only remove finished blobs, not any other files.
+            if len(filename) == 64 and filename not in used:
+                os.remove(os.path.join(dirpath, filename))
+
+
+def load_incremental(path: str) -> BytesIO:
+    """Extract an incremental backup into a zip, so it can be loaded."""
+    backup_dir = os.path.dirname(path)
+    with open(path) as f:
+        props = Property.parse(f, path)
+
+    zip_data = BytesIO()
+    with ZipFile(zip_data, 'w', compression=ZIP_STORED) as zip_file:
+        for prop in props.find_children('Backup', 'Files'):
+            try:
+                with open(_blob_path(backup_dir, prop.value), 'rb') as f:
+                    data = lzma.decompress(f.read())
+            except (OSError, lzma.LZMAError):
+                LOGGER.warning(
+                    'Backup "{}" is missing "{}"!',
+                    path, prop.real_name,
+                    exc_info=True,
                 )
-                loader.step(AUTO_BACKUP_STAGE)
+                continue
+            zip_file.writestr(prop.real_name, data)
+    return zip_data
 
 
 def save_backup():
@@ -564,16 +882,33 @@ def ui_load_backup() -> None:
     """Prompt and load in a backup file."""
     file = filedialog.askopenfilename(
         title=_('Load Backup'),
-        filetypes=[(_('Backup zip'), '.zip')],
+        filetypes=[
+            (_('Backup zip'), '.zip'),
+            (_('Automatic backup'), MANIFEST_EXT),
+        ],
     )
     if not file:
         return
 
-    BACKUPS['backup_path'] = file
-    with open(file, 'rb') as f:
-        # Read the backup zip into memory!
-        data = f.read()
-        BACKUPS['unsaved_file'] = unsaved = BytesIO(data)
+    if file.endswith(MANIFEST_EXT):
+        try:
+            BACKUPS['unsaved_file'] = unsaved = load_incremental(file)
+        except (OSError, KeyValError):
+            LOGGER.exception('Could not load backup "{}":', file)
+            messagebox.showerror(
+                _('BEE2 Backup'),
+                _('This backup could not be loaded!'),
+                parent=window,
+            )
+            return
+        # This can only be saved as a zip.
+        BACKUPS['backup_path'] = None
+    else:
+        BACKUPS['backup_path'] = file
+        with open(file, 'rb') as f:
+            # Read the backup zip into memory!
+            data = f.read()
+            BACKUPS['unsaved_file'] = unsaved = BytesIO(data)
 
     zip_file = ZipFile(
         unsaved,
@@ -904,6 +1239,9 @@ def init_backup_settings() -> None:
     check_var = tk.IntVar(
         value=GEN_OPTS.get_bool('General', 'enable_auto_backup')
     )
+    zip_var = tk.IntVar(
+        value=GEN_OPTS.get_bool('General', 'auto_backup_zip')
+    )
     count_value = GEN_OPTS.get_int('General', 'auto_backup_count', 0)
     back_dir = GEN_OPTS.get_val('Directories', 'backup_loc', 'backups/')
 
@@ -912,6 +1250,11 @@ def init_backup_settings() -> None:
             check_var.get()
         )
 
+    def zip_callback():
+        GEN_OPTS['General']['auto_backup_zip'] = srctools.bool_as_int(
+            zip_var.get()
+        )
+
     def count_callback():
         GEN_OPTS['General']['auto_backup_count'] = str(count.value)
 
@@ -966,6 +1309,19 @@ def init_backup_settings() -> None:
     count.grid(row=1, column=0)
     count.value = count_value
 
+    UI['auto_zip'] = zip_check = ttk.Checkbutton(
+        frame,
+        text=_('Save As Zip'),
+        variable=zip_var,
+        command=zip_callback,
+    )
+    zip_check.grid(row=1, column=0, columnspan=2)
+    add_tooltip(
+        zip_check,
+        _('Write each backup as a complete zip file, instead of only '
+          'storing the puzzles which changed. This is slower.'),
+    )
+
 
 def init_toplevel() -> None:
     """Initialise the window as part of the BEE2."""
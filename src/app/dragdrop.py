@@ -14,7 +14,7 @@ from typing import (
     Iterator, Iterable,
 )
 
-__all__ = ['Manager', 'Slot', 'ItemProto']
+__all__ = ['Manager', 'Slot', 'CanvasPicker', 'PickerCell', 'ItemProto']
 
 try:
     from typing import Protocol
@@ -35,6 +35,8 @@ ItemT = TypeVar('ItemT', bound=ItemProto)  # The object the items move around.
 
 # Tag used on canvases for our flowed slots.
 _CANV_TAG = '_BEE2_dragdrop_item'
+# Tag used for the icons drawn by pickers.
+_PICKER_TAG = '_BEE2_dragdrop_picker'
 
 
 class Event(Enum):
@@ -82,6 +84,7 @@ class Manager(Generic[ItemT]):
 
         self._targets = []  # type: List[Slot[ItemT]]
         self._sources = []  # type: List[Slot[ItemT]]
+        self._pickers = []  # type: List[CanvasPicker[ItemT]]
 
         self._img_blank = img.color_square(img.PETI_ITEM_BG, size)
 
@@ -89,8 +92,8 @@ class Manager(Generic[ItemT]):
 
         # If dragging, the item we are dragging.
         self._cur_drag = None  # type: Optional[ItemT]
-        # While dragging, the place we started at.
-        self._cur_prev_slot = None  # type: Optional[Slot[ItemT]]
+        # While dragging, whether we started from a source.
+        self._cur_from_source = False
 
         self._callbacks = {
             event: []
@@ -134,6 +137,20 @@ class Manager(Generic[ItemT]):
 
         return slot
 
+    def picker(
+        self: 'Manager[ItemT]',
+        canv: tkinter.Canvas,
+        yscroll: Optional[Callable[[str, str], Any]]=None,
+    ) -> 'CanvasPicker[ItemT]':
+        """Add a picker to this group, drawing source items onto a canvas.
+
+        This is much faster than source slots if there are a large number of
+        items. yscroll should be the scrollbar's set method, if present.
+        """
+        picker: CanvasPicker[ItemT] = CanvasPicker(self, canv, yscroll)
+        self._pickers.append(picker)
+        return picker
+
     def remove(self, slot: 'Slot[ItemT]') -> None:
         """Remove the specified slot."""
         (self._sources if slot.is_source else self._targets).remove(slot)
@@ -159,6 +176,9 @@ class Manager(Generic[ItemT]):
             # These are never grouped.
             self._display_item(slot._lbl, slot.contents)
 
+        for picker in self._pickers:
+            picker.redraw()
+
     def sources(self) -> 'Iterator[Slot[ItemT]]':
         """Yield all source slots."""
         return iter(self._sources)
@@ -282,7 +302,7 @@ class Manager(Generic[ItemT]):
         if slot.contents is None:
             return  # Can't pick up blank...
 
-        self._cur_drag = slot.contents
+        item = slot.contents
 
         show_group = False
 
@@ -292,7 +312,7 @@ class Manager(Generic[ItemT]):
             # If none of this group are present in the targets and we're
             # pulling from the items, we hold a group icon.
             try:
-                group = self._cur_drag.dnd_group
+                group = item.dnd_group
             except AttributeError:
                 pass
             else:
@@ -304,13 +324,25 @@ class Manager(Generic[ItemT]):
                         # None present.
                         show_group = True
 
-        self._display_item(self._drag_lbl, self._cur_drag, show_group)
-        self._cur_prev_slot = slot
+        self._begin_drag(item, slot.is_source, slot._lbl, event, show_group)
+
+    def _begin_drag(
+        self,
+        item: ItemT,
+        from_source: bool,
+        widget: tkinter.Misc,
+        event: tkinter.Event,
+        show_group: bool=False,
+    ) -> None:
+        """Pick up the item, from either a slot or a picker."""
+        self._cur_drag = item
+        self._cur_from_source = from_source
+        self._display_item(self._drag_lbl, item, show_group)
 
         sound.fx('config')
 
         self._drag_win.deiconify()
-        self._drag_win.lift(slot._lbl.winfo_toplevel())
+        self._drag_win.lift(widget.winfo_toplevel())
         # grab makes this window the only one to receive mouse events, so
         # it is guaranteed that it'll drop when the mouse is released.
         self._drag_win.grab_set_global()
@@ -322,9 +354,22 @@ class Manager(Generic[ItemT]):
 
         self._drag_win.bind(utils.EVENTS['LEFT_MOVE'], self._evt_move)
 
+    def _fast_add(self, item: ItemT) -> None:
+        """Add this item to the first free target, if not already present."""
+        for slot in self._targets:
+            if slot.contents is None:
+                slot.contents = item
+                sound.fx('config')
+                return
+            elif slot.contents is item:
+                # It's already on the board, don't change anything.
+                sound.fx('config')
+                return
+        sound.fx('delete')
+
     def _evt_move(self, event: tkinter.Event) -> None:
         """Reposition the item whenever moving."""
-        if self._cur_drag is None or self._cur_prev_slot is None:
+        if self._cur_drag is None:
             # We aren't dragging, ignore the event.
             return
 
@@ -337,14 +382,14 @@ class Manager(Generic[ItemT]):
 
         if dest:
             self._drag_win.configure(cursor=utils.CURSORS['move_item'])
-        elif self._cur_prev_slot.is_source:
+        elif self._cur_from_source:
             self._drag_win.configure(cursor=utils.CURSORS['invalid_drag'])
         else:
             self._drag_win.configure(cursor=utils.CURSORS['destroy_item'])
 
     def _evt_stop(self, event: tkinter.Event) -> None:
         """User released the item."""
-        if self._cur_drag is None or self._cur_prev_slot is None:
+        if self._cur_drag is None:
             return
 
         sound.fx('config')
@@ -358,11 +403,11 @@ class Manager(Generic[ItemT]):
             # We have a target.
             dest.contents = self._cur_drag
         # No target, and we dragged off an existing target - delete.
-        elif not self._cur_prev_slot.is_source:
+        elif not self._cur_from_source:
             sound.fx('delete')
 
         self._cur_drag = None
-        self._cur_prev_slot = None
+        self._cur_from_source = False
 
 
 # noinspection PyProtectedMember
@@ -512,17 +557,7 @@ class Slot(Generic[ItemT]):
         """Quickly add/remove items by shift-clicking."""
         if self.is_source:
             # Add this item to the first free position.
-            item = self.contents
-            for slot in self.man._targets:
-                if slot.contents is None:
-                    slot.contents = item
-                    sound.fx('config')
-                    return
-                elif slot.contents is item:
-                    # It's already on the board, don't change anything.
-                    sound.fx('config')
-                    return
-            sound.fx('delete')
+            self.man._fast_add(self.contents)
         else:
             # Fast-delete this.
             self.contents = None
@@ -567,6 +602,204 @@ class Slot(Generic[ItemT]):
             self.man._fire_callback(Event.CONFIG, self)
 
 
+class PickerCell(Generic[ItemT]):
+    """Passed to callbacks for items in a picker, in place of a Slot."""
+    is_source = True
+
+    def __init__(self, picker: 'CanvasPicker[ItemT]', index: int) -> None:
+        self.picker = picker
+        self.index = index
+
+    @property
+    def contents(self) -> Optional[ItemT]:
+        """The item in this cell."""
+        return self.picker.items[self.index]
+
+    def __repr__(self) -> str:
+        return f'<PickerCell {self.index}: {self.contents!r}>'
+
+
+# noinspection PyProtectedMember
+class CanvasPicker(Generic[ItemT]):
+    """A set of source items, drawn directly onto a canvas.
+
+    Unlike source slots, no widgets are created for each item - only the
+    icons in the rows currently scrolled into view exist. Mouse events
+    are mapped to items by their position in the grid.
+    """
+    def __init__(
+        self,
+        man: Manager[ItemT],
+        canv: tkinter.Canvas,
+        yscroll: Optional[Callable[[str, str], Any]]=None,
+        spacing: int=16 if utils.MAC else 8,
+    ) -> None:
+        """Internal only, use Manager.picker()."""
+        self.man = man
+        self.canv = canv
+        self.spacing = spacing
+        self.items = []  # type: List[ItemT]
+        self._yscroll = yscroll
+
+        self._col_count = 1
+        # Row -> the canvas IDs for its icons.
+        self._drawn = {}  # type: Dict[int, List[int]]
+        # The item the mouse is over, and the highlight around it.
+        self._hover_ind = None  # type: Optional[int]
+        self._hover_rect = None  # type: Optional[int]
+
+        # Tk calls this whenever the visible area changes.
+        canv['yscrollcommand'] = self._evt_scrolled
+        canv.bind('<Configure>', lambda e: self.flow(), add='+')
+        utils.bind_leftclick(canv, self._evt_start)
+        canv.bind(utils.EVENTS['LEFT_SHIFT'], self._evt_fastdrag)
+        canv.bind('<Motion>', self._evt_motion)
+        canv.bind('<Leave>', self._evt_leave)
+        utils.bind_rightclick(canv, self._evt_configure)
+
+    @property
+    def _cell_width(self) -> int:
+        return self.man.width + self.spacing * 2
+
+    @property
+    def _cell_height(self) -> int:
+        return self.man.height + self.spacing * 2
+
+    def set_items(self, items: Iterable[ItemT]) -> None:
+        """Change the items displayed."""
+        self.items = list(items)
+        self.flow()
+
+    def flow(self) -> None:
+        """Recompute the grid layout, after resizing or changing items."""
+        self._col_count = max(
+            1,
+            (self.canv.winfo_width() - self.spacing) // self._cell_width,
+        )
+        row_count = -(-len(self.items) // self._col_count)
+        self.canv['scrollregion'] = (
+            0, 0,
+            self._col_count * self._cell_width + self.spacing,
+            row_count * self._cell_height + self.spacing,
+        )
+        self.redraw()
+
+    def redraw(self) -> None:
+        """Discard all drawn icons, then draw the visible ones again."""
+        self.canv.delete(_PICKER_TAG)
+        self._drawn.clear()
+        self._hover_rect = None
+        self._draw_visible()
+
+    def _draw_visible(self) -> None:
+        """Create the icons scrolled into view, and remove the others."""
+        top = self.canv.canvasy(0)
+        bottom = self.canv.canvasy(self.canv.winfo_height())
+        row_count = -(-len(self.items) // self._col_count)
+        visible = range(
+            max(0, int(top // self._cell_height)),
+            min(row_count, int(bottom // self._cell_height) + 1),
+        )
+
+        for row in list(self._drawn):
+            if row not in visible:
+                self.canv.delete(*self._drawn.pop(row))
+
+        for row in visible:
+            if row in self._drawn:
+                continue
+            ids = self._drawn[row] = []
+            start = row * self._col_count
+            for col, item in enumerate(self.items[start:start + self._col_count]):
+                pos = (
+                    self.spacing + col * self._cell_width,
+                    self.spacing + row * self._cell_height,
+                )
+                try:
+                    ids.append(self.canv.create_image(
+                        *pos, image=item.dnd_icon,
+                        anchor='nw', tags=_PICKER_TAG,
+                    ))
+                except tkinter.TclError:
+                    # Not an image...
+                    ids.append(self.canv.create_image(
+                        *pos, image=img.img_error,
+                        anchor='nw', tags=_PICKER_TAG,
+                    ))
+
+    def _index_at(self, event: tkinter.Event) -> Optional[int]:
+        """Find the item under the mouse (if any)."""
+        x = self.canv.canvasx(event.x)
+        y = self.canv.canvasy(event.y)
+        col, off_x = divmod(int(x), self._cell_width)
+        row, off_y = divmod(int(y), self._cell_height)
+        if col >= self._col_count:
+            return None
+        if not (
+            self.spacing <= off_x < self.spacing + self.man.width and
+            self.spacing <= off_y < self.spacing + self.man.height
+        ):
+            return None
+        ind = row * self._col_count + col
+        if 0 <= ind < len(self.items):
+            return ind
+        return None
+
+    def _evt_scrolled(self, first: str, last: str) -> None:
+        """The view moved, update the scrollbar and icons."""
+        if self._yscroll is not None:
+            self._yscroll(first, last)
+        self._draw_visible()
+
+    def _evt_start(self, event: tkinter.Event) -> None:
+        """Start dragging."""
+        ind = self._index_at(event)
+        if ind is not None:
+            self.man._begin_drag(self.items[ind], True, self.canv, event)
+
+    def _evt_fastdrag(self, event: tkinter.Event) -> None:
+        """Quickly add items by shift-clicking."""
+        ind = self._index_at(event)
+        if ind is not None:
+            self.man._fast_add(self.items[ind])
+
+    def _evt_motion(self, event: tkinter.Event) -> None:
+        """Highlight the item under the mouse, and fire hover events."""
+        ind = self._index_at(event)
+        if ind == self._hover_ind:
+            return
+        self._evt_leave(event)
+        if ind is None:
+            return
+        self._hover_ind = ind
+        row, col = divmod(ind, self._col_count)
+        x = self.spacing + col * self._cell_width
+        y = self.spacing + row * self._cell_height
+        self._hover_rect = self.canv.create_rectangle(
+            x - 1, y - 1,
+            x + self.man.width, y + self.man.height,
+            tags=_PICKER_TAG,
+        )
+        self.man._fire_callback(Event.HOVER_ENTER, PickerCell(self, ind))
+
+    def _evt_leave(self, event: tkinter.Event) -> None:
+        """Clear the highlight when the mouse leaves an item."""
+        if self._hover_rect is not None:
+            self.canv.delete(self._hover_rect)
+            self._hover_rect = None
+        if self._hover_ind is not None:
+            ind = self._hover_ind
+            self._hover_ind = None
+            if ind < len(self.items):
+                self.man._fire_callback(Event.HOVER_EXIT, PickerCell(self, ind))
+
+    def _evt_configure(self, event: tkinter.Event) -> None:
+        """Configuration event, fired by right-clicking an item."""
+        ind = self._index_at(event)
+        if ind is not None:
+            self.man._fire_callback(Event.CONFIG, PickerCell(self, ind))
+
+
 def _test() -> None:
     """Test the GUI."""
     from srctools.logger import init_logging
@@ -584,10 +817,15 @@ def _test() -> None:
 
     left_frm = ttk.Frame(TK_ROOT)
     right_canv = tkinter.Canvas(TK_ROOT)
+    picker_canv = tkinter.Canvas(TK_ROOT)
+    picker_scroll = ttk.Scrollbar(TK_ROOT, orient='vertical', command=picker_canv.yview)
 
     left_frm.grid(row=0, column=0, sticky='NSEW', padx=8)
     right_canv.grid(row=0, column=1, sticky='NSEW', padx=8)
+    picker_canv.grid(row=1, column=1, sticky='NSEW', padx=8)
+    picker_scroll.grid(row=1, column=2, sticky='NS')
     TK_ROOT.rowconfigure(0, weight=1)
+    TK_ROOT.rowconfigure(1, weight=1)
     TK_ROOT.columnconfigure(1, weight=1)
 
     slot_dest = []
@@ -657,6 +895,15 @@ def _test() -> None:
     configure(None)
     right_canv.bind('<Configure>', configure)
 
+    # Stress-test the picker with a large number of items.
+    import time
+    picker = manager.picker(picker_canv, picker_scroll.set)
+    start = time.perf_counter()
+    picker.set_items(items * 334)
+    TK_ROOT.update_idletasks()
+    print(f'Picker: {len(picker.items)} items in {time.perf_counter() - start:.3f}s')
+    utils.add_mousewheel(picker_canv, picker_canv)
+
     ttk.Button(
         TK_ROOT,
         text='Debug',
@@ -19,6 +19,9 @@ import io
 import pickle
 import pickletools
 import copy
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
 
 from BEE2_config import ConfigFile, GEN_OPTS
 from srctools import (
@@ -32,11 +35,12 @@ from app import backup, optionWindow, tk_tools, TK_ROOT
 import loadScreen
 import packages
 import editoritems
+import sndscript_db
 import utils
 import srctools
 import webbrowser
 
-from typing import List, Tuple, Set, Iterable, Iterator, Dict, Union
+from typing import List, Tuple, Set, Iterable, Iterator, Dict, Union, Optional
 
 
 try:
@@ -58,6 +62,22 @@ TRANS_DATA = {}
 
 CONFIG = ConfigFile('games.cfg')
 
+# The number of export stages which can run alongside the main one.
+EXPORT_WORKERS = 4
+
+# Records the compiler files we copied into bin/, relative to the game.
+COMPILER_MANIFEST = 'bin/bee2/compiler_manifest.bin'
+# Increment to discard old manifests if the format changes.
+COMPILER_MANIFEST_VERSION = 1
+# The number of compiler files copied at once.
+COMPILER_COPY_WORKERS = 4
+
+# Records which editor models are enabled, relative to the game.
+EDITOR_MODEL_STATE = 'bin/bee2/editor_models.bin'
+EDITOR_MODEL_STATE_VERSION = 1
+# The files making up a model. Longer extensions need to be checked first.
+EDITOR_MODEL_EXTS = ['.dx80.vtx', '.dx90.vtx', '.sw.vtx', '.vtx', '.mdl', '.vvd', '.phy']
+
 FILES_TO_BACKUP = [
     ('Editoritems', 'portal2_dlc2/scripts/editoritems', '.txt'),
     ('Windows VBSP', 'bin/vbsp',       '.exe'),
@@ -247,6 +267,75 @@ def quit_application():
     sys.exit()
 
 
+def _file_key(filename: Union[str, Path]) -> Optional[Tuple[int, int]]:
+    """Return the stat info used to determine if a file changed."""
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _hash_file(filename: Union[str, Path]) -> str:
+    """Hash the contents of a file."""
+    hasher = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _find_editor_models(files: Iterable[str]) -> Dict[str, Tuple[str, ...]]:
+    """Group the files in an editor model folder by model.
+
+    This returns each model name, and the extensions of the files it has.
+    """
+    models = {}  # type: Dict[str, Set[str]]
+    for file in files:
+        if file.endswith('_dis'):
+            file = file[:-4]
+        folded = file.casefold()
+        for ext in EDITOR_MODEL_EXTS:
+            if folded.endswith(ext):
+                models.setdefault(file[:-len(ext)], set()).add(ext)
+                break
+    # Only count models which actually have a .mdl file.
+    return {
+        name: tuple(sorted(exts))
+        for name, exts in models.items()
+        if '.mdl' in exts
+    }
+
+
+def _set_model_enabled(folder: str, name: str, files: Set[str], enabled: bool) -> int:
+    """Rename a model's files to enable or disable it.
+
+    files is the set of filenames present in the folder. If both versions of
+    a file are present, the enabled one was just extracted so it's kept.
+    This returns the number of files changed.
+    """
+    changed = 0
+    for ext in EDITOR_MODEL_EXTS:
+        on_name = name + ext
+        off_name = on_name + '_dis'
+        if enabled and off_name in files:
+            if on_name in files:
+                os.remove(os.path.join(folder, off_name))
+            else:
+                os.rename(
+                    os.path.join(folder, off_name),
+                    os.path.join(folder, on_name),
+                )
+            changed += 1
+        elif not enabled and on_name in files:
+            os.replace(
+                os.path.join(folder, on_name),
+                os.path.join(folder, off_name),
+            )
+            changed += 1
+    return changed
+
+
 def should_backup_app(file: str) -> bool:
     """Check if the given application is Valve's, or ours.
 
@@ -525,7 +614,8 @@ class Game:
         """
         screen_func = export_screen.step
 
-        with res_system:
+        # The images may be loading from these filesystems at the same time.
+        with utils.FSYS_LOCK, res_system:
             for file in res_system.walk_folder_repeat():
                 try:
                     start_folder, path = file.path.split('/', 1)
@@ -562,7 +652,7 @@ class Game:
                 for file in filenames:
                     # Keep VMX backups, disabled editor models, and the coop
                     # gun instance.
-                    if file.endswith(('.vmx', '.mdl_dis', 'tag_coop_gun.vmf')):
+                    if file.endswith(('.vmx', '_dis', 'tag_coop_gun.vmf')):
                         continue
                     path = os.path.join(dirpath, file).casefold()
 
@@ -617,10 +707,15 @@ class Game:
         # VBSP, VRAD, editoritems
         export_screen.set_length('BACK', len(FILES_TO_BACKUP))
         # files in compiler/
+        compiler_src = utils.install_path('compiler')
         try:
-            num_compiler_files = sum(1 for file in utils.install_path('compiler').rglob('*'))
+            compiler_files = [
+                file for file in compiler_src.rglob('*')
+                if not file.is_dir()
+            ]
         except FileNotFoundError:
-            num_compiler_files = 0
+            compiler_files = []
+        num_compiler_files = len(compiler_files)
 
         if self.steamID == utils.STEAM_IDS['APERTURE TAG']:
             # Coop paint gun instance
@@ -677,190 +772,208 @@ class Game:
 
             export_screen.step('EXP')
 
-            vpk_success = True
-
-            # Export each object type.
-            for obj_name, obj_data in packages.OBJ_TYPES.items():
-                if obj_name == 'Style':
-                    continue  # Done above already
-
-                LOGGER.info('Exporting "{}"', obj_name)
-                selected = selected_objects.get(obj_name, None)
-
-                try:
-                    obj_data.cls.export(packages.ExportData(
+            # Independent stages are run on this pool, while we continue
+            # generating the configs.
+            # Leaving the block waits for them all, even if we fail.
+            with ThreadPoolExecutor(
+                max_workers=EXPORT_WORKERS,
+                thread_name_prefix='export',
+            ) as pool:
+                stages: List[Future] = []
+                if should_refresh:
+                    LOGGER.info('Copying Resources!')
+                    stages.append(pool.submit(self.copy_resources))
+
+                vpk_future: Optional[Future] = None
+
+                # Export each object type.
+                for obj_name, obj_data in packages.OBJ_TYPES.items():
+                    if obj_name == 'Style':
+                        continue  # Done above already
+
+                    LOGGER.info('Exporting "{}"', obj_name)
+                    selected = selected_objects.get(obj_name, None)
+
+                    exp_data = packages.ExportData(
                         game=self,
                         selected=selected,
                         all_items=all_items,
                         renderables=renderables,
                         vbsp_conf=vbsp_config,
                         selected_style=style,
-                    ))
-                except packages.NoVPKExport:
-                    # Raised by StyleVPK to indicate it failed to copy.
-                    vpk_success = False
-
-                export_screen.step('EXP')
-
-            vbsp_config.set_key(('Options', 'Game_ID'), self.steamID)
-            vbsp_config.set_key(('Options', 'dev_mode'), srctools.bool_as_int(optionWindow.DEV_MODE.get()))
-
-            # If there are multiple of these blocks, merge them together.
-            # They will end up in this order.
-            vbsp_config.merge_children(
-                'Textures',
-                'Fizzlers',
-                'Options',
-                'StyleVars',
-                'DropperItems',
-                'Conditions',
-                'Quotes',
-                'PackTriggers',
-            )
-
-            for name, file, ext in FILES_TO_BACKUP:
-                item_path = self.abs_path(file + ext)
-                backup_path = self.abs_path(file + '_original' + ext)
-
-                if not os.path.isfile(item_path):
-                    # We can't backup at all.
-                    should_backup = False
-                elif name == 'Editoritems':
-                    should_backup = not os.path.isfile(backup_path)
-                else:
-                    # Always backup the non-_original file, it'd be newer.
-                    # But only if it's Valves - not our own.
-                    should_backup = should_backup_app(item_path)
-                    backup_is_good = should_backup_app(backup_path)
-                    LOGGER.info(
-                        '{}{}: normal={}, backup={}',
-                        file, ext,
-                        'Valve' if should_backup else 'BEE2',
-                        'Valve' if backup_is_good else 'BEE2',
                     )
+                    if obj_data.cls is packages.StyleVPK:
+                        # Building the VPK only writes to its own folder,
+                        # and takes a while.
+                        vpk_future = pool.submit(obj_data.cls.export, exp_data)
+                    else:
+                        obj_data.cls.export(exp_data)
+
+                    export_screen.step('EXP')
+
+                vbsp_config.set_key(('Options', 'Game_ID'), self.steamID)
+                vbsp_config.set_key(('Options', 'dev_mode'), srctools.bool_as_int(
+                    tk_tools.run_in_tk(optionWindow.DEV_MODE.get)
+                ))
+
+                # If there are multiple of these blocks, merge them together.
+                # They will end up in this order.
+                vbsp_config.merge_children(
+                    'Textures',
+                    'Fizzlers',
+                    'Options',
+                    'StyleVars',
+                    'DropperItems',
+                    'Conditions',
+                    'Quotes',
+                    'PackTriggers',
+                )
 
-                    if not should_backup and not backup_is_good:
-                        # It's a BEE2 application, we have a problem.
-                        # Both the real and backup are bad, we need to get a
-                        # new one.
-                        try:
-                            os.remove(backup_path)
-                        except FileNotFoundError:
-                            pass
-                        try:
-                            os.remove(item_path)
-                        except FileNotFoundError:
-                            pass
-
-                        export_screen.reset()
-                        if messagebox.askokcancel(
-                            title=_('BEE2 - Export Failed!'),
-                            message=_(
-                                'Compiler file {file} missing. '
-                                'Exit Steam applications, then press OK '
-                                'to verify your game cache. You can then '
-                                'export again.'
-                            ).format(
-                                file=file + ext,
-                            ),
-                            master=TK_ROOT,
-                        ):
-                            webbrowser.open('steam://validate/' + str(self.steamID))
-                        return False, vpk_success
-
-                if should_backup:
-                    LOGGER.info('Backing up original {}!', name)
-                    shutil.copy(item_path, backup_path)
-                export_screen.step('BACK')
-
-            # Backup puzzles, if desired
-            backup.auto_backup(selected_game, export_screen)
-
-            # Special-case: implement the UnlockDefault stlylevar here,
-            # so all items are modified.
-            if selected_objects['StyleVar']['UnlockDefault']:
-                LOGGER.info('Unlocking Items!')
-                for i, item in enumerate(all_items):
-                    # If the Unlock Default Items stylevar is enabled, we
-                    # want to force the corridors and obs room to be
-                    # deletable and copyable
-                    # Also add DESIRES_UP, so they place in the correct orientation
-                    if item.id in _UNLOCK_ITEMS:
-                        all_items[i] = copy.copy(item)
-                        item.deletable = item.copiable = True
-                        item.facing = editoritems.DesiredFacing.UP
-
-            LOGGER.info('Editing Gameinfo...')
-            self.edit_gameinfo(True)
-            export_screen.step('EXP')
-
-            if not GEN_OPTS.get_bool('General', 'preserve_bee2_resource_dir'):
-                LOGGER.info('Adding ents to FGD.')
-                self.edit_fgd(True)
-            export_screen.step('EXP')
+                for name, file, ext in FILES_TO_BACKUP:
+                    item_path = self.abs_path(file + ext)
+                    backup_path = self.abs_path(file + '_original' + ext)
 
-            # AtomicWriter writes to a temporary file, then renames in one step.
-            # This ensures editoritems won't be half-written.
-            LOGGER.info('Writing Editoritems script...')
-            with srctools.AtomicWriter(self.abs_path('portal2_dlc2/scripts/editoritems.txt')) as editor_file:
-                editoritems.Item.export(editor_file, all_items, renderables)
-            export_screen.step('EXP')
+                    if not os.path.isfile(item_path):
+                        # We can't backup at all.
+                        should_backup = False
+                    elif name == 'Editoritems':
+                        should_backup = not os.path.isfile(backup_path)
+                    else:
+                        # Always backup the non-_original file, it'd be newer.
+                        # But only if it's Valves - not our own.
+                        should_backup = should_backup_app(item_path)
+                        backup_is_good = should_backup_app(backup_path)
+                        LOGGER.info(
+                            '{}{}: normal={}, backup={}',
+                            file, ext,
+                            'Valve' if should_backup else 'BEE2',
+                            'Valve' if backup_is_good else 'BEE2',
+                        )
 
-            LOGGER.info('Writing Editoritems database...')
-            with open(self.abs_path('bin/bee2/editor.bin'), 'wb') as inst_file:
-                pick = pickletools.optimize(pickle.dumps(all_items))
-                inst_file.write(pick)
-            export_screen.step('EXP')
+                        if not should_backup and not backup_is_good:
+                            # It's a BEE2 application, we have a problem.
+                            # Both the real and backup are bad, we need to get a
+                            # new one.
+                            try:
+                                os.remove(backup_path)
+                            except FileNotFoundError:
+                                pass
+                            try:
+                                os.remove(item_path)
+                            except FileNotFoundError:
+                                pass
+
+                            # Stop the other stages, then tell the user.
+                            export_screen.cancel_token.cancel()
+                            export_screen.reset()
+                            if tk_tools.run_in_tk(
+                                messagebox.askokcancel,
+                                title=_('BEE2 - Export Failed!'),
+                                message=_(
+                                    'Compiler file {file} missing. '
+                                    'Exit Steam applications, then press OK '
+                                    'to verify your game cache. You can then '
+                                    'export again.'
+                                ).format(
+                                    file=file + ext,
+                                ),
+                                master=TK_ROOT,
+                            ):
+                                webbrowser.open('steam://validate/' + str(self.steamID))
+                            return False, False
+
+                    if should_backup:
+                        LOGGER.info('Backing up original {}!', name)
+                        shutil.copy(item_path, backup_path)
+                    export_screen.step('BACK')
+
+                # The originals are backed up, so we can replace the compiler.
+                comp_future: Optional[Future] = None
+                if num_compiler_files > 0:
+                    LOGGER.info('Copying Custom Compiler!')
+                    comp_future = pool.submit(self.copy_compiler, compiler_src, compiler_files)
+
+                # Backup puzzles, if desired
+                stages.append(pool.submit(backup.auto_backup, self, export_screen))
+
+                # Special-case: implement the UnlockDefault stlylevar here,
+                # so all items are modified.
+                if selected_objects['StyleVar']['UnlockDefault']:
+                    LOGGER.info('Unlocking Items!')
+                    for i, item in enumerate(all_items):
+                        # If the Unlock Default Items stylevar is enabled, we
+                        # want to force the corridors and obs room to be
+                        # deletable and copyable
+                        # Also add DESIRES_UP, so they place in the correct orientation
+                        if item.id in _UNLOCK_ITEMS:
+                            all_items[i] = item = copy.copy(item)
+                            item.deletable = item.copiable = True
+                            item.facing = editoritems.DesiredFacing.UP
+
+                LOGGER.info('Editing Gameinfo...')
+                self.edit_gameinfo(True)
+                export_screen.step('EXP')
 
-            LOGGER.info('Writing VBSP Config!')
-            os.makedirs(self.abs_path('bin/bee2/'), exist_ok=True)
-            with open(self.abs_path('bin/bee2/vbsp_config.cfg'), 'w', encoding='utf8') as vbsp_file:
-                for line in vbsp_config.export():
-                    vbsp_file.write(line)
-            export_screen.step('EXP')
+                if not GEN_OPTS.get_bool('General', 'preserve_bee2_resource_dir'):
+                    LOGGER.info('Adding ents to FGD.')
+                    self.edit_fgd(True)
+                export_screen.step('EXP')
 
-            if num_compiler_files > 0:
-                LOGGER.info('Copying Custom Compiler!')
-                compiler_src = utils.install_path('compiler')
-                for comp_file in compiler_src.rglob('*'):
-                    # Ignore folders.
-                    if comp_file.is_dir():
-                        continue
+                # AtomicWriter writes to a temporary file, then renames in one step.
+                # This ensures editoritems won't be half-written.
+                LOGGER.info('Writing Editoritems script...')
+                with srctools.AtomicWriter(self.abs_path('portal2_dlc2/scripts/editoritems.txt')) as editor_file:
+                    editoritems.Item.export(editor_file, all_items, renderables)
+                export_screen.step('EXP')
 
-                    dest = self.abs_path('bin' / comp_file.relative_to(compiler_src))
+                LOGGER.info('Writing Editoritems database...')
+                with open(self.abs_path('bin/bee2/editor.bin'), 'wb') as inst_file:
+                    pick = pickletools.optimize(pickle.dumps(all_items))
+                    inst_file.write(pick)
+                export_screen.step('EXP')
 
-                    LOGGER.info('\t* {} -> {}', comp_file, dest)
+                LOGGER.info('Writing VBSP Config!')
+                os.makedirs(self.abs_path('bin/bee2/'), exist_ok=True)
+                with open(self.abs_path('bin/bee2/vbsp_config.cfg'), 'w', encoding='utf8') as vbsp_file:
+                    for line in vbsp_config.export():
+                        vbsp_file.write(line)
+                export_screen.step('EXP')
 
-                    folder = Path(dest).parent
-                    if not folder.exists():
-                        folder.mkdir(parents=True, exist_ok=True)
+                # Now wait for the other stages, passing along any errors.
+                for future in stages:
+                    future.result()
 
+                vpk_success = True
+                if vpk_future is not None:
                     try:
-                        if os.path.isfile(dest):
-                            # First try and give ourselves write-permission,
-                            # if it's set read-only.
-                            utils.unset_readonly(dest)
-                        shutil.copy(comp_file, dest)
-                    except PermissionError:
+                        vpk_future.result()
+                    except packages.NoVPKExport:
+                        # Raised by StyleVPK to indicate it failed to copy.
+                        vpk_success = False
+
+                if comp_future is not None:
+                    failed_file = comp_future.result()
+                    if failed_file is not None:
                         # We might not have permissions, if the compiler is currently
                         # running.
                         export_screen.reset()
-                        messagebox.showerror(
+                        tk_tools.run_in_tk(
+                            messagebox.showerror,
                             title=_('BEE2 - Export Failed!'),
                             message=_('Copying compiler file {file} failed. '
                                       'Ensure {game} is not running.').format(
-                                        file=comp_file,
+                                        file=failed_file,
                                         game=self.name,
                                     ),
                             master=TK_ROOT,
                         )
                         return False, vpk_success
-                    export_screen.step('COMP')
 
-            if should_refresh:
-                LOGGER.info('Copying Resources!')
-                music_files = self.copy_mod_music()
-                self.refresh_cache(music_files)
+            LOGGER.info('Indexing soundscripts...')
+            sndscript_db.update(
+                self.abs_path(sndscript_db.DB_FILENAME),
+                [self.abs_path('bee2/'), self.abs_path('bee2_dev/')],
+            )
 
             LOGGER.info('Optimizing editor models...')
             self.clean_editor_models(all_items)
@@ -878,13 +991,118 @@ class Game:
         except loadScreen.Cancelled:
             return False, False
 
+    def copy_compiler(self, compiler_src: Path, files: List[Path]) -> Optional[Path]:
+        """Copy our compiler into the game's bin/ folder.
+
+        A manifest records the files we copied, so files identical to those
+        already in the game are skipped. The rest are copied in parallel.
+        If a file couldn't be replaced, it is returned.
+        """
+        manifest_path = self.abs_path(COMPILER_MANIFEST)
+        manifest = {}  # type: Dict[str, Tuple[Tuple[int, int], Tuple[int, int], str]]
+        try:
+            with open(manifest_path, 'rb') as f:
+                version, data = pickle.load(f)
+            if version == COMPILER_MANIFEST_VERSION:
+                manifest = data
+        except FileNotFoundError:
+            pass
+        except Exception:
+            LOGGER.warning('Could not read compiler manifest:', exc_info=True)
+
+        new_manifest = {}  # type: Dict[str, Tuple[Tuple[int, int], Tuple[int, int], str]]
+        to_copy = []  # type: List[Tuple[str, Path, str, Tuple[int, int], str]]
+        skipped = 0
+
+        for comp_file in files:
+            rel_path = comp_file.relative_to(compiler_src).as_posix()
+            dest = self.abs_path('bin/' + rel_path)
+            src_key = _file_key(comp_file)
+            dest_key = _file_key(dest)
+            entry = manifest.get(rel_path)
+            if entry is not None and entry[0] == src_key:
+                file_hash = entry[2]
+            else:
+                file_hash = _hash_file(comp_file)
+
+            if dest_key is None:
+                unchanged = False
+            elif entry is not None and entry[1:] == (dest_key, file_hash):
+                # We copied this before, and the game's copy is untouched.
+                unchanged = True
+            else:
+                # Compare the contents directly.
+                unchanged = dest_key[1] == src_key[1] and _hash_file(dest) == file_hash
+
+            if unchanged:
+                new_manifest[rel_path] = src_key, dest_key, file_hash
+                skipped += 1
+                export_screen.step('COMP')
+                continue
+            to_copy.append((rel_path, comp_file, dest, src_key, file_hash))
+
+        LOGGER.info(
+            'Compiler: {} files unchanged, copying {}.',
+            skipped, len(to_copy),
+        )
+
+        def copy_file(comp_file: Path, dest: str) -> Tuple[int, int]:
+            """Copy a single file, returning the new key of the destination."""
+            LOGGER.info('\t* {} -> {}', comp_file, dest)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            if os.path.isfile(dest):
+                # First try and give ourselves write-permission,
+                # if it's set read-only.
+                utils.unset_readonly(dest)
+            shutil.copy(comp_file, dest)
+            export_screen.step('COMP')
+            return _file_key(dest)
+
+        failed = None  # type: Optional[Path]
+        with ThreadPoolExecutor(
+            max_workers=COMPILER_COPY_WORKERS,
+            thread_name_prefix='copy_compiler',
+        ) as pool:
+            futures = [
+                (rel_path, comp_file, src_key, file_hash, pool.submit(copy_file, comp_file, dest))
+                for rel_path, comp_file, dest, src_key, file_hash in to_copy
+            ]
+            for rel_path, comp_file, src_key, file_hash, future in futures:
+                try:
+                    dest_key = future.result()
+                except PermissionError:
+                    # We might not have permissions, if the compiler is currently
+                    # running.
+                    if failed is None:
+                        failed = comp_file
+                else:
+                    new_manifest[rel_path] = src_key, dest_key, file_hash
+
+        if new_manifest != manifest:
+            os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+            with srctools.AtomicWriter(manifest_path, is_bytes=True) as f:
+                pickle.dump(
+                    (COMPILER_MANIFEST_VERSION, new_manifest),
+                    f, pickle.HIGHEST_PROTOCOL,
+                )
+        return failed
+
+    def copy_resources(self) -> None:
+        """Copy the music, then the package resources into the game."""
+        music_files = self.copy_mod_music()
+        self.refresh_cache(music_files)
+
     def clean_editor_models(self, items: Iterable[editoritems.Item]) -> None:
         """The game is limited to having 1024 models loaded at once.
 
         Editor models are always being loaded, so we need to keep the number
         small. Go through editoritems, and disable (by renaming to .mdl_dis)
-        unused ones.
+        unused ones, along with their other files.
+
+        The state of each folder is saved. If a folder hasn't changed since,
+        only the models which need to be toggled are touched.
         """
+        start = time.perf_counter()
         # If set, force them all to be present.
         force_on = GEN_OPTS.get_bool('Debug', 'force_all_editor_models')
 
@@ -895,35 +1113,67 @@ class Game:
             for mdl in subtype.models
         }
 
-        mdl_count = 0
+        state_path = self.abs_path(EDITOR_MODEL_STATE)
+        # Folder -> (folder mtime, model name -> (extensions, enabled))
+        state = {}  # type: Dict[str, Tuple[int, Dict[str, Tuple[Tuple[str, ...], bool]]]]
+        try:
+            with open(state_path, 'rb') as f:
+                version, data = pickle.load(f)
+            if version == EDITOR_MODEL_STATE_VERSION:
+                state = data
+        except FileNotFoundError:
+            pass
+        except Exception:
+            LOGGER.warning('Could not read editor model state:', exc_info=True)
+
+        new_state = {}  # type: Dict[str, Tuple[int, Dict[str, Tuple[Tuple[str, ...], bool]]]]
+        mdl_count = renamed = 0
+        full_scans = 0
 
         for mdl_folder in [
             self.abs_path('bee2/models/props_map_editor/'),
             self.abs_path('bee2_dev/models/props_map_editor/'),
         ]:
-            if not os.path.exists(mdl_folder):
+            try:
+                folder_mtime = os.stat(mdl_folder).st_mtime_ns
+            except FileNotFoundError:
                 continue
-            for file in os.listdir(mdl_folder):
-                if not file.endswith(('.mdl', '.mdl_dis')):
-                    continue
-
-                mdl_count += 1
 
-                file_no_ext, ext = os.path.splitext(file)
-                if force_on or file_no_ext.casefold() in used_models:
-                    new_ext = '.mdl'
-                else:
-                    new_ext = '.mdl_dis'
-
-                if new_ext != ext:
-                    try:
-                        os.remove(os.path.join(mdl_folder, file_no_ext + new_ext))
-                    except FileNotFoundError:
-                        pass
-                    os.rename(
-                        os.path.join(mdl_folder, file_no_ext + ext),
-                        os.path.join(mdl_folder, file_no_ext + new_ext),
-                    )
+            models = {}  # type: Dict[str, Tuple[Tuple[str, ...], bool]]
+            try:
+                old_mtime, old_models = state[mdl_folder]
+            except KeyError:
+                old_mtime, old_models = None, {}
+
+            if old_mtime == folder_mtime:
+                # Nothing was added or renamed since last time, so we know
+                # what's present.
+                for name, (exts, was_enabled) in old_models.items():
+                    enabled = force_on or name.casefold() in used_models
+                    if enabled != was_enabled:
+                        renamed += _set_model_enabled(mdl_folder, name, {
+                            name + ext + ('' if was_enabled else '_dis')
+                            for ext in exts
+                        }, enabled)
+                    models[name] = exts, enabled
+            else:
+                full_scans += 1
+                files = set(os.listdir(mdl_folder))
+                for name, exts in _find_editor_models(files).items():
+                    enabled = force_on or name.casefold() in used_models
+                    renamed += _set_model_enabled(mdl_folder, name, files, enabled)
+                    models[name] = exts, enabled
+
+            mdl_count += len(models)
+            new_state[mdl_folder] = os.stat(mdl_folder).st_mtime_ns, models
+
+        if new_state != state:
+            os.makedirs(os.path.dirname(state_path), exist_ok=True)
+            with srctools.AtomicWriter(state_path, is_bytes=True) as f:
+                pickle.dump(
+                    (EDITOR_MODEL_STATE_VERSION, new_state),
+                    f, pickle.HIGHEST_PROTOCOL,
+                )
 
         if mdl_count != 0:
             LOGGER.info(
@@ -932,6 +1182,12 @@ class Game:
                 mdl_count,
                 len(used_models) / mdl_count,
             )
+            LOGGER.info(
+                'Renamed {} editor model files in {:.2f}ms ({} folders rescanned).',
+                renamed,
+                (time.perf_counter() - start) * 1000,
+                full_scans,
+            )
         else:
             LOGGER.warning('No custom editor models!')
 
@@ -5,21 +5,85 @@ it could get deleted, which will make the rendered image vanish.
 """
 
 from PIL import ImageTk, Image, ImageDraw
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 import os
+import pickle
+import queue
+import threading
 
-from srctools import Vec
-from srctools.filesys import FileSystem, RawFileSystem, FileSystemChain
+from srctools import Vec, AtomicWriter
+from srctools.filesys import FileSystem, RawFileSystem, FileSystemChain, File
 import srctools.logger
 import logging
 import utils
+from app import TK_ROOT
+from BEE2_config import GEN_OPTS
 
-from typing import Iterable, Union, Dict, Tuple
+from typing import Iterable, Union, Dict, Set, Tuple, TypeVar, Optional, Callable
 
 LOGGER = srctools.logger.get_logger('img')
 
-cached_img = {}  # type: Dict[Tuple[str, int, int], ImageTk.PhotoImage]
+# Number of images kept in the caches, if not set in the config.
+DEFAULT_CACHE_SIZE = 500
+# How often to check for finished images, in milliseconds.
+POLL_RATE = 50
+
+KeyT = TypeVar('KeyT')
+
+
+class ImageCache(OrderedDict):
+    """Keeps the most recently used images.
+
+    When the limit is exceeded, the least recently used images are discarded.
+    Images still displayed by a widget are kept, since Tk would blank them
+    once the PhotoImage is garbage collected.
+    """
+    def __getitem__(self, key: KeyT) -> ImageTk.PhotoImage:
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key: KeyT, value: ImageTk.PhotoImage) -> None:
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        limit = GEN_OPTS.get_int('General', 'img_cache_size', DEFAULT_CACHE_SIZE)
+        if limit <= 0 or len(self) <= limit:
+            return
+        for old_key, old_img in list(self.items()):
+            if len(self) <= limit or old_key == key:
+                break
+            if not TK_ROOT.tk.getboolean(TK_ROOT.tk.call('image', 'inuse', str(old_img))):
+                del self[old_key]
+
+
+# path, width, height -> image
+cached_img = ImageCache()  # type: Dict[Tuple[str, int, int], ImageTk.PhotoImage]
 # r, g, b, size -> image
-cached_squares = {}  # type: Dict[Union[Tuple[float, float, float, int], Tuple[str, int]], ImageTk.PhotoImage]
+cached_squares = ImageCache()  # type: Dict[Union[Tuple[float, float, float, int], Tuple[str, int]], ImageTk.PhotoImage]
+
+# Decoding and resizing is done in the background. The results are then
+# pasted into the placeholder image by the Tk thread.
+# Each is the placeholder, path, error image and the future's result().
+_load_pool = ThreadPoolExecutor(thread_name_prefix='img_load')
+_loaded: 'queue.Queue[Tuple[ImageTk.PhotoImage, str, Optional[ImageTk.PhotoImage], Callable[[], Image.Image]]]' = queue.Queue()
+_pending_count = 0
+
+# Resized images are saved between launches, so we don't need to read
+# the packages and decode them again.
+THUMB_FILENAME = 'config/thumbnails.bin'
+# Increment to discard old thumbnails if the format changes.
+THUMB_VERSION = 1
+# path, width, height, algorithm -> (source, cache key), size, RGBA data
+ThumbKey = Tuple[str, int, int, int]
+ThumbVersion = Tuple[str, int]
+_thumbnails = {}  # type: Dict[ThumbKey, Tuple[ThumbVersion, Tuple[int, int], bytes]]
+_thumbnails_changed = False
+# Only thumbnails used this session are saved, so removed images are dropped.
+_thumbnails_used: Set[ThumbKey] = set()
+# Background loads add thumbnails while we might be saving.
+_thumb_lock = threading.Lock()
 
 filesystem = FileSystemChain(
     # Highest priority is the in-built UI images.
@@ -34,6 +98,52 @@ def load_filesystems(systems: Iterable[FileSystem]):
     """Load in the filesystems used in packages."""
     for sys in systems:
         filesystem.add_sys(sys, 'resources/BEE2/')
+    load_thumbnails()
+
+
+def load_thumbnails() -> None:
+    """Read the thumbnails saved by the last launch."""
+    global _thumbnails_changed
+    try:
+        with open(utils.conf_location(THUMB_FILENAME), 'rb') as f:
+            version, data = pickle.load(f)
+    except FileNotFoundError:
+        return
+    except Exception:
+        LOGGER.warning('Could not read thumbnail cache:', exc_info=True)
+        return
+    if version == THUMB_VERSION:
+        with _thumb_lock:
+            _thumbnails.update(data)
+            _thumbnails_changed = False
+
+
+def save_thumbnails() -> None:
+    """Write the thumbnails back to disk, if any were added or unused."""
+    global _thumbnails_changed
+    with _thumb_lock:
+        data = {
+            key: _thumbnails[key]
+            for key in _thumbnails_used
+            if key in _thumbnails
+        }
+        if not _thumbnails_changed and len(data) == len(_thumbnails):
+            return
+        _thumbnails_changed = False
+    LOGGER.info(
+        'Saving {} thumbnails, discarding {} unused...',
+        len(data), len(_thumbnails) - len(data),
+    )
+    with AtomicWriter(str(utils.conf_location(THUMB_FILENAME)), is_bytes=True) as f:
+        pickle.dump((THUMB_VERSION, data), f, pickle.HIGHEST_PROTOCOL)
+
+
+def _file_version(img_file: File) -> Optional[ThumbVersion]:
+    """Return the values used to check if a thumbnail is out of date."""
+    cache_key = img_file.cache_key()
+    if cache_key == -1:
+        return None
+    return str(img_file.sys.path), cache_key
 
 
 def tuple_size(size: Union[Tuple[int, int], int]) -> Tuple[int, int]:
@@ -49,7 +159,67 @@ def color_hex(color: Vec) -> str:
     return '#{:2X}{:2X}{:2X}'.format(int(r), int(g), int(b))
 
 
-def png(path: str, resize_to=0, error=None, algo=Image.NEAREST):
+def _load_image(
+    img_file: File,
+    resize_to: Tuple[int, int],
+    algo,
+    thumb_key: ThumbKey,
+    version: Optional[ThumbVersion],
+) -> Image.Image:
+    """Read and decode an image, then resize if required.
+
+    If resized, the result is then added to the thumbnails.
+    """
+    global _thumbnails_changed
+    with utils.FSYS_LOCK, filesystem, img_file.open_bin() as file:
+        data = file.read()
+    image = Image.open(BytesIO(data))  # type: Image.Image
+    image.load()
+
+    if resize_to != (0, 0) and resize_to != image.size:
+        image = image.resize(resize_to, algo)
+    # Full size images would just be copies of the originals.
+    if version is not None and resize_to != (0, 0):
+        image = image.convert('RGBA')
+        with _thumb_lock:
+            _thumbnails[thumb_key] = version, image.size, image.tobytes()
+            _thumbnails_used.add(thumb_key)
+            _thumbnails_changed = True
+    return image
+
+
+def _paste_error(tk_img: ImageTk.PhotoImage, error: ImageTk.PhotoImage) -> None:
+    """Copy the error image into a placeholder, scaling it to fit."""
+    width, height = tk_img.width(), tk_img.height()
+    err_width, err_height = error.width(), error.height()
+    if err_width > width or err_height > height:
+        scale = ['-subsample', max(1, err_width // width), max(1, err_height // height)]
+    elif err_width < width or err_height < height:
+        scale = ['-zoom', max(1, width // err_width), max(1, height // err_height)]
+    else:
+        scale = []
+    TK_ROOT.tk.call(str(tk_img), 'copy', str(error), *scale)
+
+
+def _check_loaded() -> None:
+    """Place any images loaded in the background into their placeholders."""
+    global _pending_count
+    while True:
+        try:
+            tk_img, path, error, get_result = _loaded.get_nowait()
+        except queue.Empty:
+            break
+        _pending_count -= 1
+        try:
+            tk_img.paste(get_result())
+        except Exception:
+            LOGGER.warning('Could not load "images/{}":', path, exc_info=True)
+            _paste_error(tk_img, error or img_error)
+    if _pending_count:
+        TK_ROOT.after(POLL_RATE, _check_loaded)
+
+
+def png(path: str, resize_to=0, error=None, algo=Image.NEAREST, background=True):
     """Loads in an image for use in TKinter.
 
     - The .png suffix will automatically be added.
@@ -57,9 +227,12 @@ def png(path: str, resize_to=0, error=None, algo=Image.NEAREST):
     zip cache.
     - If resize_to is set, the image will be resized to that size using the algo
     algorithm.
+    - If the size is known and background is set, a blank image is returned
+      immediately, and the image is decoded on another thread then swapped in.
     - This caches images, so it won't be deleted (Tk doesn't keep a reference
       to the Python object), and subsequent calls don't touch the hard disk.
     """
+    global _pending_count
     path = path.casefold().replace('\\', '/')
     if path[-4:-3] != '.':
         path += ".png"
@@ -73,21 +246,37 @@ def png(path: str, resize_to=0, error=None, algo=Image.NEAREST):
     except KeyError:
         pass
 
-    with filesystem:
+    with utils.FSYS_LOCK, filesystem:
         try:
             img_file = filesystem[path]
         except (KeyError, FileNotFoundError):
             LOGGER.warning('ERROR: "images/{}" does not exist!', orig_path)
             return error or img_error
-        with img_file.open_bin() as file:
-            image = Image.open(file)  # type: Image.Image
-            image.load()
-
-    if resize_to != (0, 0) and resize_to != image.size:
-        image = image.resize(resize_to, algo)
-        # image.save(img_file._data.sys._resolve_path(img_file._data.path))
+        version = _file_version(img_file)
 
-    tk_img = ImageTk.PhotoImage(image=image)
+    thumb_key = orig_path, resize_width, resize_height, algo
+    with _thumb_lock:
+        try:
+            thumb_version, thumb_size, thumb_data = _thumbnails[thumb_key]
+        except KeyError:
+            thumb_version = None
+
+    if version is not None and thumb_version == version:
+        with _thumb_lock:
+            _thumbnails_used.add(thumb_key)
+        tk_img = ImageTk.PhotoImage(image=Image.frombytes('RGBA', thumb_size, thumb_data))
+    elif background and resize_width and resize_height:
+        tk_img = ImageTk.PhotoImage('RGBA', resize_to)
+        fut = _load_pool.submit(_load_image, img_file, resize_to, algo, thumb_key, version)
+        fut.add_done_callback(lambda fut: _loaded.put((tk_img, orig_path, error, fut.result)))
+        if not _pending_count:
+            TK_ROOT.after(POLL_RATE, _check_loaded)
+        _pending_count += 1
+    else:
+        tk_img = ImageTk.PhotoImage(image=_load_image(
+            img_file, resize_to, algo,
+            thumb_key, version,
+        ))
 
     cached_img[orig_path, resize_width, resize_height] = tk_img
     return tk_img
@@ -1,41 +1,211 @@
+"""Search for items on the palette by tags, authors and names.
+
+The words in each item's tags are indexed incrementally, so items can be
+added or removed individually. A search matches items which contain every
+typed term, ranked by whether the term is a prefix of a word, somewhere
+inside a word, or just similar (to allow for typos).
+"""
 from tkinter import ttk
 import tkinter as tk
 
-from collections import defaultdict
+import bisect
+import time
+from collections import Counter, defaultdict
 
 from app import UI
 
-from marisa_trie import Trie
-from typing import Dict, Optional, Set, Callable, Tuple
+from typing import Dict, List, Optional, Set, Callable, Tuple
 import srctools.logger
 
 
 LOGGER = srctools.logger.get_logger(__name__)
-database = Trie()
-word_to_ids: Dict[str,  Set[Tuple[str, int]]] = defaultdict(set)
+
+# How long to wait after a keystroke before searching, in milliseconds.
+DEBOUNCE_DELAY = 150
+# The size of the n-grams used for substring and fuzzy matching.
+GRAM_SIZE = 2
+# Shorter terms match too much to be useful for fuzzy matching.
+FUZZY_MIN_LEN = 4
+# How similar a word must be to a term to count as a fuzzy match.
+FUZZY_THRESHOLD = 0.6
+
+# How well a term matched an item. Lower is better.
+RANK_PREFIX = 0
+RANK_SUBSTRING = 1
+RANK_FUZZY = 2
+
+ItemKey = Tuple[str, int]
+
+# All words, sorted for prefix searching.
+_words: List[str] = []
+_word_to_ids: Dict[str, Set[ItemKey]] = {}
+_id_to_words: Dict[ItemKey, Set[str]] = {}
+# The subtypes of each item which have words.
+_item_keys: Dict[str, Set[ItemKey]] = {}
+# The words containing each n-gram.
+_gram_to_words: Dict[str, Set[str]] = defaultdict(set)
 _type_cback: Optional[Callable[[], None]] = None
 
 
-def init(frm: tk.Frame, refresh_cback: Callable[[Optional[Set[Tuple[str, int]]]], None]) -> None:
+def _grams(word: str) -> Set[str]:
+    """Return the n-grams in a word, padded so the ends are weighted more."""
+    word = f' {word} '
+    return {word[i:i + GRAM_SIZE] for i in range(len(word) - GRAM_SIZE + 1)}
+
+
+def _add_word(word: str, key: ItemKey) -> None:
+    """Add a word for an item."""
+    try:
+        ids = _word_to_ids[word]
+    except KeyError:
+        ids = _word_to_ids[word] = set()
+        bisect.insort(_words, word)
+        for gram in _grams(word):
+            _gram_to_words[gram].add(word)
+    ids.add(key)
+
+
+def _remove_word(word: str, key: ItemKey) -> None:
+    """Remove a word from an item, discarding it if now unused."""
+    ids = _word_to_ids[word]
+    ids.discard(key)
+    if ids:
+        return
+    del _word_to_ids[word]
+    del _words[bisect.bisect_left(_words, word)]
+    for gram in _grams(word):
+        gram_words = _gram_to_words[gram]
+        gram_words.discard(word)
+        if not gram_words:
+            del _gram_to_words[gram]
+
+
+def _set_words(key: ItemKey, words: Set[str]) -> None:
+    """Change the words an item subtype has, updating only the difference."""
+    old_words = _id_to_words.get(key, set())
+    for word in old_words - words:
+        _remove_word(word, key)
+    for word in words - old_words:
+        _add_word(word, key)
+    item_keys = _item_keys.setdefault(key[0], set())
+    if words:
+        _id_to_words[key] = words
+        item_keys.add(key)
+    else:
+        _id_to_words.pop(key, None)
+        item_keys.discard(key)
+        if not item_keys:
+            del _item_keys[key[0]]
+
+
+def add_item(item: 'UI.Item') -> None:
+    """Add an item to the search database, or update its tags."""
+    subtypes = set(item.visual_subtypes)
+    for key in list(_item_keys.get(item.id, ())):
+        if key[1] not in subtypes:
+            _set_words(key, set())
+    for subtype_ind in subtypes:
+        _set_words((item.id, subtype_ind), {
+            word.casefold()
+            for tag in item.get_tags(subtype_ind)
+            for word in tag.split()
+        })
+
+
+def remove_item(item_id: str) -> None:
+    """Remove an item from the search database."""
+    for key in list(_item_keys.get(item_id, ())):
+        _set_words(key, set())
+
+
+def _match_term(term: str) -> Dict[ItemKey, int]:
+    """Find the items matching a single search term, and their rank."""
+    word_ranks: Dict[str, int] = {}
+
+    ind = bisect.bisect_left(_words, term)
+    while ind < len(_words) and _words[ind].startswith(term):
+        word_ranks[_words[ind]] = RANK_PREFIX
+        ind += 1
+
+    # Single letters would match almost everything, so only check prefixes.
+    if len(term) >= GRAM_SIZE:
+        # The word must contain every n-gram in the term.
+        candidates = set.intersection(*[
+            _gram_to_words.get(term[i:i + GRAM_SIZE], set())
+            for i in range(len(term) - GRAM_SIZE + 1)
+        ])
+        for word in candidates:
+            if word not in word_ranks and term in word:
+                word_ranks[word] = RANK_SUBSTRING
+
+    if len(term) >= FUZZY_MIN_LEN:
+        term_grams = _grams(term)
+        shared: Counter = Counter()
+        for gram in term_grams:
+            shared.update(_gram_to_words.get(gram, ()))
+        for word, count in shared.items():
+            # Dice coefficient, assuming the word's n-grams are unique.
+            word_grams = len(word) + 3 - GRAM_SIZE
+            if word not in word_ranks and 2 * count / (len(term_grams) + word_grams) >= FUZZY_THRESHOLD:
+                word_ranks[word] = RANK_FUZZY
+
+    found: Dict[ItemKey, int] = {}
+    for word, rank in word_ranks.items():
+        for key in _word_to_ids[word]:
+            if found.get(key, rank + 1) > rank:
+                found[key] = rank
+    return found
+
+
+def search(text: str) -> Optional[Dict[ItemKey, int]]:
+    """Find the items matching all the words in this text.
+
+    This returns a dict mapping items to their rank, best first, or None if
+    no search is being done.
+    """
+    terms = text.casefold().split()
+    if not terms:
+        return None
+    start = time.perf_counter()
+    found: Optional[Dict[ItemKey, int]] = None
+    for term in terms:
+        matches = _match_term(term)
+        if found is None:
+            found = matches
+        else:
+            found = {
+                key: rank + matches[key]
+                for key, rank in found.items()
+                if key in matches
+            }
+        if not found:
+            break
+    ranked = dict(sorted(found.items(), key=lambda kv: kv[1]))
+    LOGGER.debug(
+        'Search "{}": {} results in {:.2f}ms',
+        text, len(ranked), (time.perf_counter() - start) * 1000,
+    )
+    return ranked
+
+
+def init(frm: tk.Frame, refresh_cback: Callable[[Optional[Dict[ItemKey, int]]], None]) -> None:
     """Initialise the UI objects.
 
     The callback is triggered whenever the UI changes, passing along
-    the visible items.
+    the visible items and their rank.
     """
     global _type_cback
-
-    def on_type(*args):
-        """Re-search whenever text is typed."""
-        text = search_var.get()
-        words = text.split()
-        if not words:
+    pending_search: Optional[str] = None
+
+    def do_search() -> None:
+        """Re-search with the current text."""
+        nonlocal pending_search
+        pending_search = None
+        found = search(search_var.get())
+        if found is None:
             refresh_cback(None)
             return
 
-        found: Set[Tuple[str, int]] = set()
-        for word in words:
-            for name in database.iterkeys(word):
-                found |= word_to_ids[name]
         # Calling the callback deselects us, so save and restore.
         insert = searchbar.index('insert')
         refresh_cback(found)
@@ -45,6 +215,13 @@ def init(frm: tk.Frame, refresh_cback: Callable[[Optional[Set[Tuple[str, int]]]]
             searchbar.icursor(insert)
         searchbar.after_idle(later)
 
+    def on_type(*args) -> None:
+        """Whenever text is typed, search once the user pauses."""
+        nonlocal pending_search
+        if pending_search is not None:
+            searchbar.after_cancel(pending_search)
+        pending_search = searchbar.after(DEBOUNCE_DELAY, do_search)
+
     frm.columnconfigure(1, weight=1)
 
     ttk.Label(
@@ -58,21 +235,19 @@ def init(frm: tk.Frame, refresh_cback: Callable[[Optional[Set[Tuple[str, int]]]]
     searchbar = ttk.Entry(frm, textvariable=search_var)
     searchbar.grid(row=0, column=1, sticky='EW')
 
-    _type_cback = on_type
+    _type_cback = do_search
 
 
 def rebuild_database() -> None:
-    """Rebuild the search database."""
-    global database
+    """Update the search database to match the current items."""
     LOGGER.info('Updating search database...')
-    # Clear and reset.
-    word_to_ids.clear()
-
+    start = time.perf_counter()
+    for item_id in _item_keys.keys() - UI.item_list.keys():
+        remove_item(item_id)
     for item in UI.item_list.values():
-        for subtype_ind in item.visual_subtypes:
-            for tag in item.get_tags(subtype_ind):
-                for word in tag.split():
-                    word_to_ids[word.casefold()].add((item.id, subtype_ind))
-    database = Trie(word_to_ids.keys())
-    LOGGER.debug('Tags: {}', database.keys())
+        add_item(item)
+    LOGGER.debug(
+        'Indexed {} words in {:.2f}ms',
+        len(_words), (time.perf_counter() - start) * 1000,
+    )
     _type_cback()
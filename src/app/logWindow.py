@@ -4,6 +4,9 @@ from tkinter import ttk
 import tkinter as tk
 
 import logging
+import queue
+import threading
+import time
 
 import srctools.logger
 from BEE2_config import GEN_OPTS
@@ -41,11 +44,20 @@ level_selector = None  # type: ttk.Combobox
 START = '1.0'  # Row 1, column 0 = first character
 END = tk.END
 
+# How often queued messages are added to the window, in milliseconds.
+FLUSH_INTERVAL = 100
+
 
 class TextHandler(logging.Handler):
-    """Log all data to a Tkinter Text widget."""
-    def __init__(self, widget: tk.Text, level=logging.NOTSET):
+    """Log all data to a Tkinter Text widget.
+
+    Records are queued, then added in batches every FLUSH_INTERVAL. This
+    means they can be logged from any thread. Only the last max_lines lines
+    are kept.
+    """
+    def __init__(self, widget: tk.Text, level=logging.NOTSET, max_lines: int=5000):
         self.widget = widget
+        self.max_lines = max_lines
         super().__init__(level)
 
         # Assign colours for each logging level
@@ -69,8 +81,12 @@ class TextHandler(logging.Handler):
         )
 
         self.has_text = False
+        # (levelname, text) pairs waiting to be added.
+        self._queue = queue.SimpleQueue()  # type: queue.SimpleQueue
+        self._last_flush = time.perf_counter()
 
         widget['state'] = "disabled"
+        widget.after(FLUSH_INTERVAL, self._tick)
 
     def emit(self, record: logging.LogRecord):
         """Add a logging message."""
@@ -80,41 +96,64 @@ class TextHandler(logging.Handler):
             # Ensure we don't use the extra ASCII indents here.
             record.msg = record.msg.format_msg()
 
-        self.widget['state'] = "normal"
-        # We don't want to indent the first line.
-        firstline, *lines = self.format(record).split('\n')
-
-        if self.has_text:
-            # Start with a newline so it doesn't end with one.
-            self.widget.insert(
-                END,
-                '\n',
-                (),
-            )
+        self._queue.put((record.levelname, self.format(record)))
 
-        self.widget.insert(
-            END,
-            firstline,
-            (record.levelname,),
-        )
-        for line in lines:
-            self.widget.insert(
-                END,
-                '\n',
-                ('INDENT',),
-                line,
+        # Undo the record overwrite, so other handlers get the correct object.
+        record.msg = msg
+
+        # When we're busy loading, the tick won't run. So flush here too,
+        # but not too often.
+        if (
+            threading.current_thread() is threading.main_thread()
+            and time.perf_counter() - self._last_flush >= FLUSH_INTERVAL / 1000
+        ):
+            self.flush_queue()
+            # Update it, so it still runs even when we're busy with other stuff.
+            self.widget.update_idletasks()
+
+    def _tick(self) -> None:
+        """Periodically add the queued messages."""
+        self.flush_queue()
+        self.widget.after(FLUSH_INTERVAL, self._tick)
+
+    def flush_queue(self) -> None:
+        """Add all the queued messages to the widget."""
+        self._last_flush = time.perf_counter()
+        records = []
+        try:
+            while True:
+                records.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        if not records:
+            return
+        # If we got a lot, earlier ones will be trimmed anyway.
+        del records[:-self.max_lines]
+
+        # Add everything in one insert() call.
+        args = []
+        for levelname, text in records:
+            # We don't want to indent the first line.
+            firstline, *lines = text.split('\n')
+            if self.has_text:
+                # Start with a newline so it doesn't end with one.
+                args += ['\n', ()]
+            args += [firstline, (levelname,)]
+            for line in lines:
                 # Indent following lines.
-                (record.levelname, 'INDENT'),
-            )
-        self.widget.see(END)  # Scroll to the end
-        self.widget['state'] = "disabled"
-        # Update it, so it still runs even when we're busy with other stuff.
-        self.widget.update_idletasks()
+                args += ['\n', ('INDENT',), line, (levelname, 'INDENT')]
+            self.has_text = True
 
-        self.has_text = True
+        self.widget['state'] = "normal"
+        self.widget.insert(END, *args)
 
-        # Undo the record overwrite, so other handlers get the correct object.
-        record.msg = msg
+        # Remove lines from the top if there's too many.
+        line_count = int(self.widget.index('end-1c').split('.')[0])
+        if line_count > self.max_lines:
+            self.widget.delete(START, f'{line_count - self.max_lines + 1}.0')
+
+        self.widget.see(END)  # Scroll to the end
+        self.widget['state'] = "disabled"
 
 
 def set_visible(is_visible: bool):
@@ -150,7 +189,7 @@ def set_level(event):
     GEN_OPTS['Debug']['window_log_level'] = logging.getLevelName(level)
 
 
-def init(start_open: bool, log_level: str='info') -> None:
+def init(start_open: bool, log_level: str='info', max_lines: int=5000) -> None:
     """Initialise the window."""
     global log_handler, text_box, level_selector
 
@@ -169,7 +208,7 @@ def init(start_open: bool, log_level: str='info') -> None:
 
     log_level = logging.getLevelName(log_level.upper())
 
-    log_handler = TextHandler(text_box)
+    log_handler = TextHandler(text_box, max_lines=max_lines)
 
     try:
         log_handler.setLevel(log_level)
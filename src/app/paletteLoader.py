@@ -1,4 +1,5 @@
 import os
+import pickle
 import shutil
 import zipfile
 import random
@@ -6,7 +7,7 @@ import utils
 
 import srctools.logger
 import BEE2_config
-from srctools import Property, NoKeyError, KeyValError
+from srctools import Property, NoKeyError, KeyValError, AtomicWriter
 
 from typing import List, Tuple, Optional, Dict
 
@@ -17,6 +18,15 @@ PAL_DIR = utils.conf_location('palettes/')
 
 PAL_EXT = '.bee2_palette'
 
+# Records the details of each palette, so only the selected one needs to be
+# parsed.
+INDEX_FILENAME = utils.conf_location('config/palette_index.bin')
+# Increment to discard old indexes if the format changes.
+INDEX_VERSION = 1
+# Filename -> (mtime, size), name, trans_name, readonly, has_settings, item count.
+IndexEntry = Tuple[Tuple[int, int], str, str, bool, bool, int]
+_index: Dict[str, IndexEntry] = {}
+
 pal_list: List['Palette'] = []
 
 # Allow translating the names of the built-in palettes
@@ -217,6 +227,9 @@ class Palette:
         # If loaded from a file, the path to use.
         # None determines a filename automatically.
         self.filename = filename
+        # If False, the items and settings are only parsed when needed.
+        self._loaded = True
+        self._has_settings = settings is not None
         # List of id, index tuples.
         self.pos = pos
         # If true, prevent overwriting the original file
@@ -229,6 +242,68 @@ class Palette:
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_index(cls, filename: str, entry: IndexEntry) -> 'Palette':
+        """Create a palette from the index, without parsing the file."""
+        _, name, trans_name, readonly, has_settings, _ = entry
+        pal = cls(
+            name,
+            [],
+            trans_name=trans_name,
+            prevent_overwrite=readonly,
+            filename=filename,
+        )
+        pal._loaded = False
+        pal._has_settings = has_settings
+        return pal
+
+    @property
+    def pos(self) -> List[Tuple[str, int]]:
+        """The list of id, index tuples."""
+        if not self._loaded:
+            self._load()
+        return self._pos
+
+    @pos.setter
+    def pos(self, value: List[Tuple[str, int]]) -> None:
+        if not self._loaded:
+            self._load()
+        self._pos = value
+
+    @property
+    def settings(self) -> Optional[Property]:
+        """If not None, settings associated with the palette."""
+        if not self._loaded:
+            self._load()
+        return self._settings
+
+    @settings.setter
+    def settings(self, value: Optional[Property]) -> None:
+        if not self._loaded:
+            self._load()
+        self._settings = value
+        self._has_settings = value is not None
+
+    @property
+    def has_settings(self) -> bool:
+        """Check if settings are present, without needing to parse the file."""
+        return self._has_settings
+
+    def _load(self) -> None:
+        """Parse the items and settings from the file, the first time they're used."""
+        self._loaded = True
+        path = os.path.join(PAL_DIR, self.filename)
+        LOGGER.debug('Parsing palette "{}"', path)
+        try:
+            pal = Palette.parse(path)
+        except (OSError, KeyValError):
+            LOGGER.warning('Could not parse palette "{}":', path, exc_info=True)
+            self._pos = []
+            self._settings = None
+        else:
+            self._pos = pal.pos
+            self._settings = pal.settings
+        self._has_settings = self._settings is not None
 
     @classmethod
     def parse(cls, path: str):
@@ -299,19 +374,66 @@ class Palette:
                     # Add a random character to iterate the hash.
                     hash_src += chr(random.randrange(0x10ffff))
                 else:
-                    file = open(os.path.join(PAL_DIR, hash_filename), 'w', encoding='utf8')
                     self.filename = os.path.join(PAL_DIR, hash_filename)
                     break
-        else:
-            file = open(os.path.join(PAL_DIR, self.filename), 'w', encoding='utf8')
-        with file:
+        with AtomicWriter(os.path.join(PAL_DIR, self.filename)) as file:
             for line in props.export():
                 file.write(line)
 
+        _add_to_index(self)
+        _save_index()
+
     def delete_from_disk(self):
         """Delete this palette from disk."""
         if self.filename is not None:
             os.remove(os.path.join(PAL_DIR, self.filename))
+            if _index.pop(os.path.basename(self.filename), None) is not None:
+                _save_index()
+
+
+def _file_key(path: str) -> Optional[Tuple[int, int]]:
+    """Return the stat info used to determine if a palette changed."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _add_to_index(pal: Palette) -> None:
+    """Record the details of a palette after it was parsed or saved."""
+    path = os.path.join(PAL_DIR, pal.filename)
+    key = _file_key(path)
+    if key is None:
+        return
+    _index[os.path.basename(path)] = (
+        key,
+        pal.name,
+        pal.trans_name,
+        pal.prevent_overwrite,
+        pal.has_settings,
+        len(pal.pos),
+    )
+
+
+def _load_index() -> None:
+    """Read the palette index, if present."""
+    try:
+        with open(INDEX_FILENAME, 'rb') as f:
+            version, data = pickle.load(f)
+    except FileNotFoundError:
+        return
+    except Exception:
+        LOGGER.warning('Could not read palette index:', exc_info=True)
+        return
+    if version == INDEX_VERSION:
+        _index.update(data)
+
+
+def _save_index() -> None:
+    """Write the palette index back to disk."""
+    with AtomicWriter(str(INDEX_FILENAME), is_bytes=True) as f:
+        pickle.dump((INDEX_VERSION, _index), f, pickle.HIGHEST_PROTOCOL)
 
 
 def load_palettes():
@@ -327,18 +449,34 @@ def load_palettes():
             prevent_overwrite=True,
         ))
 
+    _load_index()
+    orig_index = _index.copy()
+    found = set()
+
     for name in os.listdir(PAL_DIR):  # this is both files and dirs
         LOGGER.info('Loading "{}"', name)
         path = os.path.join(PAL_DIR, name)
         pos_file, prop_file = None, None
         try:
             if name.endswith(PAL_EXT):
+                found.add(name)
                 try:
-                    pal_list.append(Palette.parse(path))
+                    entry = _index[name]
+                except KeyError:
+                    pass
+                else:
+                    if entry[0] == _file_key(path):
+                        pal_list.append(Palette.from_index(name, entry))
+                        continue
+                try:
+                    pal = Palette.parse(path)
                 except KeyValError as exc:
                     # We don't need the traceback, this isn't an error in the app
                     # itself.
                     LOGGER.warning('Could not parse palette file, skipping:\n{}', exc)
+                    continue
+                pal_list.append(pal)
+                _add_to_index(pal)
                 continue
             elif name.endswith('.zip'):
                 # Extract from a zip
@@ -378,6 +516,12 @@ def load_palettes():
             pal.save()
             shutil.rmtree(path)
 
+    # Remove palettes which were deleted.
+    for name in _index.keys() - found:
+        del _index[name]
+    if _index != orig_index:
+        _save_index()
+
     # Ensure the list has a defined order..
     pal_list.sort(key=str)
     return pal_list
@@ -9,11 +9,10 @@ from tkinter import font as tk_font
 from tkinter import ttk  # themed ui components that match the OS
 
 from collections import defaultdict
-from operator import itemgetter
 from enum import Enum
 import functools
 import math
-from typing import NamedTuple, Optional, List, Dict, Union, Iterable, Mapping
+from typing import NamedTuple, Optional, List, Dict, Tuple, Union, Iterable, Mapping
 
 from app.richTextBox import tkRichText
 from app.tkMarkdown import MarkdownData
@@ -241,7 +240,8 @@ class Item:
     - group: Items with the same group name will be shown together.
     - attrs: a dictionary containing the attribute values for this item.
 
-    - button, Set later, the button TK object for this item
+    - button, The TK button displaying this item, only while it's scrolled
+      into view.
     """
     __slots__ = [
         'name',
@@ -300,7 +300,7 @@ class Item:
         self.snd_sample = snd_sample
         self.authors: List[str] = list(authors)
         self.attrs: Dict[str, AttrValues] = dict(attributes)
-        # The button widget for this item.
+        # The button widget for this item, if it's currently visible.
         self.button: Optional[ttk.Button] = None
         # The selector window we belong to.
         self._selector: Optional['selWin'] = None
@@ -320,7 +320,7 @@ class Item:
     def context_lbl(self, value):
         """Update the context menu whenver this is set."""
         self._context_lbl = value
-        if self._selector and self._context_ind:
+        if self._selector and self._selector._context_built and self._context_ind is not None:
             self._selector.context_menus[self.group.casefold()].entryconfigure(
                 self._context_ind,
                 label=value,
@@ -342,15 +342,6 @@ class Item:
             attributes=attrs,
         )
 
-    def set_pos(self, x=None, y=None):
-        """Place the item on the palette."""
-        if x is None or y is None:
-            # Remove from the window.
-            self.button.place_forget()
-        else:
-            self.button.place(x=x, y=y)
-            self.button.lift()  # Force a particular stacking order for widgets
-        
     def copy(self) -> 'Item':
         """Duplicate an item."""
         item = Item.__new__(Item)
@@ -557,6 +548,15 @@ class selWin:
         shim.rowconfigure(0, weight=1)
         shim.columnconfigure(0, weight=1)
 
+        # Only the items scrolled into view have buttons. These are
+        # reused as items scroll in and out.
+        self._shown_items: Dict[Item, ttk.Button] = {}
+        self._button_item: Dict[ttk.Button, Item] = {}
+        self._spare_buttons: List[ttk.Button] = []
+        # For each visible group, the y position of the first row and the items.
+        self._group_layout: List[Tuple[int, List[Item]]] = []
+        self._total_height = 1
+
         # We need to use a canvas to allow scrolling.
         self.wid_canvas = Canvas(shim, highlightthickness=0)
         self.wid_canvas.grid(row=0, column=0, sticky="NSEW")
@@ -571,7 +571,7 @@ class selWin:
             command=self.wid_canvas.yview,
         )
         self.wid_scroll.grid(row=0, column=1, sticky="NS")
-        self.wid_canvas['yscrollcommand'] = self.wid_scroll.set
+        self.wid_canvas['yscrollcommand'] = self._evt_scrolled
 
         utils.add_mousewheel(self.wid_canvas, self.win)
 
@@ -739,8 +739,10 @@ class selWin:
         self.mouseover_font = self.norm_font.copy()
         self.mouseover_font['slant'] = tk_font.ITALIC
 
-        # The headers for the context menu
-        self.context_menus: Dict[str, Menu] = {}
+        # The headers for the context menu. These are only built when
+        # it's first opened.
+        self.context_menus: Dict[str, Menu] = {'': self.context_menu}
+        self._context_built = False
         # The widget used to control which menu option is selected.
         self.context_var = StringVar()
 
@@ -882,45 +884,12 @@ class selWin:
         grouped_items = defaultdict(list)
         # If the item is groupless, use 'Other' for the header.
         self.group_names = {'':  _('Other')}
-        # Ungrouped items appear directly in the menu.
-        self.context_menus = {'': self.context_menu}
-
-        # First clear off the menu.
-        self.context_menu.delete(0, 'end')
 
-        for ind, item in enumerate(self.item_list):
+        for item in self.item_list:
             if item._selector is not None and item._selector is not self:
                 raise ValueError(f'Item {item} reused on a different selector!')
             item._selector = self
 
-            if item.button is None:  # New, create the button widget.
-                if item is self.noneItem:
-                    item.button = ttk.Button(
-                        self.pal_frame,
-                        image=item.icon,
-                    )
-                    item.context_lbl = item.context_lbl
-                else:
-                    item.button = ttk.Button(
-                        self.pal_frame,
-                        text=item.shortName,
-                        image=item.icon,
-                        compound='top',
-                    )
-
-                @utils.bind_leftclick(item.button)
-                def click_item(event=None, *, _self=self, _item=item):
-                    """Handle clicking on the item.
-
-                    If it's already selected, save and close the window.
-                    """
-                    # We need to capture the item in a default, since it's
-                    # the same variable in different iterations
-                    if _item is self.selected:
-                        _self.save()
-                    else:
-                        _self.sel_item(_item)
-
             group_key = item.group.casefold()
             grouped_items[group_key].append(item)
 
@@ -929,21 +898,6 @@ class selWin:
             if group_key not in self.group_widgets:
                 self.group_widgets[group_key] = GroupHeader(self, item.group)
 
-            try:
-                menu = self.context_menus[group_key]
-            except KeyError:
-                self.context_menus[group_key] = menu = Menu(
-                    self.context_menu,
-                )
-
-            menu.add_radiobutton(
-                label=item.context_lbl,
-                command=functools.partial(self.sel_item_id, item.name),
-                var=self.context_var,
-                value=item.name,
-            )
-            item._context_ind = len(grouped_items[group_key]) - 1
-
         # Convert to a normal dictionary, after adding all items.
         self.grouped_items = dict(grouped_items)
 
@@ -951,27 +905,59 @@ class selWin:
         # Note - empty string should sort to the beginning!
         self.group_order[:] = sorted(self.grouped_items.keys())
 
+        # The menu is out of date, rebuild when next opened.
+        self._context_built = False
+        self.flow_items()
+
+    def _build_context_menu(self) -> None:
+        """Create the items in the context menu.
+
+        There could be a lot of items, so this is only done the first time
+        the menu is opened.
+        """
+        # First clear off the menu.
+        self.context_menu.delete(0, 'end')
+        for key, menu in self.context_menus.items():
+            if key != '':
+                menu.destroy()
+        # Ungrouped items appear directly in the menu.
+        self.context_menus = {'': self.context_menu}
+
+        for group_key in self.group_order:
+            if group_key == '':
+                menu = self.context_menu
+            else:
+                self.context_menus[group_key] = menu = Menu(
+                    self.context_menu,
+                )
+            for ind, item in enumerate(self.grouped_items[group_key]):
+                menu.add_radiobutton(
+                    label=item.context_lbl,
+                    command=functools.partial(self.sel_item_id, item.name),
+                    var=self.context_var,
+                    value=item.name,
+                )
+                item._context_ind = ind
+
         # We start with the ungrouped items, so increase the index
         # appropriately.
-        if '' in grouped_items:
-            start = len(self.grouped_items[''])
-        else:
-            start = 0
-
-        for index, (key, menu) in enumerate(
-            sorted(self.context_menus.items(), key=itemgetter(0)),
-            start=start,
-        ):
+        index = len(self.grouped_items.get('', ()))
+        for key in self.group_order:
             if key == '':
                 # Don't add the ungrouped menu to itself!
                 continue
+            menu = self.context_menus[key]
             self.context_menu.add_cascade(
                 menu=menu,
                 label=self.group_names[key],
             )
             # Set a custom attribute to keep track of the menu's index.
             menu._context_index = index
-        self.flow_items()
+            index += 1
+
+        self._context_built = True
+        if self.suggested is not None:
+            self._set_context_font(self.suggested, self.sugg_font)
 
     def exit(self, event: Event = None) -> None:
         """Quit and cancel, choosing the originally-selected item."""
@@ -1050,6 +1036,8 @@ class selWin:
     def open_context(self, e: Event = None) -> None:
         """Dislay the context window at the text widget."""
         if not self._readonly:
+            if not self._context_built:
+                self._build_context_menu()
             self.context_menu.post(
                 self.display.winfo_rootx(),
                 self.display.winfo_rooty() + self.display.winfo_height())
@@ -1120,9 +1108,11 @@ class selWin:
         else:
             self.prop_desc.set_text(item.desc)
 
-        self.selected.button.state(('!alternate',))
+        if self.selected.button is not None:
+            self.selected.button.state(('!alternate',))
         self.selected = item
-        item.button.state(('alternate',))
+        if item.button is not None:
+            item.button.state(('alternate',))
         self.scroll_to(item)
 
         if self.sampler:
@@ -1328,9 +1318,7 @@ class selWin:
 
         # The offset for the current group
         y_off = 0
-
-        # Hide suggestion indicator if the item's not visible.
-        self.sugg_lbl.place_forget()
+        self._group_layout.clear()
 
         for group_key in self.group_order:
             items = self.grouped_items[group_key]
@@ -1344,26 +1332,10 @@ class selWin:
             y_off += group_wid.winfo_reqheight()
 
             if not group_wid.visible:
-                # Hide everything!
-                for item in items:  # type: Item
-                    item.set_pos()
+                # The items won't be in the layout, so they're hidden.
                 continue
 
-            # Place each item
-            for i, item in enumerate(items):  # type: int, Item
-                if item == self.suggested:
-                    self.sugg_lbl.place(
-                        x=(i % width) * ITEM_WIDTH + 1,
-                        y=(i // width) * ITEM_HEIGHT + y_off,
-                    )
-                    self.sugg_lbl['width'] = item.button.winfo_width()
-                item.set_pos(
-                    x=(i % width) * ITEM_WIDTH + 1,
-                    y=(i // width) * ITEM_HEIGHT + y_off + 20,
-                )
-                item.button['text'] = item.shortName
-                item.button['image'] = item.icon
-
+            self._group_layout.append((y_off + 20, items))
             # Increase the offset by the total height of this item section
             y_off += math.ceil(len(items) / width) * ITEM_HEIGHT + 5
 
@@ -1374,12 +1346,119 @@ class selWin:
             y_off,
         )
         self.pal_frame['height'] = y_off
+        self._total_height = max(y_off, 1)
+
+        self._update_visible(reconfigure=True)
+
+        # Hide suggestion indicator if the item's not visible.
+        self.sugg_lbl.place_forget()
+        if self.suggested is not None:
+            pos = self._item_pos(self.suggested)
+            if pos is not None:
+                x, y = pos
+                self.sugg_lbl.place(x=x, y=y - 20)
+                if self.suggested.button is not None:
+                    self.sugg_lbl['width'] = self.suggested.button.winfo_reqwidth()
+
+    def _item_pos(self, item: Item) -> Optional[Tuple[int, int]]:
+        """Compute the position of an item on the palette.
+
+        If it's in a hidden group, None is returned.
+        """
+        for y_off, items in self._group_layout:
+            if items and items[0].group.casefold() == item.group.casefold():
+                try:
+                    i = items.index(item)
+                except ValueError:
+                    return None
+                return (
+                    (i % self.item_width) * ITEM_WIDTH + 1,
+                    (i // self.item_width) * ITEM_HEIGHT + y_off,
+                )
+        return None
+
+    def _evt_scrolled(self, first: str, last: str) -> None:
+        """When the canvas scrolls, update the scrollbar and visible items."""
+        self.wid_scroll.set(first, last)
+        self._update_visible()
+
+    def _update_visible(self, reconfigure: bool=False) -> None:
+        """Create buttons for the items which are in view, and remove others.
+
+        If reconfigure is set, the position and contents of all buttons
+        are updated, since the layout changed.
+        """
+        # Include an extra row on each side, so there aren't gaps while
+        # scrolling.
+        top = self.wid_canvas.canvasy(0) - ITEM_HEIGHT
+        bottom = self.wid_canvas.canvasy(self.wid_canvas.winfo_height()) + ITEM_HEIGHT
+        width = self.item_width
+
+        visible: Dict[Item, Tuple[int, int]] = {}
+        for y_off, items in self._group_layout:
+            rows = math.ceil(len(items) / width)
+            first_row = max(0, int(top - y_off) // ITEM_HEIGHT)
+            last_row = min(rows - 1, int(bottom - y_off) // ITEM_HEIGHT)
+            for i in range(first_row * width, min((last_row + 1) * width, len(items))):
+                visible[items[i]] = (
+                    (i % width) * ITEM_WIDTH + 1,
+                    (i // width) * ITEM_HEIGHT + y_off,
+                )
+
+        # Release buttons which scrolled out of view.
+        for item in list(self._shown_items):
+            if item not in visible:
+                button = self._shown_items.pop(item)
+                del self._button_item[button]
+                button.place_forget()
+                self._spare_buttons.append(button)
+                item.button = None
+
+        for item, (x, y) in visible.items():
+            if item.button is not None and not reconfigure:
+                continue
+            if item.button is None:
+                try:
+                    item.button = self._spare_buttons.pop()
+                except IndexError:
+                    item.button = self._make_button()
+                self._shown_items[item] = item.button
+                self._button_item[item.button] = item
+            if item is self.noneItem:
+                item.button.configure(text='', image=item.icon, compound='image')
+            else:
+                item.button.configure(text=item.shortName, image=item.icon, compound='top')
+            item.button.state(('alternate' if item is self.selected else '!alternate',))
+            item.button.place(x=x, y=y)
+            item.button.lift()  # Force a particular stacking order for widgets
+
+    def _make_button(self) -> ttk.Button:
+        """Create a new button, used to display items."""
+        button = ttk.Button(self.pal_frame)
+
+        @utils.bind_leftclick(button)
+        def click_item(event=None):
+            """Handle clicking on the item.
+
+            If it's already selected, save and close the window.
+            """
+            try:
+                item = self._button_item[button]
+            except KeyError:  # Scrolled out of view.
+                return
+            if item is self.selected:
+                self.save()
+            else:
+                self.sel_item(item)
+        return button
 
     def scroll_to(self, item: Item) -> None:
         """Scroll to an item so it's visible."""
+        pos = self._item_pos(item)
+        if pos is None:
+            return  # In a hidden group.
         canvas = self.wid_canvas
-
-        height = canvas.bbox(ALL)[3]  # Returns (x, y, width, height)
+        height = self._total_height
 
         bottom, top = canvas.yview()
         # The sizes are returned in fractions, but we use the pixel values
@@ -1387,7 +1466,7 @@ class selWin:
         bottom *= height
         top *= height
 
-        y = item.button.winfo_y()
+        y = pos[1]
 
         if bottom <= y - 8 and y + ICON_SIZE + 8 <= top:
             return  # Already in view
@@ -1418,11 +1497,14 @@ class selWin:
         """Set the font of an item, and its parent group."""
 
         if item.group:
-            group_key = item.group.casefold()
-            menu = self.context_menus[group_key]
-
             # Apply the font to the group header as well.
-            self.group_widgets[group_key].title['font'] = font
+            self.group_widgets[item.group.casefold()].title['font'] = font
+        if not self._context_built:
+            # This will be applied when the menu is built.
+            return
+
+        if item.group:
+            menu = self.context_menus[item.group.casefold()]
 
             # Also highlight the menu
             self.context_menu.entryconfig(
@@ -1,5 +1,5 @@
 """Configures which signs are defined for the Signage item."""
-from typing import Optional, Tuple, List, Dict, overload
+from typing import Optional, Tuple, List, Dict, Union, overload
 
 from app import dragdrop, img, TK_ROOT
 import srctools.logger
@@ -144,7 +144,7 @@ def init_widgets(master: ttk.Frame) -> Optional[tk.Misc]:
     canv_all = tk.Canvas(window)
 
     scroll = HidingScroll(window, orient='vertical', command=canv_all.yview)
-    canv_all['yscrollcommand'] = scroll.set
+    picker = drag_man.picker(canv_all, scroll.set)
 
     name_label = ttk.Label(window, text='', justify='center')
     frame_preview = ttk.Frame(window, relief='raised', borderwidth=4)
@@ -196,7 +196,7 @@ def init_widgets(master: ttk.Frame) -> Optional[tk.Misc]:
                 preview_right['image'] = blank_sign
         hover_toggle_id = TK_ROOT.after(1000, hover_toggle)
 
-    def on_hover(slot: dragdrop.Slot[Signage]) -> None:
+    def on_hover(slot: Union[dragdrop.Slot[Signage], dragdrop.PickerCell[Signage]]) -> None:
         """Show the signage when hovered."""
         nonlocal hover_arrow, hover_sign
         if slot.contents is not None:
@@ -207,7 +207,7 @@ def init_widgets(master: ttk.Frame) -> Optional[tk.Misc]:
         else:
             on_leave(slot)
 
-    def on_leave(slot: dragdrop.Slot[Signage]) -> None:
+    def on_leave(slot: Union[dragdrop.Slot[Signage], dragdrop.PickerCell[Signage]]) -> None:
         """Reset the visible sign when left."""
         nonlocal hover_toggle_id, hover_sign
         name_label['text'] = ''
@@ -237,16 +237,10 @@ def init_widgets(master: ttk.Frame) -> Optional[tk.Misc]:
             except KeyError:
                 LOGGER.warning('Missing sign id: {}', prev_id)
 
-    for sign in sorted(Signage.all(), key=lambda s: s.name):
-        if not sign.hidden:
-            slot = drag_man.slot(canv_all, source=True)
-            slot.contents = sign
-
-    drag_man.flow_slots(canv_all, drag_man.sources())
-
-    canv_all.bind(
-        '<Configure>',
-        lambda e: drag_man.flow_slots(canv_all, drag_man.sources()),
+    picker.set_items(
+        sign
+        for sign in sorted(Signage.all(), key=lambda s: s.name)
+        if not sign.hidden
     )
 
     def show_window() -> None:
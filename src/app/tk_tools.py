@@ -2,7 +2,10 @@
 General code used for tkinter portions.
 
 """
-from typing import Union, Callable, Optional
+from concurrent.futures import Future
+from typing import Union, Callable, Optional, Any, Tuple, TypeVar
+import queue
+import threading
 
 from tkinter import ttk
 from tkinter import font as _tk_font
@@ -26,6 +29,14 @@ except ImportError:
 
 import utils
 
+T = TypeVar('T')
+
+# How often to check on background work, in milliseconds.
+BACKGROUND_POLL_INTERVAL = 50
+
+# Functions that background threads want called on the Tk thread.
+_tk_calls: 'queue.SimpleQueue[Tuple[Callable[[], Any], Future]]' = queue.SimpleQueue()
+
 
 # Set icons for the application.
 
@@ -87,6 +98,72 @@ def event_cancel(*args, **kwargs):
     return 'break'
 
 
+def run_in_tk(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Call a function on the Tk thread, and wait for the result.
+
+    This allows background work to show message boxes and the like.
+    It must only be used from inside run_in_background(), since that is what
+    processes the calls.
+    """
+    if threading.current_thread() is threading.main_thread():
+        return func(*args, **kwargs)
+    future = Future()  # type: Future
+    _tk_calls.put((lambda: func(*args, **kwargs), future))
+    return future.result()
+
+
+def _run_tk_calls() -> None:
+    """Perform the calls queued by run_in_tk()."""
+    while True:
+        try:
+            func, future = _tk_calls.get_nowait()
+        except queue.Empty:
+            return
+        if not future.set_running_or_notify_cancel():
+            continue
+        try:
+            result = func()
+        except BaseException as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+
+def run_in_background(
+    name: str,
+    func: Callable[[], T],
+    callback: Callable[['Future[T]'], None],
+) -> None:
+    """Run a function on a worker thread, so the UI stays responsive.
+
+    Once it finishes, callback is called on the Tk thread with the future
+    holding the result.
+    """
+    future = Future()  # type: Future
+
+    def worker() -> None:
+        """Run the function, storing the result."""
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = func()
+        except BaseException as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+    def poll() -> None:
+        """Handle requests from the worker, then check if it's done."""
+        _run_tk_calls()
+        if future.done():
+            callback(future)
+        else:
+            TK_ROOT.after(BACKGROUND_POLL_INTERVAL, poll)
+
+    threading.Thread(target=worker, name=name).start()
+    TK_ROOT.after(BACKGROUND_POLL_INTERVAL, poll)
+
+
 class QueryShim(simpledialog._QueryString):
     """Replicate the new API with the old simpledialog code."""
     def __init__(self, parent, title, message, text0):
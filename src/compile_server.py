@@ -0,0 +1,372 @@
+"""An optional long-lived server which keeps the compiler warm between compiles.
+
+Starting the compiler requires importing every condition module, the BSP
+transforms, and reparsing the same configs and templates. When enabled in the
+compiler pane, the first compile spawns this server in the background. Later
+compiles connect to it over a local socket from compiler_launch, and it runs
+the request in a forked copy of itself. That means each compile starts from a
+clean copy of the warmed-up state, so no per-map state can leak between them.
+
+This relies on os.fork(), so it is unavailable on Windows - the launcher falls
+back to compiling in-process there.
+"""
+import os
+import sys
+import functools
+import pickle
+import socket
+import logging
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import (
+    Client, Connection,
+    answer_challenge, deliver_challenge,
+)
+
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from srctools.logger import init_logging
+import srctools.logger
+
+
+LOGGER = srctools.logger.get_logger(__name__)
+
+# Written into bin/bee2/, so the launcher can find the running server.
+SERVER_INFO = 'bee2/compile_server.bin'
+# If no compiles happen for this long, the server exits.
+IDLE_TIMEOUT = 30 * 60
+# Size of chunks of compiler output forwarded to the client.
+CHUNK_SIZE = 4096
+
+AVAILABLE = hasattr(os, 'fork')
+
+T = TypeVar('T')
+
+# Parsed files which are kept between compiles.
+# Maps filename -> (mtime, size), value.
+_WARM_FILES: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+# The functions used to parse each warm file.
+_WARM_LOADERS: Dict[str, Callable[[str], Any]] = {}
+
+
+def _file_key(filename: str) -> Optional[Tuple[int, int]]:
+    """Return the stat info used to determine if a file changed."""
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def warm_file(filename: str) -> Callable[[Callable[[str], T]], Callable[[], T]]:
+    """Decorate a function parsing a config file, so the server can cache it.
+
+    The function is called with the filename. When not running under the
+    server, this just calls the function. Otherwise the result is parsed
+    ahead of time, and shared with the compile only via fork(), so it can
+    be freely modified.
+    """
+    def deco(func: Callable[[str], T]) -> Callable[[], T]:
+        """Register the function."""
+        _WARM_LOADERS[filename] = func
+
+        @functools.wraps(func)
+        def load() -> T:
+            """Return the cached value, or parse the file."""
+            try:
+                cache_key, value = _WARM_FILES[filename]
+            except KeyError:
+                pass
+            else:
+                if cache_key == _file_key(filename):
+                    LOGGER.debug('Reusing parsed "{}"', filename)
+                    return value
+            return func(filename)
+        return load
+    return deco
+
+
+def _refresh_warm_files() -> None:
+    """In the server, reparse any configs used by the last compile that changed."""
+    for filename, loader in list(_WARM_LOADERS.items()):
+        key = _file_key(filename)
+        if key is None:
+            _WARM_FILES.pop(filename, None)
+            continue
+        try:
+            cache_key, value = _WARM_FILES[filename]
+        except KeyError:
+            pass
+        else:
+            if cache_key == key:
+                continue
+        LOGGER.info('Parsing "{}"...', filename)
+        try:
+            _WARM_FILES[filename] = key, loader(filename)
+        except Exception:
+            # The compile itself will report this properly.
+            LOGGER.warning('Could not parse "{}":', filename, exc_info=True)
+            _WARM_FILES.pop(filename, None)
+
+
+def _reset_logging(filename: str) -> None:
+    """Remove all existing logging handlers, then log to a new file.
+
+    Each of the compilers logs to its own file on import, so we need
+    to redirect to the right one.
+    """
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    init_logging(filename)
+
+
+def _read_info() -> Optional[Tuple[Tuple[str, int], bytes]]:
+    """Read the address and authentication key of a running server."""
+    try:
+        with open(SERVER_INFO, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+
+def _exe_key() -> Optional[Tuple[int, int]]:
+    """The stat info for our executable, used to detect reinstalls."""
+    return _file_key(sys.executable if hasattr(sys, 'frozen') else __file__)
+
+
+def _connect() -> Optional[Connection]:
+    """Connect to the running server, if possible."""
+    info = _read_info()
+    if info is None:
+        return None
+    address, authkey = info
+    try:
+        return Client(address, authkey=authkey)
+    except (OSError, EOFError, ValueError, AuthenticationError):
+        # Not running anymore, or a stale file.
+        return None
+
+
+def _ping() -> bool:
+    """Check if a server is currently running."""
+    conn = _connect()
+    if conn is None:
+        return False
+    with conn:
+        try:
+            conn.send(('ping', None, None, None, None))
+            return conn.recv()[0] == 'pong'
+        except (OSError, EOFError):
+            return False
+
+
+def run_remote(app_name: str, argv: List[str]) -> Optional[int]:
+    """Try to run the compile on the server, returning the exit code.
+
+    If the server is not running or refuses, None is returned and the
+    caller should compile normally.
+    """
+    if not AVAILABLE:
+        return None
+    conn = _connect()
+    if conn is None:
+        return None
+    out = sys.stdout.buffer
+    with conn:
+        try:
+            conn.send(('compile', app_name, argv, os.getcwd(), _exe_key()))
+            while True:
+                kind, data = conn.recv()
+                if kind == 'out':
+                    out.write(data)
+                    out.flush()
+                elif kind == 'exit':
+                    return data
+                else:  # 'refused'
+                    return None
+        except (OSError, EOFError):
+            # The server died - the compile may have partially run, so fail
+            # instead of trying again.
+            return 1
+
+
+def spawn_server() -> None:
+    """Start the server in the background, for the next compile to use."""
+    import subprocess
+    if not AVAILABLE:
+        return
+    if hasattr(sys, 'frozen'):
+        args = [sys.executable, '--bee2-compile-server']
+    else:
+        args = [
+            sys.executable,
+            os.path.abspath(sys.argv[0]),
+            '--bee2-compile-server',
+        ]
+    subprocess.Popen(
+        args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def _run_child(app_name: str, argv: List[str], cwd: str, out_fd: int) -> int:
+    """In the forked child, run the compiler. This returns the exit code."""
+    # Send all output through the pipe, including Valve's compilers.
+    os.dup2(out_fd, 1)
+    os.dup2(out_fd, 2)
+    os.close(out_fd)
+    os.chdir(cwd)
+    sys.argv = argv
+
+    import vbsp
+    import vrad
+    from precomp import options
+
+    try:
+        if app_name.startswith('vbsp'):
+            _reset_logging('bee2/vbsp.log')
+            # Loaded on import, so they could be out of date.
+            for conf in [vbsp.BEE2_config, options.ITEM_CONFIG]:
+                conf.clear()
+                conf.load()
+            vbsp.main()
+        else:
+            _reset_logging('bee2/vrad.log')
+            vrad.main(argv)
+    except SystemExit as exc:
+        if exc.code is None:
+            return 0
+        elif isinstance(exc.code, int):
+            return exc.code
+        print(exc.code, file=sys.stderr)
+        return 1
+    except BaseException:
+        LOGGER.exception('Compile failed:')
+        return 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    return 0
+
+
+def _handle(conn: Connection, exe_key: Optional[Tuple[int, int]]) -> bool:
+    """Process a single compile request.
+
+    If False is returned, the server should shut down.
+    """
+    cmd, app_name, argv, cwd, client_exe = conn.recv()
+    if cmd == 'ping':
+        conn.send(('pong', None))
+        return True
+    if client_exe != exe_key or client_exe != _exe_key():
+        # The compiler was re-exported, we need to restart to pick that up.
+        LOGGER.info('Compiler executable changed, shutting down.')
+        conn.send(('refused', None))
+        return False
+    if os.path.normcase(cwd) != os.path.normcase(os.getcwd()):
+        # Our config filenames are relative, so they'd be wrong.
+        LOGGER.warning('Compile in a different folder "{}", refusing.', cwd)
+        conn.send(('refused', None))
+        return True
+
+    LOGGER.info('Compiling: {} {}', app_name, argv)
+    _refresh_warm_files()
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # Child.
+        os.close(read_fd)
+        code = 1
+        try:
+            code = _run_child(app_name, argv, cwd, write_fd)
+        finally:
+            os._exit(code)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd, 'rb', buffering=0) as pipe:
+        while True:
+            data = pipe.read(CHUNK_SIZE)
+            if not data:
+                break
+            conn.send(('out', data))
+    _, status = os.waitpid(pid, 0)
+    if os.WIFEXITED(status):
+        code = os.WEXITSTATUS(status)
+    else:
+        code = 1
+    LOGGER.info('Compile finished, exit code = {}', code)
+    conn.send(('exit', code))
+    return True
+
+
+def serve() -> None:
+    """Run the compile server, until it's idle for too long."""
+    _reset_logging('bee2/compile_server.log')
+    if not AVAILABLE:
+        LOGGER.error('The compile server requires os.fork()!')
+        return
+
+    if _ping():
+        LOGGER.info('Another server is already running.')
+        return
+
+    exe_key = _exe_key()
+
+    LOGGER.info('Importing compilers...')
+    # Importing the compilers starts logging to their usual files, which would
+    # wipe the logs of the last compile. Do that somewhere harmless instead.
+    orig_dir = os.getcwd()
+    os.makedirs('bee2/compile_server/bee2', exist_ok=True)
+    os.chdir('bee2/compile_server')
+    try:
+        # Not used here, but imported so forked children start with it
+        # already loaded.
+        import vbsp  # noqa: F401
+        import vrad
+        from precomp import conditions
+    finally:
+        os.chdir(orig_dir)
+    _reset_logging('bee2/compile_server.log')
+
+    conditions.import_conditions(lazy=False)
+    vrad.load_transforms()
+    _refresh_warm_files()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('localhost', 0))
+    sock.listen()
+    sock.settimeout(IDLE_TIMEOUT)
+    authkey = os.urandom(32)
+    with open(SERVER_INFO, 'wb') as f:
+        pickle.dump((sock.getsockname(), authkey), f)
+    LOGGER.info('Compile server listening on {}', sock.getsockname())
+
+    try:
+        while True:
+            try:
+                client, _ = sock.accept()
+            except socket.timeout:
+                LOGGER.info('Idle, shutting down.')
+                break
+            client.settimeout(None)
+            with Connection(client.detach()) as conn:
+                try:
+                    deliver_challenge(conn, authkey)
+                    answer_challenge(conn, authkey)
+                    if not _handle(conn, exe_key):
+                        break
+                except (OSError, EOFError, AuthenticationError):
+                    LOGGER.warning('Client disconnected:', exc_info=True)
+    finally:
+        sock.close()
+        try:
+            with open(SERVER_INFO, 'rb') as f:
+                is_ours = pickle.load(f)[1] == authkey
+            if is_ours:
+                os.remove(SERVER_INFO)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            pass
@@ -1,6 +1,7 @@
 """Build commands for VBSP and VRAD."""
 from pathlib import Path
 from PyInstaller.utils.hooks import collect_submodules
+import ast
 import contextlib
 import pkgutil
 import os
@@ -76,8 +77,8 @@ INCLUDES += collect_submodules('srctools', lambda name: 'pyinstaller' not in nam
 import logging.handlers
 import logging.config
 
+# Socket is always required by the compile server (compile_server.py).
 if not hasattr(logging.handlers, 'socket') and not hasattr(logging.config, 'socket'):
-    EXCLUDES.append('socket')
     # Subprocess uses this in UNIX-style OSes, but not Windows.
     if WIN:
         EXCLUDES += ['selectors', 'select']
@@ -87,8 +88,9 @@ del logging
 if MAC or LINUX:
     EXCLUDES += ['grp', 'pwd']  # Unix authentication modules, optional
 
-    # The only hash algorithm that's used is sha512 - random.seed()
-    EXCLUDES += ['_sha1', '_sha256', '_md5']
+    # The only hash algorithms used are sha512 - random.seed(), and md5 for
+    # authenticating with the compile server.
+    EXCLUDES += ['_sha1', '_sha256']
 
 if sys.version_info >= (3, 7):
     # Only needed on 3.6, it's in the stdlib thereafter.
@@ -100,6 +102,8 @@ INCLUDES += [
     for loader, module, is_package in
     pkgutil.iter_modules(['precomp/conditions'])
 ]
+# Generated below, lists the modules each condition is found in.
+INCLUDES.append('COND_MANIFEST')
 
 
 bee_version = input('BEE2 Version ("x.y.z" or blank for dev): ')
@@ -119,6 +123,57 @@ if version_val:
     with open(version_filename, 'w') as f:
         f.write(version_val)
 
+# Scan the condition modules, to find which flags and results each defines.
+# That way the compiler only needs to import those that are actually used.
+manifest = {'FLAGS': {}, 'RESULTS': {}, 'RESULT_SETUP': {}, 'ALWAYS': []}
+for loader, module, is_package in pkgutil.iter_modules(['precomp/conditions']):
+    mod_name = 'precomp.conditions.' + module
+    with open(os.path.join('precomp', 'conditions', module + '.py'), encoding='utf8') as f:
+        tree = ast.parse(f.read(), module + '.py')
+    always_import = False
+    # Check every call, not just decorators - some modules register names
+    # by calling these directly.
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        func_name = getattr(node.func, 'id', getattr(node.func, 'attr', ''))
+        if func_name == 'meta_cond':
+            # These always need to run.
+            always_import = True
+            continue
+        try:
+            lookup = {
+                'make_flag': 'FLAGS',
+                'make_result': 'RESULTS',
+                'make_result_setup': 'RESULT_SETUP',
+                'deprecate_flag': 'FLAGS',
+                'deprecate_result': 'RESULTS',
+            }[func_name]
+        except KeyError:
+            continue
+        for arg in node.args:
+            if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                manifest[lookup][arg.value.casefold()] = mod_name
+            else:
+                # Can't determine the name, so it needs to be imported.
+                always_import = True
+    if always_import:
+        manifest['ALWAYS'].append(mod_name)
+
+manifest_val = ''.join([
+    f'{key} = {value!r}\n'
+    for key, value in sorted(manifest.items())
+])
+manifest_filename = os.path.join(workpath, 'COND_MANIFEST.py')
+
+with contextlib.suppress(FileNotFoundError), open(manifest_filename) as f:
+    if f.read() == manifest_val:
+        manifest_val = None
+
+if manifest_val:
+    with open(manifest_filename, 'w') as f:
+        f.write(manifest_val)
+
 # Empty module to be the package __init__.
 transforms_stub = Path(workpath, 'transforms_stub.py')
 try:
@@ -2,18 +2,47 @@
 import os
 import sys
 
+if '--bee2-compile-server' in sys.argv:
+    import compile_server
+    compile_server.serve()
+    sys.exit()
+
 if hasattr(sys, 'frozen'):
     app_name = os.path.basename(sys.executable).casefold()
 else:
     # Sourcecode-launch - check first sys arg.
     app_name = sys.argv.pop(1).casefold()
 
+
+def use_server() -> bool:
+    """Check if the compile server is enabled."""
+    from BEE2_config import ConfigFile
+    return ConfigFile('compile.cfg').get_bool('General', 'compile_server')
+
+
 if app_name in ('vbsp.exe', 'vbsp_osx', 'vbsp_linux'):
+    if use_server():
+        import compile_server
+        code = compile_server.run_remote(app_name, sys.argv)
+        if code is not None:
+            sys.exit(code)
     import vbsp
     vbsp.main()
 elif app_name in ('vrad.exe', 'vrad_osx', 'vrad_linux'):
-    import vrad
-    vrad.main(sys.argv)
+    if use_server():
+        import compile_server
+        code = compile_server.run_remote(app_name, sys.argv)
+        if code is not None:
+            sys.exit(code)
+        # Not running yet, start it up after this compile for the next one.
+        import vrad
+        try:
+            vrad.main(sys.argv)
+        finally:
+            compile_server.spawn_server()
+    else:
+        import vrad
+        vrad.main(sys.argv)
 elif 'original' in app_name:
     sys.exit('Original compilers replaced, verify game cache!')
 else:
@@ -1,9 +1,11 @@
 """Parses the Puzzlemaker's item format."""
+import copy
+import io
 import sys
 from collections import defaultdict
 from enum import Enum, Flag
 from typing import (
-    Optional, Type, Callable, NamedTuple,
+    Any, Optional, Type, Callable, NamedTuple,
     List, Dict, Tuple, Set,
     Iterable, IO, Iterator, Mapping,
 )
@@ -399,6 +401,17 @@ DEFAULT_SOUNDS = {
     Sound.DELETE: 'P2Editor.RemoveOther',
 }
 _BLANK_INST = [ InstCount(FSPath(), 0, 0, 0) ]
+# The same instances and models are used by many items, so share the paths.
+_PATH_CACHE: Dict[str, FSPath] = {}
+
+
+def _intern_path(path: str) -> FSPath:
+    """Produce a path, reusing an existing one if possible."""
+    try:
+        return _PATH_CACHE[path]
+    except KeyError:
+        result = _PATH_CACHE[path] = FSPath(sys.intern(path))
+        return result
 
 
 class ConnSide(Enum):
@@ -559,7 +572,15 @@ class SubType:
     """Represents a single sub-item component of an overall item.
 
     Should not be constructed directly.
+    The sounds dict may be shared with DEFAULT_SOUNDS, so replace it instead
+    of modifying it.
     """
+    __slots__ = [
+        'name', 'models', 'sounds', 'anims',
+        'pal_name', 'pal_pos', 'pal_icon',
+        '_export_cache',
+    ]
+
     # The name, shown on remove connection windows.
     name: str
     # The models this uses, in order. The editoritems format includes
@@ -595,18 +616,23 @@ class SubType:
         self.pal_name = pal_name
         self.pal_pos = pal_pos
         self.pal_icon = pal_icon
+        # The values we last exported with, and the text produced. This is
+        # shared with copies, so they reuse text rendered for each other.
+        self._export_cache: List[Any] = [None, '']
 
     def copy(self) -> 'SubType':
         """Duplicate this subtype."""
-        return SubType(
+        result = SubType(
             self.name,
             self.models.copy(),
-            self.sounds.copy(),
+            self.sounds if self.sounds is DEFAULT_SOUNDS else self.sounds.copy(),
             self.anims.copy(),
             self.pal_name,
             self.pal_pos,
             self.pal_icon,
         )
+        result._export_cache = self._export_cache
+        return result
 
     __copy__ = copy
 
@@ -616,15 +642,7 @@ class SubType:
         We don't need to deep-copy the contents of the containers,
         since they're all immutable.
         """
-        return SubType(
-            self.name,
-            self.models.copy(),
-            self.sounds.copy(),
-            self.anims.copy(),
-            self.pal_name,
-            self.pal_pos,
-            self.pal_icon,
-        )
+        return self.copy()
 
     def __getstate__(self) -> object:
         if self.pal_pos is None:
@@ -649,12 +667,15 @@ class SubType:
 
     def __setstate__(self, state: tuple) -> None:
         self.name, mdls, snds, anims, self.pal_name, x, y, self.pal_icon = state
-        self.models = list(map(FSPath, mdls))
+        self.models = list(map(_intern_path, mdls))
         self.sounds = {
             snd: sndscript
             for snd, sndscript in zip(Sound, snds)
             if sndscript is not None
         }
+        if self.sounds == DEFAULT_SOUNDS:
+            self.sounds = DEFAULT_SOUNDS
+        self._export_cache = [None, '']
         self.anims = {
             anim: ind
             for anim, ind in zip(Anim, anims)
@@ -668,7 +689,7 @@ class SubType:
     @classmethod
     def parse(cls, tok: Tokenizer) -> 'SubType':
         """Parse a subtype from editoritems."""
-        subtype: SubType = cls('', [], DEFAULT_SOUNDS.copy(), {}, '', None, None)
+        subtype: SubType = cls('', [], DEFAULT_SOUNDS, {}, '', None, None)
         for key in tok.block('Subtype'):
             folded_key = key.casefold()
             if folded_key == 'name':
@@ -679,13 +700,13 @@ class SubType:
                 token, tok_value = next(tok.skipping_newlines())
                 model_name: Optional[FSPath] = None
                 if token is Token.STRING:
-                    model_name = FSPath(tok_value)
+                    model_name = _intern_path(tok_value)
                 elif token is Token.BRACE_OPEN:
                     # Parse the block.
                     for subkey in tok.block('Model', consume_brace=False):
                         subkey = subkey.casefold()
                         if subkey == 'modelname':
-                            model_name = FSPath(tok.expect(Token.STRING))
+                            model_name = _intern_path(tok.expect(Token.STRING))
                         elif subkey == 'texturename':
                             tok.expect(Token.STRING)  # Skip this.
                         else:
@@ -696,7 +717,7 @@ class SubType:
                     raise tok.error('No model name specified!')
                 if model_name.suffix.casefold() != '.mdl':
                     # Swap to '.mdl', since that's what the real model is.
-                    model_name = model_name.with_suffix('.mdl')
+                    model_name = _intern_path(str(model_name.with_suffix('.mdl')))
                 subtype.models.append(model_name)
             elif folded_key == 'palette':
                 for subkey in tok.block('Palette'):
@@ -704,7 +725,7 @@ class SubType:
                     if subkey == 'tooltip':
                         subtype.pal_name = tok.expect(Token.STRING)
                     elif subkey == 'image':
-                        subtype.pal_icon = FSPath(tok.expect(Token.STRING))
+                        subtype.pal_icon = _intern_path(tok.expect(Token.STRING))
                     elif subkey == 'position':
                         points = tok.expect(Token.STRING).split()
                         if len(points) in (2, 3):
@@ -719,12 +740,14 @@ class SubType:
                     else:
                         raise tok.error('Unknown palette option "{}"!', subkey)
             elif folded_key == 'sounds':
+                if subtype.sounds is DEFAULT_SOUNDS:
+                    subtype.sounds = DEFAULT_SOUNDS.copy()
                 for sound_kind in tok.block('Sounds'):
                     try:
                         sound = Sound(sound_kind.upper())
                     except ValueError:
                         raise tok.error('Unknown sound type "{}"!', sound_kind)
-                    subtype.sounds[sound] = tok.expect(Token.STRING)
+                    subtype.sounds[sound] = sys.intern(tok.expect(Token.STRING))
             elif folded_key == 'animations':
                 Anim.parse_block(subtype.anims, tok)
             else:
@@ -732,7 +755,24 @@ class SubType:
         return subtype
 
     def export(self, f: IO[str]) -> None:
-        """Write the subtype to a file."""
+        """Write the subtype to a file.
+
+        The text is reused if the subtype is unchanged since the last export.
+        """
+        key = (
+            self.name, tuple(self.models),
+            tuple(self.sounds.items()), tuple(self.anims.items()),
+            self.pal_name, self.pal_pos, self.pal_icon,
+        )
+        cache = self._export_cache
+        if cache[0] != key:
+            buf = io.StringIO()
+            self._export(buf)
+            cache[:] = key, buf.getvalue()
+        f.write(cache[1])
+
+    def _export(self, f: IO[str]) -> None:
+        """Generate the text for the subtype."""
         f.write('\t\t"SubType"\n\t\t\t{\n')
         if self.name:
             f.write(f'\t\t\t"Name" "{self.name}"\n')
@@ -768,7 +808,33 @@ class SubType:
 
 
 class Item:
-    """A specific item."""
+    """A specific item.
+
+    Copies of items share the voxel, connection point and other collections
+    only set when parsing, so these should be replaced instead of modified.
+    """
+    __slots__ = [
+        'id', 'cls', 'subtype_prop', 'subtypes', 'properties', 'animations',
+        'handle', 'facing', 'invalid_surf',
+        'anchor_barriers', 'anchor_goo', 'occupies_voxel',
+        'copiable', 'deletable', 'pseudo_handle',
+        'offset', 'targetname', 'instances', 'cust_instances',
+        'antline_points', 'occupy_voxels', 'embed_voxels', 'embed_faces', 'overlays',
+        'conn_inputs', 'conn_outputs', 'conn_config',
+        'force_input', 'force_output',
+        '_export_cache',
+    ]
+    # The attributes used to produce the exporting block. If they're all
+    # unchanged, the cached text can be reused. In-place modifications aren't
+    # detected, which is why these must be replaced instead.
+    _EXPORT_ATTRS = [
+        'id', 'instances', 'targetname', 'offset',
+        'conn_config', 'force_input', 'force_output',
+        'conn_inputs', 'conn_outputs',
+        'embed_voxels', 'embed_faces', 'occupy_voxels', 'overlays',
+        'antline_points',
+    ]
+
     id: str  # The item's unique ID.
     # The C++ class used to instantiate the item in the editor.
     cls: ItemClass
@@ -813,7 +879,7 @@ class Item:
         self.occupies_voxel = occupies_voxel
         self.copiable = True
         self.deletable = True
-        self.pseduo_handle = False
+        self.pseudo_handle = False
         # The default is 0 0 0, but this isn't useful since the rotation point
         # is wrong. So just make it the useful default, users can override.
         self.offset = Vec(64, 64, 64)
@@ -845,6 +911,9 @@ class Item:
         # If we want to force this item to have inputs/outputs,
         # like for linking together items.
         self.force_input = self.force_output = False
+        # The attributes we last exported with, and the exporting block text.
+        # This is shared with copies, so they reuse text rendered for each other.
+        self._export_cache: List[Any] = [None, '']
 
     def has_prim_input(self) -> bool:
         """Check whether this item has a primary input."""
@@ -869,19 +938,24 @@ class Item:
         return self.conn_config.output_act is not None or self.conn_config.output_deact is not None
 
     def set_inst(self, ind: int, inst: InstCount) -> None:
-        """Set the specified instance index, filling empty spaces in the list."""
-        inst_count = len(self.instances)
+        """Set the specified instance index, filling empty spaces in the list.
+
+        The list is replaced, since it may be shared with copies of this item.
+        """
+        instances = self.instances.copy()
+        inst_count = len(instances)
         if ind < 0:
             raise ValueError(f'Index must be positive, not {ind}!')
         elif ind < inst_count:
-            self.instances[ind] = inst
+            instances[ind] = inst
         elif ind == inst_count:
-            self.instances.append(inst)
+            instances.append(inst)
         else:
             # Add blank spots.
-            self.instances += _BLANK_INST * (ind - inst_count)
-            self.instances.append(inst)
-        assert self.instances[ind] is inst
+            instances += _BLANK_INST * (ind - inst_count)
+            instances.append(inst)
+        assert instances[ind] is inst
+        self.instances = instances
 
     @classmethod
     def parse(
@@ -1075,7 +1149,7 @@ class Item:
                 else:
                     raise tok.error('Unknown property option "{}"!', prop_value)
             try:
-                self.properties[prop_type.id.casefold()] = prop_type(default, index, user_default)
+                self.properties[sys.intern(prop_type.id.casefold())] = prop_type(default, index, user_default)
             except ValueError:
                 raise tok.error('Default value {} is not valid for {} properties!', default, prop_type.id)
 
@@ -1088,7 +1162,7 @@ class Item:
         for key in tok.block('Exporting'):
             folded_key = key.casefold()
             if folded_key == 'targetname':
-                self.targetname = tok.expect(Token.STRING)
+                self.targetname = sys.intern(tok.expect(Token.STRING))
             elif folded_key == 'offset':
                 self.offset = Vec.from_str(tok.expect(Token.STRING))
             elif folded_key == 'instances':
@@ -1149,10 +1223,10 @@ class Item:
                     raise tok.error('Unknown instance option {}', block_key)
             if inst_file is None:
                 raise tok.error('No instance filename provided!')
-            inst = InstCount(FSPath(inst_file), ent_count, brush_count,
+            inst = InstCount(_intern_path(inst_file), ent_count, brush_count,
                              side_count)
         elif block_tok is Token.STRING:
-            inst = InstCount(FSPath(inst_file), 0, 0, 0)
+            inst = InstCount(_intern_path(inst_file), 0, 0, 0)
         else:
             raise tok.error(block_tok)
         if inst_ind is not None:
@@ -1472,22 +1546,27 @@ class Item:
 
     @classmethod
     def export(cls, f: IO[str], items: Iterable['Item'], renderables: Mapping[RenderableType, Renderable]) -> None:
-        """Write a full editoritems file out."""
-        f.write('"ItemData"\n{\n')
+        """Write a full editoritems file out.
+
+        This is built up in memory, then written all at once.
+        """
+        buf = io.StringIO()
+        buf.write('"ItemData"\n{\n')
         for item in items:
-            item.export_one(f)
+            item.export_one(buf)
         if renderables:
-            f.write('\n\n"Renderables"\n\t{\n')
+            buf.write('\n\n"Renderables"\n\t{\n')
             for rend_type, rend in renderables.items():
-                f.write('\t"Item"\n\t\t{\n')
-                f.write(f'\t\t"Type"  "{rend_type.value}"\n')
-                f.write(f'\t\t"Model" "{rend.model}"\n')
-                f.write('\t\t"Animations"\n\t\t\t{\n')
+                buf.write('\t"Item"\n\t\t{\n')
+                buf.write(f'\t\t"Type"  "{rend_type.value}"\n')
+                buf.write(f'\t\t"Model" "{rend.model}"\n')
+                buf.write('\t\t"Animations"\n\t\t\t{\n')
                 for anim, ind in rend.animations.items():
-                    f.write(f'\t\t\t"{anim.value}" "{ind}"\n')
-                f.write('\t\t\t}\n\t\t}\n')
-            f.write('\t}\n')
-        f.write('}\n')
+                    buf.write(f'\t\t\t"{anim.value}" "{ind}"\n')
+                buf.write('\t\t\t}\n\t\t}\n')
+            buf.write('\t}\n')
+        buf.write('}\n')
+        f.write(buf.getvalue())
 
     def export_one(self, f: IO[str]) -> None:
         """Write a single item out to a file."""
@@ -1520,7 +1599,7 @@ class Item:
             f.write(f'\t\t"Copyable"  "0"\n')
         if not self.deletable:
             f.write(f'\t\t"Deletable" "0"\n')
-        if self.pseduo_handle:
+        if self.pseudo_handle:
             f.write(f'\t\t"PseudoHandle" "1"\n')
         f.write('\t\t}\n')
 
@@ -1532,6 +1611,23 @@ class Item:
                 f.write(f'\t\t\t"Index"        "{prop.index}"\n')
                 f.write('\t\t\t}\n')
             f.write('\t\t}\n')
+
+        # The exporting block is large, and only set when parsing.
+        # So reuse the text if the same values are present.
+        key = [getattr(self, attr) for attr in self._EXPORT_ATTRS]
+        cache = self._export_cache
+        if cache[0] is None or not all(
+            old is new or old == new
+            for old, new in zip(cache[0], key)
+        ):
+            buf = io.StringIO()
+            self._export_exporting_block(buf)
+            cache[:] = key, buf.getvalue()
+        f.write(cache[1])
+        f.write('\t}\n')
+
+    def _export_exporting_block(self, f: IO[str]) -> None:
+        """Write the exporting block to a file."""
         f.write('\t"Exporting"\n\t\t{\n')
         if self.instances:
             f.write('\t\t"Instances"\n\t\t\t{\n')
@@ -1647,7 +1743,6 @@ class Item:
                     f.write('\t\t\t\t}\n')
             f.write('\t\t\t}\n')
         f.write('\t\t}\n')
-        f.write('\t}\n')
 
     def _export_occupied_voxels(self, f: IO[str]) -> None:
         """Write occupied voxels to a file."""
@@ -1684,6 +1779,27 @@ class Item:
             f.write('\t\t\t\t}\n')
         f.write('\t\t\t}\n')
 
+    def __copy__(self) -> 'Item':
+        """Shallow-copy this item."""
+        result = Item.__new__(Item)
+        for attr in Item.__slots__:
+            setattr(result, attr, getattr(self, attr))
+        return result
+
+    def __deepcopy__(self, memodict: Optional[dict] = None) -> 'Item':
+        """Duplicate this item.
+
+        Only the subtypes and properties are modified after parsing, so just
+        those are copied. Everything else is shared.
+        """
+        result = self.__copy__()
+        result.subtypes = [subtype.copy() for subtype in self.subtypes]
+        result.properties = {
+            prop_id: copy.deepcopy(prop, memodict)
+            for prop_id, prop in self.properties.items()
+        }
+        return result
+
     def __getstate__(self) -> tuple:
         """Simplify pickles.
 
@@ -1705,7 +1821,7 @@ class Item:
             self.occupies_voxel,
             self.copiable,
             self.deletable,
-            self.pseduo_handle,
+            self.pseudo_handle,
             self.offset,
             self.targetname,
             self.instances,
@@ -1738,7 +1854,7 @@ class Item:
             self.occupies_voxel,
             self.copiable,
             self.deletable,
-            self.pseduo_handle,
+            self.pseudo_handle,
             self.offset,
             self.targetname,
             self.instances,
@@ -1762,3 +1878,4 @@ class Item:
             for prop in props
         }
         self.antline_points = dict(zip(ConnSide, antline_points))
+        self._export_cache = [None, '']
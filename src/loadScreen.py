@@ -11,13 +11,15 @@ from weakref import WeakSet
 from abc import abstractmethod
 import contextlib
 import multiprocessing
+import threading
+import time
 
 from loadScreen_daemon import run_screen as _splash_daemon
 from BEE2_config import GEN_OPTS
 import utils
 import srctools.logger
 
-from typing import Set, Tuple, cast, Any, Type
+from typing import Dict, Set, Tuple, cast, Any, Type
 
 
 # Keep a reference to all loading screens, so we can close them globally.
@@ -27,15 +29,51 @@ _ALL_SCREENS = cast(set, WeakSet())  # type: Set[LoadScreen]
 # Cancelled upon the next interaction with it to stop operation.
 _SCREEN_CANCEL_FLAG: Set[int] = set()
 
+# Steps are batched together, and sent at most this often (in seconds).
+STEP_INTERVAL = 0.05
+
 # Pairs of pipe ends we use to send data to the daemon and vice versa.
 # DAEMON is sent over to the other process.
 _PIPE_MAIN_REC, _PIPE_DAEMON_SEND = multiprocessing.Pipe(duplex=False)
 _PIPE_DAEMON_REC, _PIPE_MAIN_SEND = multiprocessing.Pipe(duplex=False)
+# Screens can be used from background threads, so only one may talk to the
+# daemon at a time.
+_PIPE_LOCK = threading.RLock()
+# Screens with steps waiting to be sent. If the loading code doesn't step
+# again soon, a thread sends them so the progress bar doesn't lag behind.
+_FLUSH_PENDING: Set['LoadScreen'] = set()
+_FLUSH_WANTED = threading.Event()
 
 
 class Cancelled(SystemExit):
     """Raised when the user cancels the loadscreen."""
 
+
+class CancelToken:
+    """Signals to work running on several threads that it should stop.
+
+    Each loadscreen has one, which is cancelled along with the screen. This
+    way every thread using the screen stops, not just the one which happened
+    to receive the cancel message.
+    """
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        """Request that the work stops."""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Check if cancel() was called."""
+        return self._event.is_set()
+
+    def check(self) -> None:
+        """Raise Cancelled if the work should stop."""
+        if self._event.is_set():
+            raise Cancelled
+
+
 LOGGER = srctools.logger.get_logger(__name__)
 
 
@@ -47,7 +85,8 @@ def close_all() -> None:
 
 def show_main_loader(is_compact: bool) -> None:
     """Special function, which sets the splash screen compactness."""
-    _PIPE_MAIN_SEND.send(('set_is_compact', id(main_loader), (is_compact, )))
+    with _PIPE_LOCK:
+        _PIPE_MAIN_SEND.send(('set_is_compact', id(main_loader), (is_compact, )))
     main_loader.show()
 
 
@@ -99,6 +138,19 @@ class LoadScreen:
         # active determines whether the screen is on, and if False stops most
         # functions from doing anything
 
+        # Steps which haven't been sent to the daemon yet.
+        self._pending_stage = ''
+        self._pending_steps = 0
+        self._last_flush = 0.0
+        # The progress of each stage, so we know when one completes.
+        self._values: Dict[str, int] = {}
+        self._maxes: Dict[str, int] = {}
+        # Count the messages we sent and how long loading took, to log how
+        # effective batching is.
+        self._step_count = self._msg_count = 0
+        self._shown_at = 0.0
+        self.cancel_token = CancelToken()
+
         _ALL_SCREENS.add(self)
 
         # Order the daemon to make this screen.
@@ -125,35 +177,83 @@ class LoadScreen:
 
     def _send_msg(self, command: str, *args: Any) -> None:
         """Send a message to the daemon."""
-        _PIPE_MAIN_SEND.send((command, id(self), args))
-        # Check the messages coming back as well.
-        while _PIPE_MAIN_REC.poll():
-            arg: Any
-            command, arg = _PIPE_MAIN_REC.recv()
-            if command == 'main_set_compact':
-                # Save the compact state to the config.
-                GEN_OPTS['General']['compact_splash'] = '1' if arg else '0'
-                GEN_OPTS.save_check()
-            elif command == 'cancel':
-                # Mark this loadscreen as cancelled.
-                _SCREEN_CANCEL_FLAG.add(arg)
-            else:
-                raise ValueError('Bad command from daemon: ' + repr(command))
-
-        # If the flag was set for us, raise an exception - the loading thing
-        # will then stop.
-        if id(self) in _SCREEN_CANCEL_FLAG:
-            _SCREEN_CANCEL_FLAG.discard(id(self))
-            LOGGER.info('User cancelled loading screen.')
-            raise Cancelled
+        with _PIPE_LOCK:
+            if self._pending_steps:
+                self._flush_steps()
+            self._send_now(command, *args)
+
+    def _flush_steps(self, reply: bool=True) -> None:
+        """Send the steps we've accumulated to the daemon."""
+        steps = self._pending_steps
+        self._pending_steps = 0
+        self._last_flush = time.perf_counter()
+        self._send_now('step', self._pending_stage, steps, reply=reply)
+
+    def _send_now(self, command: str, *args: Any, reply: bool=True) -> None:
+        """Send a message to the daemon, bypassing pending steps.
+
+        If reply is False, the daemon's messages and cancellation are left
+        for the next call made by the loading code.
+        """
+        with _PIPE_LOCK:
+            self._msg_count += 1
+            _PIPE_MAIN_SEND.send((command, id(self), args))
+            if not reply:
+                return
+            # Check the messages coming back as well.
+            while _PIPE_MAIN_REC.poll():
+                arg: Any
+                command, arg = _PIPE_MAIN_REC.recv()
+                if command == 'main_set_compact':
+                    # Save the compact state to the config.
+                    GEN_OPTS['General']['compact_splash'] = '1' if arg else '0'
+                    GEN_OPTS.save_check()
+                elif command == 'cancel':
+                    # Mark this loadscreen as cancelled.
+                    _SCREEN_CANCEL_FLAG.add(arg)
+                else:
+                    raise ValueError('Bad command from daemon: ' + repr(command))
+
+            # If the flag was set for us, raise an exception - the loading thing
+            # will then stop.
+            if id(self) in _SCREEN_CANCEL_FLAG:
+                _SCREEN_CANCEL_FLAG.discard(id(self))
+                LOGGER.info('User cancelled loading screen.')
+                self.cancel_token.cancel()
+                raise Cancelled
 
     def set_length(self, stage: str, num: int) -> None:
         """Set the maximum value for the specified stage."""
+        self._maxes[stage] = num
         self._send_msg('set_length', stage, num)
 
     def step(self, stage: str) -> None:
-        """Increment the specified stage."""
-        self._send_msg('step', stage)
+        """Increment the specified stage.
+
+        To avoid flooding the daemon, steps are sent in batches once
+        STEP_INTERVAL passes, the stage completes, or another stage or
+        command is sent.
+        If another thread using this screen was cancelled, Cancelled is
+        raised here too.
+        """
+        self.cancel_token.check()
+        with _PIPE_LOCK:
+            self._step_count += 1
+            if self._pending_steps and stage != self._pending_stage:
+                self._flush_steps()
+            self._pending_stage = stage
+            self._pending_steps += 1
+            value = self._values[stage] = self._values.get(stage, 0) + 1
+            # Flushing also checks if we were cancelled.
+            if (
+                value >= self._maxes.get(stage, value + 1)
+                or time.perf_counter() - self._last_flush >= STEP_INTERVAL
+            ):
+                self._flush_steps()
+            else:
+                # Make sure these are displayed even if no more steps come.
+                _FLUSH_PENDING.add(self)
+                _FLUSH_WANTED.set()
 
     def skip_stage(self, stage: str) -> None:
         """Skip over this stage of the loading process."""
@@ -162,12 +262,28 @@ class LoadScreen:
     def show(self) -> None:
         """Display the loading screen."""
         self.active = True
+        if self.cancel_token.cancelled:
+            # Starting again, so use a fresh token.
+            self.cancel_token = CancelToken()
+        self._shown_at = time.perf_counter()
         self._send_msg('show')
 
     def reset(self) -> None:
         """Hide the loading screen and reset all the progress bars."""
         self.active = False
-        self._send_msg('reset')
+        if self._step_count:
+            LOGGER.debug(
+                'Sent {} loading steps in {} messages, loading took {:.2f}s.',
+                self._step_count, self._msg_count,
+                time.perf_counter() - self._shown_at,
+            )
+        with _PIPE_LOCK:
+            self._step_count = self._msg_count = 0
+            # No point displaying them, they're about to be reset.
+            self._pending_steps = 0
+            self._values.clear()
+            self._maxes.clear()
+            self._send_msg('reset')
 
     def destroy(self):
         """Permanently destroy this screen and cleanup."""
@@ -188,6 +304,21 @@ class LoadScreen:
         self._send_msg('show')
 
 
+def _step_flusher() -> None:
+    """Runs on a thread, sending steps which have been waiting too long."""
+    while True:
+        _FLUSH_WANTED.wait()
+        time.sleep(STEP_INTERVAL)
+        with _PIPE_LOCK:
+            _FLUSH_WANTED.clear()
+            for screen in _FLUSH_PENDING:
+                if screen._pending_steps:
+                    screen._flush_steps(reply=False)
+            _FLUSH_PENDING.clear()
+
+
+threading.Thread(target=_step_flusher, name='loadscreen_flush', daemon=True).start()
+
 # Initialise the daemon.
 _daemon = multiprocessing.Process(
     target=_splash_daemon,
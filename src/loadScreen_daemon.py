@@ -11,6 +11,8 @@ from tkinter.font import Font
 from app import img, TK_ROOT
 import tkinter as tk
 import multiprocessing.connection
+import queue
+import threading
 
 import utils
 
@@ -121,9 +123,9 @@ class BaseLoadScreen:
             self.values[stage] = 0
         self.reset_stages()
 
-    def op_step(self, stage: str) -> None:
+    def op_step(self, stage: str, count: int=1) -> None:
         """Increment the specified value."""
-        self.values[stage] += 1
+        self.values[stage] += count
         self.update_stage(stage)
 
     def op_set_length(self, stage: str, num: int) -> None:
@@ -581,14 +583,30 @@ def run_screen(
     TRANSLATION.update(translations)
 
     force_ontop = True
+    # Messages read from the pipe by the reader thread.
+    messages: 'queue.SimpleQueue[Tuple[str, int, tuple]]' = queue.SimpleQueue()
+
+    def read_pipe() -> None:
+        """Wait on the pipe in a thread, then wake up the Tk loop.
+
+        This way updates are shown immediately, without the Tk loop blocking
+        or polling the pipe rapidly.
+        """
+        while True:
+            try:
+                messages.put(PIPE_REC.recv())
+            except EOFError:  # The main process quit.
+                return
+            TK_ROOT.event_generate('<<LoadScreenMessage>>', when='tail')
 
-    def check_queue():
+    def check_queue(e: Optional[tk.Event]=None) -> None:
         """Update stages from the parent process."""
         nonlocal force_ontop
-        had_values = False
-        while PIPE_REC.poll():  # Pop off all the values.
-            had_values = True
-            operation, scr_id, args = PIPE_REC.recv()
+        while True:  # Pop off all the values.
+            try:
+                operation, scr_id, args = messages.get_nowait()
+            except queue.Empty:
+                break
             if operation == 'init':
                 # Create a new loadscreen.
                 is_main, title, stages = args
@@ -608,10 +626,15 @@ def run_screen(
                 except Exception:
                     raise Exception(operation)
 
-        # Continually re-run this function in the TK loop.
-        # If we didn't find anything in the pipe, wait longer.
-        # Otherwise we hog the CPU.
-        TK_ROOT.after(1 if had_values else 200, check_queue)
-    
-    TK_ROOT.after(10, check_queue)
+    def poll_queue() -> None:
+        """Check occasionally as well, in case an event was missed."""
+        check_queue()
+        TK_ROOT.after(200, poll_queue)
+
+    TK_ROOT.bind('<<LoadScreenMessage>>', check_queue)
+    TK_ROOT.after(10, poll_queue)
+    # Start reading once the mainloop runs, so the thread can generate events.
+    TK_ROOT.after(10, lambda: threading.Thread(
+        target=read_pipe, name='loadscreen_pipe', daemon=True,
+    ).start())
     TK_ROOT.mainloop()  # Infinite loop, until the entire process tree quits.
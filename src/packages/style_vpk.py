@@ -1,5 +1,9 @@
+import functools
 import os
 import shutil
+import time
+import zlib
+from typing import Callable, Dict, IO, Optional
 
 import utils
 from packages import (
@@ -9,6 +13,9 @@ from packages import (
 from srctools import FileSystem, VPK
 
 
+# Files are copied into the VPK in blocks of this size.
+CHUNK_SIZE = 1024 * 1024
+
 class StyleVPK(PakObject, has_img=False):
     """A set of VPK files used for styles.
 
@@ -51,10 +58,8 @@ class StyleVPK(PakObject, has_img=False):
         else:
             sel_vpk = None
 
-        try:
-            dest_folder = StyleVPK.clear_vpk_files(exp_data.game)
-        except PermissionError:
-            raise NoVPKExport()  # We can't edit the VPK files - P2 is open..
+        dest_folder = StyleVPK.vpk_folder(exp_data.game)
+        os.makedirs(dest_folder, exist_ok=True)
 
         if exp_data.game.steamID == utils.STEAM_IDS['PORTAL2']:
             # In Portal 2, we make a dlc3 folder - this changes priorities,
@@ -77,32 +82,139 @@ class StyleVPK(PakObject, has_img=False):
                     # It's fine, this will be regenerated automatically
                     pass
 
-        # Generate the VPK.
-        vpk_file = VPK(os.path.join(dest_folder, 'pak01_dir.vpk'), mode='w')
-        with vpk_file:
-            if sel_vpk is not None:
-                for file in sel_vpk.fsys.walk_folder(sel_vpk.dir):
-                    with file.open_bin() as open_file:
-                        vpk_file.add_file(
-                            file.path,
-                            open_file.read(),
-                            sel_vpk.dir,
-                        )
+        # Images may be loading from the package filesystems at the same time.
+        with utils.FSYS_LOCK:
+            StyleVPK._build_vpk(exp_data, sel_vpk, dest_folder)
+
+    @staticmethod
+    def _build_vpk(
+        exp_data: ExportData,
+        sel_vpk: Optional['StyleVPK'],
+        dest_folder: str,
+    ) -> None:
+        """Write the selected VPK and the override files, if changed."""
+        # Filename in the VPK -> function to open the source file.
+        sources = {}  # type: Dict[str, Callable[[], IO[bytes]]]
+        if sel_vpk is not None:
+            for file in sel_vpk.fsys.walk_folder(sel_vpk.dir):
+                name = os.path.relpath(file.path, sel_vpk.dir).replace('\\', '/')
+                sources[name] = file.open_bin
+
+        # Additionally, pack in game/vpk_override/ into the vpk - this allows
+        # users to easily override resources in general.
+
+        override_folder = exp_data.game.abs_path('vpk_override')
+        os.makedirs(override_folder, exist_ok=True)
+
+        # Also write a file to explain what it's for..
+        with open(os.path.join(override_folder, 'BEE2_README.txt'), 'w') as f:
+            f.write(VPK_OVERRIDE_README)
+
+        for dirpath, dirnames, filenames in os.walk(override_folder):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, override_folder).replace('\\', '/')
+                if name == 'BEE2_README.txt':
+                    continue  # Don't add this to the VPK though..
+                sources[name] = functools.partial(open, path, 'rb')
+
+        vpk_path = os.path.join(dest_folder, 'pak01_dir.vpk')
+        if StyleVPK.vpk_matches(vpk_path, sources):
+            LOGGER.info('VPK is unchanged, skipping.')
+            return
+
+        try:
+            StyleVPK.clear_vpk_files(exp_data.game)
+        except PermissionError:
+            raise NoVPKExport()  # We can't edit the VPK files - P2 is open..
+
+        # Generate the VPK. Files are streamed into the first archive, so
+        # only a chunk of each needs to be in memory at once.
+        start = time.perf_counter()
+        total_size = peak_buffer = 0
+        vpk_file = VPK(vpk_path, mode='w')
+        with vpk_file, open(os.path.join(dest_folder, 'pak01_000.vpk'), 'wb') as arch_file:
+            for name, opener in sources.items():
+                info = vpk_file.new_file(name)
+                offset = arch_file.tell()
+                crc = 0
+                with opener() as src:
+                    for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+                        crc = zlib.crc32(chunk, crc)
+                        arch_file.write(chunk)
+                        peak_buffer = max(peak_buffer, len(chunk))
+                size = arch_file.tell() - offset
+                total_size += size
+                info.crc = crc
+                info.start_data = b''
+                info.arch_len = size
+                if size:
+                    info.arch_index = 0
+                    info.offset = offset
+                else:
+                    info.arch_index = None
+                    info.offset = 0
 
-            # Additionally, pack in game/vpk_override/ into the vpk - this allows
-            # users to easily override resources in general.
+        LOGGER.info(
+            'Written {} files to VPK ({} bytes) in {:.2f}s, '
+            'peak of {} bytes buffered.',
+            len(vpk_file), total_size,
+            time.perf_counter() - start, peak_buffer,
+        )
+
+    @staticmethod
+    def vpk_matches(
+        vpk_path: str,
+        sources: Dict[str, Callable[[], IO[bytes]]],
+    ) -> bool:
+        """Check if the existing VPK already contains exactly these files.
 
-            override_folder = exp_data.game.abs_path('vpk_override')
-            os.makedirs(override_folder, exist_ok=True)
+        The sizes and checksums in the directory are compared to the sources,
+        which are read in chunks.
+        """
+        try:
+            vpk_file = VPK(vpk_path, mode='r')
+        except FileNotFoundError:
+            return False
+        except Exception:
+            LOGGER.warning('Could not read existing VPK:', exc_info=True)
+            return False
 
-            # Also write a file to explain what it's for..
-            with open(os.path.join(override_folder, 'BEE2_README.txt'), 'w') as f:
-                f.write(VPK_OVERRIDE_README)
+        if len(vpk_file) != len(sources):
+            return False
 
-            vpk_file.add_folder(override_folder)
-            del vpk_file['BEE2_README.txt']  # Don't add this to the VPK though..
+        arch_sizes = {}  # type: Dict[int, int]
+        for name, opener in sources.items():
+            try:
+                info = vpk_file[name]
+            except KeyError:
+                return False
+            if info.arch_len and info.arch_index is not None:
+                # Check the data is actually present in the archive.
+                try:
+                    arch_size = arch_sizes[info.arch_index]
+                except KeyError:
+                    try:
+                        arch_size = os.path.getsize(os.path.join(
+                            os.path.dirname(vpk_path),
+                            'pak01_{:03}.vpk'.format(info.arch_index),
+                        ))
+                    except FileNotFoundError:
+                        arch_size = -1
+                    arch_sizes[info.arch_index] = arch_size
+                if info.offset + info.arch_len > arch_size:
+                    return False
 
-        LOGGER.info('Written {} files to VPK!', len(vpk_file))
+            crc = size = 0
+            with opener() as src:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+                    crc = zlib.crc32(chunk, crc)
+                    size += len(chunk)
+                    if size > info.size:
+                        return False
+            if size != info.size or crc != info.crc:
+                return False
+        return True
 
     @staticmethod
     def iter_vpk_names():
@@ -124,10 +236,7 @@ class StyleVPK(PakObject, has_img=False):
 
         This returns the path to the game folder.
         """
-        dest_folder = game.abs_path(VPK_FOLDER.get(
-            game.steamID,
-            'portal2_dlc3',
-        ))
+        dest_folder = StyleVPK.vpk_folder(game)
 
         os.makedirs(dest_folder, exist_ok=True)
         try:
@@ -140,4 +249,12 @@ class StyleVPK(PakObject, has_img=False):
                            "or Hammer open?")
             raise
 
-        return dest_folder
\ No newline at end of file
+        return dest_folder
+
+    @staticmethod
+    def vpk_folder(game) -> str:
+        """Return the DLC folder the VPK is written to."""
+        return game.abs_path(VPK_FOLDER.get(
+            game.steamID,
+            'portal2_dlc3',
+        ))
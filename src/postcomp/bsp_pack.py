@@ -0,0 +1,218 @@
+"""Update the BSP's pakfile and entities without rewriting the whole map.
+
+Packing normally reads every existing file out of the pakfile (cubemaps,
+mainly), then builds a brand new zip and saves the entire BSP again. Instead
+we append our files to the existing zip, and then patch just the changed lumps
+into the file on disk. If anything unusual happens we fall back to the
+standard behaviour.
+"""
+import io
+import os
+import struct
+import time
+import zlib
+from typing import Dict, Iterable, List, Set
+from zipfile import ZipFile
+
+from srctools.bsp import BSP, BSP_LUMPS
+from srctools.filesys import FileSystem, VPKFileSystem
+from srctools.packlist import PackList
+import srctools.logger
+
+
+LOGGER = srctools.logger.get_logger(__name__)
+
+# The layout of the BSP header.
+HEADER_1 = struct.Struct('<4si')  # Magic, version.
+HEADER_LUMP = struct.Struct('<3i4s')  # Offset, length, version, fourCC.
+LUMP_COUNT = 64
+BSP_MAGIC = b'VBSP'
+
+# The only lumps we're able to write in place.
+PATCHABLE_LUMPS = (BSP_LUMPS.ENTITIES, BSP_LUMPS.PAKFILE)
+
+
+def snapshot_lumps(bsp: BSP) -> Dict[object, bytes]:
+    """Record the original data in the BSP, to detect other modifications."""
+    snapshot = {
+        lump: bsp.lumps[lump].data
+        for lump in BSP_LUMPS
+        if lump not in PATCHABLE_LUMPS
+    }  # type: Dict[object, bytes]
+    for lump_id, game_lump in getattr(bsp, 'game_lumps', {}).items():
+        snapshot[lump_id] = game_lump.data
+    return snapshot
+
+
+def _allowed_systems(
+    packlist: PackList,
+    whitelist: Iterable[FileSystem],
+    blacklist: Iterable[FileSystem],
+) -> Set[FileSystem]:
+    """Compute the filesystems we pack from, matching PackList.pack_into_zip()."""
+    allowed = {
+        sys for sys, prefix in packlist.fsys.systems
+        if not isinstance(sys, VPKFileSystem)
+    }
+    allowed.update(whitelist)
+    allowed.difference_update(blacklist)
+    return allowed
+
+
+def append_packlist(
+    bsp: BSP,
+    packlist: PackList,
+    pakfile: bytes,
+    *,
+    whitelist: Iterable[FileSystem]=(),
+    blacklist: Iterable[FileSystem]=(),
+) -> List[str]:
+    """Add all the files in the packlist to the end of the pakfile.
+
+    The existing entries are reused as-is, without decompressing them.
+    If a file replaces one already in the zip, we have to rebuild it so
+    PackList.pack_into_zip() is used instead.
+    Returns the names of newly packed files.
+    """
+    allowed = _allowed_systems(packlist, whitelist, blacklist)
+    zip_data = io.BytesIO(pakfile)
+    zipfile = ZipFile(zip_data, 'a')
+    existing = {
+        info.filename.casefold(): info
+        for info in zipfile.infolist()
+    }
+    orig_names = {info.filename for info in existing.values()}
+    added = []  # type: List[str]
+
+    for file in packlist:
+        fname = file.filename.replace('\\', '/')
+        if file.data is not None:
+            data = file.data
+        else:
+            try:
+                sys_file = packlist.fsys[file.filename]
+            except FileNotFoundError:
+                if not file.optional and fname.casefold() not in existing:
+                    LOGGER.warning('WARNING: "{}" not packed!', file.filename)
+                continue
+
+            if fname.casefold().endswith('.bik'):
+                # BINK cannot be packed, always skip.
+                continue
+            if packlist.fsys.get_system(sys_file) not in allowed:
+                continue
+            with sys_file.open_bin() as f:
+                data = f.read()
+
+        try:
+            old_info = existing[fname.casefold()]
+        except KeyError:
+            pass
+        else:
+            if old_info.file_size == len(data) and old_info.CRC == zlib.crc32(data):
+                # Identical, no need to do anything.
+                continue
+            LOGGER.info(
+                '"{}" replaces a file in the pakfile, rebuilding...',
+                fname,
+            )
+            zipfile.close()
+            packlist.pack_into_zip(
+                bsp,
+                ignore_vpk=True,
+                whitelist=whitelist,
+                blacklist=blacklist,
+            )
+            with bsp.packfile() as new_zip:
+                return sorted(set(new_zip.namelist()) - orig_names)
+
+        zipfile.writestr(fname, data)
+        existing[fname.casefold()] = zipfile.getinfo(fname)
+        added.append(fname)
+
+    zipfile.close()
+    bsp.lumps[BSP_LUMPS.PAKFILE].data = zip_data.getvalue()
+    return added
+
+
+def _can_patch(bsp: BSP, snapshot: Dict[object, bytes]) -> bool:
+    """Check that only the lumps we can patch were modified."""
+    if getattr(bsp, '_parsed_lumps', None):
+        # Parsed lumps are only rebuilt by save().
+        return False
+    game_lumps = getattr(bsp, 'game_lumps', {})
+    for key, data in snapshot.items():
+        if isinstance(key, BSP_LUMPS):
+            current = bsp.lumps[key].data
+        else:
+            try:
+                current = game_lumps[key].data
+            except KeyError:
+                return False
+        if current is not data and current != data:
+            LOGGER.debug('Lump {} was modified.', key)
+            return False
+    # Check no game lumps were added.
+    return all(key in snapshot for key in game_lumps)
+
+
+def write_lumps(bsp: BSP, snapshot: Dict[object, bytes]) -> bool:
+    """Write the entities and pakfile lumps into the BSP on disk.
+
+    Each lump is overwritten where it is if it fits, otherwise it's moved to
+    the end of the file. Everything else is left untouched. If other lumps
+    were modified or the file isn't what we expect, False is returned and
+    bsp.save() should be used instead.
+    """
+    if not _can_patch(bsp, snapshot):
+        return False
+
+    start = time.perf_counter()
+    written = 0
+    with open(bsp.filename, 'r+b') as f:
+        magic, _ = HEADER_1.unpack(f.read(HEADER_1.size))
+        if magic != BSP_MAGIC:
+            return False
+        headers = [
+            list(HEADER_LUMP.unpack(f.read(HEADER_LUMP.size)))
+            for _ in range(LUMP_COUNT)
+        ]
+        for lump in PATCHABLE_LUMPS:
+            if headers[lump.value][3] != b'\0\0\0\0':
+                # LZMA compressed lumps, leave those to srctools.
+                return False
+
+        # Do the last lump in the file first, so it can grow in place instead
+        # of being moved after the other.
+        for lump in sorted(
+            PATCHABLE_LUMPS,
+            key=lambda lump: headers[lump.value][0],
+            reverse=True,
+        ):
+            data = bsp.lumps[lump].data
+            offset, length = headers[lump.value][:2]
+            f.seek(0, os.SEEK_END)
+            file_end = f.tell()
+
+            f.seek(offset)
+            if len(data) == length and f.read(length) == data:
+                continue
+
+            if len(data) > length and offset + length != file_end:
+                # Doesn't fit, move to the end of the file.
+                offset = (file_end + 3) & ~3
+            f.seek(offset)
+            f.write(data)
+            written += len(data)
+            if offset + length == file_end:
+                # At the end, so drop any remaining data.
+                f.truncate()
+            headers[lump.value][:2] = offset, len(data)
+            f.seek(HEADER_1.size + HEADER_LUMP.size * lump.value)
+            f.write(HEADER_LUMP.pack(*headers[lump.value]))
+
+    LOGGER.info(
+        'Wrote {} bytes into BSP in {:.2f}s',
+        written, time.perf_counter() - start,
+    )
+    return True
@@ -0,0 +1,236 @@
+"""Caches the dependencies of models and materials between compiles.
+
+Every compile, the packing stage parses the same models and materials from
+Portal 2's VPKs just to find the textures and other files they reference.
+This records the files each resource requires, keyed by the file's cache key
+(a checksum or modification time), so unchanged resources don't need to be
+opened again.
+
+Whether a referenced file exists also affects the result (models search
+each cdmaterials folder, for instance), so the cache is discarded if any of
+the mounted VPKs or the materials/models folders change.
+
+Parsing isn't done on a thread pool - it's pure Python so wouldn't run in
+parallel, and the VPK filesystems aren't safe to read from multiple threads.
+"""
+import hashlib
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+
+from srctools.packlist import PackList, PackFile, FileType
+from srctools.filesys import FileSystemChain, RawFileSystem
+from srctools import AtomicWriter
+import srctools.logger
+
+
+LOGGER = srctools.logger.get_logger(__name__)
+
+# Increment to discard old caches if the format changes.
+CACHE_VERSION = 2
+# The folders in raw filesystems which affect how dependencies resolve.
+FINGERPRINT_FOLDERS = ['materials', 'models']
+
+# Either a pack_file(filename, type, skinset), or pack_soundscript(name).
+PackCall = Union[Tuple[str, FileType, Optional[Set[int]]], str]
+# (type, filename, skinset) -> (system path, cache key), calls made.
+CacheData = Dict[
+    Tuple[FileType, str, Optional[frozenset]],
+    Tuple[Tuple[str, int], List[PackCall]],
+]
+
+
+def _hash_folder(hasher: 'hashlib._Hash', folder: str) -> None:
+    """Add the modification time of a folder and all its subfolders.
+
+    Adding, removing or renaming a file changes the time of its folder.
+    """
+    try:
+        stat = os.stat(folder)
+        entries = list(os.scandir(folder))
+    except OSError:
+        return
+    hasher.update(f'{folder}:{stat.st_mtime_ns}\n'.encode('utf8'))
+    for entry in entries:
+        if entry.is_dir():
+            _hash_folder(hasher, entry.path)
+
+
+def fsys_fingerprint(fsys: FileSystemChain) -> str:
+    """Compute a hash of the mounted filesystems and their contents.
+
+    Filesystems not on disk (the BSP's own pakfile) are skipped, since these
+    are different for every map.
+    """
+    start = time.perf_counter()
+    hasher = hashlib.sha256()
+    for sys, prefix in fsys.systems:
+        path = str(sys.path)
+        if isinstance(sys, RawFileSystem):
+            hasher.update(f'{path}|{prefix}\n'.encode('utf8'))
+            for folder in FINGERPRINT_FOLDERS:
+                _hash_folder(hasher, os.path.join(path, folder))
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        hasher.update(
+            f'{path}|{prefix}:{stat.st_mtime_ns}:{stat.st_size}\n'.encode('utf8')
+        )
+    LOGGER.debug(
+        'Computed filesystem fingerprint in {:.2f}s',
+        time.perf_counter() - start,
+    )
+    return hasher.hexdigest()
+
+
+class CachedPackList(PackList):
+    """A packlist which caches the dependencies of materials and models."""
+    def __init__(self, fsys: FileSystemChain, cache_file: Path) -> None:
+        super().__init__(fsys)
+        self.cache_file = cache_file
+        self._dep_cache = {}  # type: CacheData
+        # Identifies the filesystems the cache was built with.
+        self._fingerprint = ''
+        # The pack calls made by the file currently being analysed.
+        self._recording = None  # type: Optional[List[PackCall]]
+        # Set while inside pack_file(), so we only record direct calls.
+        self._in_call = False
+        self.cache_hits = self.cache_misses = 0
+
+    def load_cache(self) -> None:
+        """Load the cache from disk, if present.
+
+        This should be called once all filesystems have been mounted. If
+        they're different to the last compile, the cache is discarded.
+        """
+        self._fingerprint = fsys_fingerprint(self.fsys)
+        try:
+            with open(self.cache_file, 'rb') as f:
+                version, fingerprint, data = pickle.load(f)
+        except FileNotFoundError:
+            return
+        except Exception:
+            LOGGER.warning('Could not read dependency cache:', exc_info=True)
+            return
+        if version != CACHE_VERSION:
+            return
+        if fingerprint != self._fingerprint:
+            LOGGER.info('Filesystems changed, discarding dependency cache.')
+            return
+        self._dep_cache = data
+
+    def save_cache(self) -> None:
+        """Write the cache back to disk, and report how useful it was."""
+        total = self.cache_hits + self.cache_misses
+        LOGGER.info(
+            'Dependency cache: {} hits, {} misses ({:.0%} hit rate)',
+            self.cache_hits,
+            self.cache_misses,
+            self.cache_hits / total if total else 0,
+        )
+        with AtomicWriter(str(self.cache_file), is_bytes=True) as f:
+            pickle.dump(
+                (CACHE_VERSION, self._fingerprint, self._dep_cache),
+                f, pickle.HIGHEST_PROTOCOL,
+            )
+
+    def pack_file(
+        self,
+        filename: str,
+        data_type: FileType=FileType.GENERIC,
+        data: bytes=None,
+        skinset: Set[int]=None,
+        optional: bool=False,
+    ) -> None:
+        """Queue the given file to be packed, recording it if required."""
+        if self._in_call:
+            return super().pack_file(filename, data_type, data, skinset, optional)
+        if self._recording is not None:
+            self._recording.append((os.fspath(filename), data_type, skinset))
+        self._in_call = True
+        try:
+            super().pack_file(filename, data_type, data, skinset, optional)
+        finally:
+            self._in_call = False
+
+    def pack_soundscript(self, sound_name: str) -> None:
+        """Pack a soundscript, recording it if required."""
+        if self._in_call:
+            return super().pack_soundscript(sound_name)
+        if self._recording is not None:
+            self._recording.append(sound_name)
+        self._in_call = True
+        try:
+            super().pack_soundscript(sound_name)
+        finally:
+            self._in_call = False
+
+    def _analyse_cached(
+        self,
+        file: PackFile,
+        analyse: Callable[[PackFile], None],
+    ) -> None:
+        """Use the cache to find dependencies if possible, or call analyse()."""
+        if file.data is not None or file.optional or self._recording is not None:
+            # Custom data can't be cached, and optional files would need
+            # different calls.
+            return analyse(file)
+        try:
+            sys_file = self.fsys[file.filename]
+        except FileNotFoundError:
+            return analyse(file)
+        cache_key = sys_file.cache_key()
+        if cache_key == -1:
+            return analyse(file)
+
+        skinset = self.skinsets.get(file.filename) if file.type is FileType.MODEL else None
+        key = (
+            file.type,
+            file.filename,
+            frozenset(skinset) if skinset is not None else None,
+        )
+        version = (str(sys_file.sys.path), cache_key)
+
+        try:
+            cached_version, calls = self._dep_cache[key]
+        except KeyError:
+            pass
+        else:
+            if cached_version == version:
+                self.cache_hits += 1
+                for call in calls:
+                    if isinstance(call, str):
+                        self.pack_soundscript(call)
+                    else:
+                        filename, data_type, call_skins = call
+                        self.pack_file(filename, data_type, skinset=call_skins)
+                return
+
+        self.cache_misses += 1
+        self._recording = calls = []
+        try:
+            analyse(file)
+        finally:
+            self._recording = None
+
+        if file.type is FileType.MATERIAL and any(
+            not isinstance(call, str) and call[1] is FileType.MATERIAL
+            for call in calls
+        ):
+            # Patch materials depend on the contents of their parent, so
+            # the key of this file isn't sufficient.
+            self._dep_cache.pop(key, None)
+        else:
+            self._dep_cache[key] = version, calls
+
+    def _get_model_files(self, file: PackFile) -> None:
+        """Find any needed files for a model."""
+        self._analyse_cached(file, super()._get_model_files)
+
+    def _get_material_files(self, file: PackFile) -> None:
+        """Find any needed files for a material."""
+        self._analyse_cached(file, super()._get_material_files)
@@ -324,6 +324,14 @@ class Antline:
         )
 
 
+JoinKey = Tuple[str, int, int, int]
+
+
+def join_key(over_name: str, point: Vec) -> JoinKey:
+    """Compute the key used to match up antline endpoints."""
+    return over_name, round(point.x), round(point.y), round(point.z)
+
+
 def parse_antlines(vmf: VMF) -> Tuple[
     Dict[str, List[Antline]],
     Dict[int, List[Segment]]
@@ -345,8 +353,9 @@ def parse_antlines(vmf: VMF) -> Tuple[
 
     # Points on antlines where two can connect. For corners that's each side,
     # for straight it's each end. Combine that with the targetname
-    # so we only join related antlines.
-    join_points = {}  # type: Dict[Tuple[str, float, float, float], Segment]
+    # so we only join related antlines. These are snapped to integers, so
+    # float errors don't matter.
+    join_points = {}  # type: Dict[JoinKey, Segment]
 
     mat_straight = consts.Antlines.STRAIGHT
     mat_corner = consts.Antlines.CORNER
@@ -414,7 +423,7 @@ def parse_antlines(vmf: VMF) -> Tuple[
             # Lookup the point to see if we've already checked it.
             # If not, write us into that spot.
             neighbour = join_points.setdefault(
-                (over_name, point.x, point.y, point.z),
+                join_key(over_name, point),
                 seg,
             )
             if neighbour is seg:
@@ -440,14 +449,16 @@ def parse_antlines(vmf: VMF) -> Tuple[
 
         if len(neighbours) != 1:
             continue
-        # Found a start point!
+        # Found a start point! Walk along the line, keeping the order.
         segments = [segment]
+        seen = {segment}
 
         for segment in segments:
             neighbours = overlay_joins.pop(segment)
             # Except KeyError: this segment's already done??
             for neighbour in neighbours:
-                if neighbour not in segments:
+                if neighbour not in seen:
+                    seen.add(neighbour)
                     segments.append(neighbour)
 
         antlines.setdefault(over_name, []).append(Antline(over_name, segments))
@@ -459,7 +470,7 @@ def parse_antlines(vmf: VMF) -> Tuple[
 def fix_single_straight(
     seg: Segment,
     over_name: str,
-    join_points: Dict[Tuple[str, float, float, float], Segment],
+    join_points: Dict[JoinKey, Segment],
     overlay_joins: Dict[Segment, Set[Segment]],
 ) -> None:
     """Figure out the correct rotation for 1-long straight antlines."""
@@ -477,7 +488,7 @@ def fix_single_straight(
     ]:
         pos = center + off
         try:
-            neigh = join_points[over_name, pos.x, pos.y, pos.z]
+            neigh = join_points[join_key(over_name, pos)]
         except KeyError:
             continue
 
@@ -498,7 +509,7 @@ def fix_single_straight(
             # The other side is also present. Only override if we are on both
             # sides.
             opposite = center - off
-            if (over_name, opposite.x, opposite.y, opposite.z) in join_points:
+            if join_key(over_name, opposite) in join_points:
                 seg.start = off_min
                 seg.end = off_max
         # Else: Both equal, we're fine.
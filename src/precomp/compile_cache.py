@@ -0,0 +1,135 @@
+"""Detects when a map is recompiled without any changes.
+
+Designers often recompile the same puzzle repeatedly. All the processing done
+by the compiler is deterministic given the PeTI map and the exported configs,
+so if none of those have changed we can skip straight to VBSP, reusing the
+previously generated map in styled/.
+
+The key is stored alongside the styled map, along with a hash of the styled
+map itself in case it has been modified or only partially written.
+"""
+import hashlib
+import os
+import sys
+from configparser import ConfigParser
+from typing import List, Optional
+
+from srctools import Property, AtomicWriter, KeyValError
+import srctools.logger
+
+import utils
+
+
+LOGGER = srctools.logger.get_logger(__name__)
+
+# Increment to invalidate all existing caches.
+CACHE_VERSION = '1'
+
+# Files in bin/ read by the compiler, which affect the output.
+CONFIG_FILES = [
+    'bee2/vbsp_config.cfg',
+    'bee2/editor.bin',
+    'bee2/pack_list.cfg',
+    'bee2/templates.vmf',
+    'bee2/voice.cfg',
+    'bee2/mid_voice.cfg',
+    'bee2/resp_voice.cfg',
+]
+# Config sections written to by the compiler itself, which don't affect it.
+IGNORED_SECTIONS = {'counts'}
+
+
+def _cache_filename(styled_path: str) -> str:
+    """The location of the cache file for a map."""
+    return os.path.splitext(styled_path)[0] + '.bee2_cache'
+
+
+def _hash_file(hasher: 'hashlib._Hash', filename: str) -> None:
+    """Add a file's contents to the hash."""
+    hasher.update(filename.encode('utf8'))
+    try:
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                hasher.update(chunk)
+    except FileNotFoundError:
+        hasher.update(b'<missing>')
+
+
+def _hash_config(hasher: 'hashlib._Hash', config: ConfigParser) -> None:
+    """Add the relevant parts of a config to the hash."""
+    for section in sorted(config.sections()):
+        if section.casefold() in IGNORED_SECTIONS:
+            continue
+        hasher.update(f'[{section}]'.encode('utf8'))
+        for key, value in sorted(config.items(section)):
+            hasher.update(f'{key}={value}\n'.encode('utf8'))
+
+
+def calc_key(map_path: str, args: List[str], configs: List[ConfigParser]) -> str:
+    """Compute a hash of everything which affects the compiled output."""
+    hasher = hashlib.sha256()
+    hasher.update(CACHE_VERSION.encode('ascii'))
+    hasher.update(utils.BEE_VERSION.encode('utf8'))
+    if utils.FROZEN:
+        # Different compilers could produce different output.
+        stat = os.stat(sys.executable)
+        hasher.update(f'{stat.st_mtime_ns}:{stat.st_size}'.encode('ascii'))
+    hasher.update('\0'.join(args).encode('utf8'))
+    _hash_file(hasher, map_path)
+    for filename in CONFIG_FILES:
+        _hash_file(hasher, filename)
+    for config in configs:
+        _hash_config(hasher, config)
+    return hasher.hexdigest()
+
+
+def _hash_output(styled_path: str) -> Optional[str]:
+    """Hash the generated map."""
+    hasher = hashlib.sha256()
+    try:
+        with open(styled_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                hasher.update(chunk)
+    except FileNotFoundError:
+        return None
+    return hasher.hexdigest()
+
+
+def is_unchanged(styled_path: str, key: str) -> bool:
+    """Check if the previous compile of this map can be reused."""
+    try:
+        with open(_cache_filename(styled_path)) as f:
+            props = Property.parse(f, _cache_filename(styled_path))
+    except FileNotFoundError:
+        return False
+    except KeyValError:
+        LOGGER.warning('Compile cache is corrupt!', exc_info=True)
+        return False
+
+    if props['version', ''] != CACHE_VERSION or props['key', ''] != key:
+        return False
+    output_hash = _hash_output(styled_path)
+    return output_hash is not None and output_hash == props['output', '']
+
+
+def invalidate(styled_path: str) -> None:
+    """Remove the cache, before we regenerate the map."""
+    try:
+        os.remove(_cache_filename(styled_path))
+    except FileNotFoundError:
+        pass
+
+
+def store(styled_path: str, key: str) -> None:
+    """Record the key used to generate this map."""
+    output_hash = _hash_output(styled_path)
+    if output_hash is None:
+        return
+    props = Property(None, [
+        Property('version', CACHE_VERSION),
+        Property('key', key),
+        Property('output', output_hash),
+    ])
+    with AtomicWriter(_cache_filename(styled_path)) as f:
+        for line in props.export():
+            f.write(line)
@@ -27,6 +27,7 @@ import io
 import itertools
 import math
 import random
+import time
 from collections import defaultdict
 from decimal import Decimal
 from enum import Enum
@@ -58,10 +59,47 @@ LOGGER = srctools.logger.get_logger(__name__, alias='cond.core')
 GLOBAL_INSTANCES = set()  # type: Set[str]
 ALL_INST = set()  # type: Set[str]
 
+LookupT = TypeVar('LookupT')
+# The condition modules which have been imported.
+_IMPORTED_MODULES = set()  # type: Set[str]
+
+
+class _LazyLookup(Dict[str, LookupT]):
+    """A dict of condition functions, which imports their module when needed.
+
+    When frozen, a manifest is generated which records which module defines
+    each name. If the name is missing, that module is imported - registering
+    the function.
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self.manifest = {}  # type: Dict[str, str]
+
+    def __missing__(self, name: str) -> LookupT:
+        try:
+            module = self.manifest[name]
+        except KeyError:
+            raise KeyError(name) from None
+        _import_module(module)
+        # Only forget it once the import succeeded, so errors are repeated.
+        del self.manifest[name]
+        return dict.__getitem__(self, name)
+
+    def __contains__(self, name: object) -> bool:
+        return dict.__contains__(self, name) or name in self.manifest
+
+    def get(self, name: str, default: Any=None) -> Any:
+        """Return the function, or default if it doesn't exist."""
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+
 conditions: List['Condition'] = []
-FLAG_LOOKUP = {}  # type: Dict[str, Callable[[srctools.VMF, Entity, Property], bool]]
-RESULT_LOOKUP = {}  # type: Dict[str, Callable[[srctools.VMF, Entity, Property], object]]
-RESULT_SETUP = {}  # type: Dict[str, Callable[[srctools.VMF, Property], object]]
+FLAG_LOOKUP = _LazyLookup()  # type: _LazyLookup[Callable[[srctools.VMF, Entity, Property], bool]]
+RESULT_LOOKUP = _LazyLookup()  # type: _LazyLookup[Callable[[srctools.VMF, Entity, Property], object]]
+RESULT_SETUP = _LazyLookup()  # type: _LazyLookup[Callable[[srctools.VMF, Property], object]]
 
 # Used to dump a list of the flags, results, meta-conditions
 ALL_FLAGS = []  # type: List[Tuple[str, Iterable[str], Callable[[srctools.VMF, Entity, Property], bool]]]
@@ -543,6 +581,7 @@ def check_all(vmf: VMF) -> None:
     LOGGER.info('instanceLocs cache: {}', instanceLocs.resolve.cache_info())
     LOGGER.info('Style Vars: {}', dict(vbsp.settings['style_vars']))
     LOGGER.info('Global instances: {}', GLOBAL_INSTANCES)
+    LOGGER.info('Condition modules used: {}', sorted(_IMPORTED_MODULES))
 
 
 def check_flag(vmf: VMF, flag: Property, inst: Entity) -> bool:
@@ -570,13 +609,54 @@ def check_flag(vmf: VMF, flag: Property, inst: Entity) -> bool:
     return res == desired_result
 
 
-def import_conditions() -> None:
+def _import_module(module: str) -> None:
+    """Import a condition module, logging the time this takes."""
+    import importlib
+    if module in _IMPORTED_MODULES:
+        return
+    start = time.perf_counter()
+    # Import the module, then discard it. The module will run add_flag
+    # or add_result() functions, which save the functions into our dicts.
+    # We don't need a reference to the modules themselves.
+    importlib.import_module(module)
+    _IMPORTED_MODULES.add(module)
+    LOGGER.debug(
+        'Imported {} in {:.1f}ms',
+        module, (time.perf_counter() - start) * 1000,
+    )
+
+
+def import_conditions(lazy: bool=True) -> None:
     """Import all the components of the conditions package.
 
-    This ensures everything gets registered.
+    This ensures everything gets registered. If lazy is set and the manifest
+    generated when freezing is present, only modules which always need to run
+    are imported. The others will be imported when their flags or results
+    are first looked up.
     """
-    import importlib
     import pkgutil
+    start = time.perf_counter()
+
+    if lazy:
+        try:
+            import COND_MANIFEST  # type: ignore
+        except ImportError:
+            # Running from source, just import everything.
+            pass
+        else:
+            FLAG_LOOKUP.manifest.update(COND_MANIFEST.FLAGS)
+            RESULT_LOOKUP.manifest.update(COND_MANIFEST.RESULTS)
+            RESULT_SETUP.manifest.update(COND_MANIFEST.RESULT_SETUP)
+            for module in COND_MANIFEST.ALWAYS:
+                _import_module(module)
+            LOGGER.info(
+                'Imported {} conditions modules in {:.1f}ms, '
+                'others will be imported when used.',
+                len(_IMPORTED_MODULES),
+                (time.perf_counter() - start) * 1000,
+            )
+            return
+
     # Find the modules in the conditions package.
     # PyInstaller messes this up a bit.
 
@@ -600,12 +680,15 @@ def import_conditions() -> None:
         ]
 
     for module in modules:
-        # Import the module, then discard it. The module will run add_flag
-        # or add_result() functions, which save the functions into our dicts.
-        # We don't need a reference to the modules themselves.
-        LOGGER.debug('Importing {} ...', module)
-        importlib.import_module(module)
-    LOGGER.info('Imported all conditions modules!')
+        _import_module(module)
+    # Everything's imported now.
+    FLAG_LOOKUP.manifest.clear()
+    RESULT_LOOKUP.manifest.clear()
+    RESULT_SETUP.manifest.clear()
+    LOGGER.info(
+        'Imported all conditions modules in {:.1f}ms!',
+        (time.perf_counter() - start) * 1000,
+    )
 
 
 DOC_MARKER = '''<!-- Only edit above this line. This is generated from text in the compiler code. -->'''
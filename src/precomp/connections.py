@@ -680,14 +680,25 @@ def res_change_io_type(inst: Entity, res: Property) -> None:
 
 
 def do_item_optimisation(vmf: VMF) -> None:
-    """Optimise redundant logic items."""
+    """Optimise redundant logic items.
+
+    Collapsing an item only moves its outputs onto the item feeding it, so it
+    never changes the number of inputs of any other item. That means a single
+    pass over the logic items finds every item that can be removed, including
+    chains of single-input gates.
+    """
     needs_global_toggle = False
+    removed_dead = removed_single = 0
+    conn_count = sum(len(item.outputs) for item in ITEMS.values())
 
-    for item in list(ITEMS.values()):
+    # Collect the candidates first, since we're removing from ITEMS.
+    logic_items = [
+        item for item in ITEMS.values()
         # We can't remove items that have functionality, or don't have IO.
-        if item.config is None or not item.config.input_type.is_logic:
-            continue
+        if item.config is not None and item.config.input_type.is_logic
+    ]
 
+    for item in logic_items:
         prim_inverted = conv_bool(conditions.resolve_value(
             item.inst,
             item.config.invert_var,
@@ -712,10 +723,21 @@ def do_item_optimisation(vmf: VMF) -> None:
 
             del ITEMS[item.name]
             item.inst.remove()
+            removed_dead += 1
         elif inp_count == 1:
             # Only one input, so AND or OR are useless.
             # Transfer input item to point to the output(s).
             collapse_item(item)
+            removed_single += 1
+
+    LOGGER.info(
+        'Optimised away {} logic items ({} without inputs, {} with a single '
+        'input), saving {} connections.',
+        removed_dead + removed_single,
+        removed_dead,
+        removed_single,
+        conn_count - sum(len(item.outputs) for item in ITEMS.values()),
+    )
 
     # The antlines need a toggle entity, otherwise they'll copy random other
     # overlays.
@@ -16,6 +16,7 @@ from .texturing import Portalable, GenCat, TileSize
 from .tiling import TileType
 from . import tiling, texturing, options
 import consts
+import compile_server
 
 from typing import (
     Iterable, Union, Callable,
@@ -409,11 +410,17 @@ def parse_temp_name(name) -> Tuple[str, Set[str]]:
         return name.casefold(), set()
 
 
+@compile_server.warm_file(TEMPLATE_LOCATION)
+def _parse_template_vmf(filename: str) -> VMF:
+    """Parse the template VMF."""
+    with open(filename) as file:
+        props = Property.parse(file, filename)
+    return srctools.VMF.parse(props, preserve_ids=True)
+
+
 def load_templates() -> None:
     """Load in the template file, used for import_template()."""
-    with open(TEMPLATE_LOCATION) as file:
-        props = Property.parse(file, TEMPLATE_LOCATION)
-    vmf = srctools.VMF.parse(props, preserve_ids=True)
+    vmf = _parse_template_vmf()
 
     def make_subdict() -> Dict[str, list]:
         return defaultdict(list)
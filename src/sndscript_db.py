@@ -0,0 +1,173 @@
+"""A pre-parsed database of the soundscripts in scripts/bee2_snd/.
+
+The VRAD hook needs to know the sounds defined in our soundscripts, so it
+can pack the scripts and their sounds when used. These are parsed when
+exporting, and stored in a pickle alongside the compiler. Each script is
+keyed by its modification time and size, so the compiler can tell if it was
+changed afterwards and only reparse those.
+"""
+import os
+import pickle
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from srctools import Property, AtomicWriter, KeyValError
+from srctools.filesys import FileSystemChain, RawFileSystem, File
+from srctools.packlist import PackList, SoundScriptMode
+from srctools.sndscript import Sound, SND_CHARS
+import srctools.logger
+
+
+LOGGER = srctools.logger.get_logger(__name__)
+
+# Location of the database, relative to the game folder.
+DB_FILENAME = 'bin/bee2/sndscript_db.bin'
+# The folder containing the soundscripts, relative to each search path.
+SCRIPT_FOLDER = 'scripts/bee2_snd/'
+# Increment to discard old databases if the format changes.
+DB_VERSION = 1
+
+# Sound name -> list of sound files.
+Sounds = Dict[str, List[str]]
+# Normcased absolute path -> (mtime, size), sounds.
+SoundDatabase = Dict[str, Tuple[Tuple[int, int], Sounds]]
+
+
+def _file_key(filename: str) -> Optional[Tuple[int, int]]:
+    """Return the stat info used to determine if a file changed."""
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def parse_script(filename: str) -> Sounds:
+    """Parse a soundscript, returning the sounds it defines.
+
+    KeyValError or ValueError is raised if it's invalid.
+    """
+    with open(filename, encoding='utf8') as f:
+        props = Property.parse(f, filename, allow_escapes=False)
+    return {
+        name: [
+            snd.lstrip(SND_CHARS).replace('\\', '/')
+            for snd in sound.sounds
+        ]
+        for name, sound in Sound.parse(props).items()
+    }
+
+
+def load(db_file: Union[str, Path]) -> SoundDatabase:
+    """Load the database, or return an empty one if not present."""
+    try:
+        with open(db_file, 'rb') as f:
+            version, data = pickle.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception:
+        LOGGER.warning('Could not read soundscript database:', exc_info=True)
+        return {}
+    if version != DB_VERSION:
+        return {}
+    return data
+
+
+def save(db_file: Union[str, Path], database: SoundDatabase) -> None:
+    """Write the database back to disk."""
+    with AtomicWriter(str(db_file), is_bytes=True) as f:
+        pickle.dump((DB_VERSION, database), f, pickle.HIGHEST_PROTOCOL)
+
+
+def _lookup(database: SoundDatabase, filename: str) -> Optional[Sounds]:
+    """Find the sounds for a script, parsing it if required.
+
+    If it can't be parsed, None is returned.
+    """
+    key = _file_key(filename)
+    if key is None:
+        return None
+    path = os.path.normcase(os.path.abspath(filename))
+    try:
+        cache_key, sounds = database[path]
+    except KeyError:
+        pass
+    else:
+        if cache_key == key:
+            return sounds
+    try:
+        sounds = parse_script(filename)
+    except (KeyValError, ValueError):
+        database.pop(path, None)
+        return None
+    database[path] = key, sounds
+    return sounds
+
+
+def update(db_file: Union[str, Path], search_paths: Iterable[str]) -> None:
+    """At export time, parse all the soundscripts in these folders."""
+    old_db = load(db_file)
+    database = {}  # type: SoundDatabase
+    for search_path in search_paths:
+        folder = os.path.join(search_path, SCRIPT_FOLDER)
+        for dirpath, dirnames, filenames in os.walk(folder):
+            for name in filenames:
+                if not name.endswith('.txt'):
+                    continue
+                filename = os.path.join(dirpath, name)
+                path = os.path.normcase(os.path.abspath(filename))
+                if path in old_db:
+                    database[path] = old_db[path]
+                if _lookup(database, filename) is None:
+                    LOGGER.warning(
+                        'Soundscript "{}" could not be parsed!',
+                        filename,
+                    )
+    if database != old_db:
+        LOGGER.info('Indexed {} soundscripts.', len(database))
+        save(db_file, database)
+
+
+def load_into_packlist(
+    packlist: PackList,
+    fsys: FileSystemChain,
+    db_file: Union[str, Path],
+) -> None:
+    """In the compiler, register all our soundscripts with the packlist.
+
+    Scripts matching the database aren't reparsed. Scripts in VPKs and
+    similar are loaded the normal way.
+    """
+    database = load(db_file)
+    orig_db = database.copy()
+    hits = 0
+    file: File
+    for file in fsys.walk_folder(SCRIPT_FOLDER):
+        if not file.path.endswith('.txt'):
+            continue
+        file_sys = file.sys
+        if not isinstance(file_sys, RawFileSystem):
+            packlist.load_soundscript(file, always_include=False)
+            continue
+        filename = os.path.join(file_sys.path, file.path)
+        try:
+            cache_key, _ = database[os.path.normcase(os.path.abspath(filename))]
+        except KeyError:
+            pass
+        else:
+            if cache_key == _file_key(filename):
+                hits += 1
+        sounds = _lookup(database, filename)
+        if sounds is None:
+            # Let the packlist produce the appropriate warning.
+            packlist.load_soundscript(file, always_include=False)
+            continue
+        # Equivalent to what PackList.load_soundscript() does.
+        if packlist.soundscript_files.get(file.path) is not SoundScriptMode.EXCLUDE:
+            packlist.soundscript_files[file.path] = SoundScriptMode.UNKNOWN
+        for name, snd_files in sounds.items():
+            packlist.soundscripts[name] = file.path, snd_files
+
+    LOGGER.info('Soundscript database: {} scripts reused.', hits)
+    if database != orig_db:
+        save(db_file, database)
@@ -6,6 +6,7 @@ import os
 import stat
 import shutil
 import sys
+import threading
 from pathlib import Path
 from enum import Enum
 from types import TracebackType
@@ -66,6 +67,10 @@ STEAM_IDS = {
     # 211480: 'In Motion'
 }
 
+# The package filesystems are reference counted, so one thread could close a
+# zip while another reads from it. Hold this while using them.
+FSYS_LOCK = threading.RLock()
+
 # Appropriate locations to store config options for each OS.
 if WIN:
     _SETTINGS_ROOT = Path(os.environ['APPDATA'])
@@ -39,9 +39,11 @@ from precomp import (
     fizzler,
     voice_line,
     music,
+    compile_cache,
 )
 import consts
 import editoritems
+import compile_server
 
 from typing import Any, Dict, Tuple, List, Set, Iterable
 
@@ -98,11 +100,31 @@ IGNORED_OVERLAYS = set()
 PRESET_CLUMPS = []  # Additional clumps set by conditions, for certain areas.
 
 
+@compile_server.warm_file('bee2/vbsp_config.cfg')
+def _parse_vbsp_config(filename: str) -> Property:
+    """Parse the main config file."""
+    with open(filename, encoding='utf8') as config:
+        return Property.parse(config, filename)
+
+
+@compile_server.warm_file('bee2/editor.bin')
+def _parse_editor_items(filename: str) -> List[editoritems.Item]:
+    """Load the pickled item configuration."""
+    with open(filename, 'rb') as inst:
+        return pickle.load(inst)
+
+
+@compile_server.warm_file('bee2/pack_list.cfg')
+def _parse_packlists(filename: str) -> Property:
+    """Parse the packlists file."""
+    with open(filename) as f:
+        return Property.parse(f, filename)
+
+
 def load_settings() -> Tuple[antlines.AntType, antlines.AntType, Dict[str, editoritems.Item]]:
     """Load in all our settings from vbsp_config."""
     try:
-        with open("bee2/vbsp_config.cfg", encoding='utf8') as config:
-            conf = Property.parse(config, 'bee2/vbsp_config.cfg')
+        conf = _parse_vbsp_config()
     except FileNotFoundError:
         LOGGER.warning('Error: No vbsp_config file!')
         conf = Property(None, [])
@@ -146,21 +168,15 @@ def load_settings() -> Tuple[antlines.AntType, antlines.AntType, Dict[str, edito
     # Load a copy of the item configuration.
     id_to_item: Dict[str, editoritems.Item] = {}
     item: editoritems.Item
-    with open('bee2/editor.bin', 'rb') as inst:
-        for item in pickle.load(inst):
-            id_to_item[item.id.casefold()] = item
+    for item in _parse_editor_items():
+        id_to_item[item.id.casefold()] = item
 
     # Send that data to the relevant modules.
     instanceLocs.load_conf(id_to_item.values())
     connections.read_configs(id_to_item.values())
 
     # Parse packlist data.
-    with open('bee2/pack_list.cfg') as f:
-        props = Property.parse(
-            f,
-            'bee2/pack_list.cfg'
-        )
-    packing.parse_packlists(props)
+    packing.parse_packlists(_parse_packlists())
 
     # Parse all the conditions.
     for cond in conf.find_all('conditions', 'condition'):
@@ -1760,12 +1776,14 @@ def main() -> None:
     global MAP_RAND_SEED
     LOGGER.info("BEE{} VBSP hook initiallised.", utils.BEE_VERSION)
 
-    conditions.import_conditions()  # Import all the conditions and
-    # register them.
+    # Import the conditions and register them. Those not used by every map
+    # are imported when first used.
+    conditions.import_conditions()
 
     if 'BEE2_WIKI_OPT_LOC' in os.environ:
         # Special override - generate docs for the BEE2 wiki.
         LOGGER.info('Writing Wiki text...')
+        conditions.import_conditions(lazy=False)
         with open(os.environ['BEE2_WIKI_OPT_LOC'], 'w') as f:
             options.dump_info(f)
         with open(os.environ['BEE2_WIKI_COND_LOC'], 'a+') as f:
@@ -1856,6 +1874,22 @@ def main() -> None:
     else:
         LOGGER.info("PeTI map detected!")
 
+        cache_key = compile_cache.calc_key(
+            path,
+            new_args,
+            [BEE2_config, options.ITEM_CONFIG],
+        )
+        if compile_cache.is_unchanged(new_path, cache_key):
+            LOGGER.info('Map unchanged since last compile, skipping to VBSP!')
+            run_vbsp(
+                vbsp_args=new_args,
+                path=path,
+                new_path=new_path,
+            )
+            LOGGER.info("BEE2 VBSP hook finished!")
+            return
+        compile_cache.invalidate(new_path)
+
         LOGGER.info("Loading settings...")
         ant_floor, ant_wall, id_to_item = load_settings()
 
@@ -1918,6 +1952,7 @@ def main() -> None:
         vmf.spawn['BEE2_is_preview'] = IS_PREVIEW
 
         save(vmf, new_path)
+        compile_cache.store(new_path, cache_key)
         run_vbsp(
             vbsp_args=new_args,
             path=path,
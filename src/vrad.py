@@ -8,26 +8,28 @@ from srctools.logger import init_logging
 LOGGER = init_logging('bee2/vrad.log')
 
 import os
-import shutil
 import sys
+import zlib
 import importlib
 import pkgutil
 from io import BytesIO
-from zipfile import ZipFile
-from typing import List, Set
+from zipfile import ZipFile, ZipInfo
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Set
 from pathlib import Path
 
 import srctools.run
 from srctools import FGD
 from srctools.bsp import BSP, BSP_LUMPS
 from srctools.filesys import RawFileSystem, ZipFileSystem, FileSystem
-from srctools.packlist import PackList
 from srctools.game import find_gameinfo
 from srctools.bsp_transform import run_transformations
 from srctools.scripts.plugin import PluginFinder, Source as PluginSource
 
 from BEE2_config import ConfigFile
-from postcomp import music, screenshot
+import sndscript_db
+from postcomp import music, screenshot, bsp_pack
+from postcomp.dep_cache import CachedPackList
 # Load our BSP transforms.
 # noinspection PyUnresolvedReferences
 from postcomp import (
@@ -37,12 +39,19 @@ from postcomp import (
 import utils
 
 
+_TRANSFORMS_LOADED = False
+
+
 def load_transforms() -> None:
     """Load all the BSP transforms.
 
     We need to do this differently when frozen, since they're embedded in our
     executable.
+    This may be called multiple times if the compile server is used.
     """
+    global _TRANSFORMS_LOADED
+    if _TRANSFORMS_LOADED:
+        return
     # Find the modules in the conditions package.
     # PyInstaller messes this up a bit.
     if utils.FROZEN:
@@ -72,36 +81,101 @@ def load_transforms() -> None:
         ])
         sys.meta_path.append(finder)
         finder.load_all()
+    _TRANSFORMS_LOADED = True
+
+
+def _dump_file(zipfile: ZipFile, info: ZipInfo, path: str) -> bool:
+    """Extract a single file, if it differs from the one already present.
+
+    Returns whether the file was written.
+    """
+    try:
+        if os.path.getsize(path) == info.file_size:
+            with open(path, 'rb') as f:
+                if zlib.crc32(f.read()) == info.CRC:
+                    return False
+    except FileNotFoundError:
+        pass
+    data = zipfile.read(info)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+
+def _member_path(dump_folder: str, filename: str) -> Optional[str]:
+    """Compute where a packed file is dumped to.
+
+    Like ZipFile.extract(), drive letters, leading slashes and ".." parts are
+    discarded so files can't be written outside the folder. None is returned
+    if nothing is left.
+    """
+    filename = filename.replace('/', os.path.sep)
+    if os.path.altsep:
+        filename = filename.replace(os.path.altsep, os.path.sep)
+    filename = os.path.splitdrive(filename)[1]
+    filename = os.path.sep.join(
+        part for part in filename.split(os.path.sep)
+        if part not in ('', os.path.curdir, os.path.pardir)
+    )
+    if not filename:
+        return None
+    return os.path.join(dump_folder, filename)
 
 
 def dump_files(bsp: BSP, dump_folder: str) -> None:
     """Dump packed files to a location.
+
+    Only files which changed since the last dump are written, and files
+    no longer packed are removed.
     """
     dump_folder = os.path.abspath(dump_folder)
     
     LOGGER.info('Dumping packed files to "{}"...', dump_folder)
 
-    # Delete files in the folder, but don't delete the folder itself.
-    try:
-        files = os.listdir(dump_folder)
-    except FileNotFoundError:
+    if not os.path.isdir(dump_folder):
         return
 
-    for name in files:
-        name = os.path.join(dump_folder, name)
-        if os.path.isdir(name):
+    # Normcased path -> actual path, for everything currently present.
+    stale = {}
+    for dirpath, dirnames, filenames in os.walk(dump_folder):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            stale[os.path.normcase(path)] = path
+
+    with bsp.packfile() as zipfile:
+        with ThreadPoolExecutor() as pool:
+            futures = []
+            for info in zipfile.infolist():
+                if info.is_dir():
+                    continue
+                path = _member_path(dump_folder, info.filename)
+                if path is None:
+                    LOGGER.warning('Invalid packed filename "{}"!', info.filename)
+                    continue
+                stale.pop(os.path.normcase(path), None)
+                futures.append(pool.submit(_dump_file, zipfile, info, path))
+            written = sum(fut.result() for fut in futures)
+
+    for path in stale.values():
+        try:
+            os.remove(path)
+        except OSError:
+            # It's possible to fail here, if the file is open elsewhere.
+            # If so, just leave it.
+            pass
+    # Then clean up any now-empty folders.
+    for dirpath, dirnames, filenames in os.walk(dump_folder, topdown=False):
+        if dirpath != dump_folder and not os.listdir(dirpath):
             try:
-                shutil.rmtree(name)
+                os.rmdir(dirpath)
             except OSError:
-                # It's possible to fail here, if the window is open elsewhere.
-                # If so, just skip removal and fill the folder.
                 pass
-        else:
-            os.remove(name)
 
-    with bsp.packfile() as zipfile:
-        for zipinfo in zipfile.infolist():
-            zipfile.extract(zipinfo, dump_folder)
+    LOGGER.info(
+        'Dumped {}/{} files, removed {} stale files.',
+        written, len(futures), len(stale),
+    )
 
 
 def run_vrad(args: List[str]) -> None:
@@ -180,6 +254,8 @@ def main(argv: List[str]) -> None:
 
     LOGGER.info('Reading BSP')
     bsp_file = BSP(path)
+    # Used to check if we can write our changes back in-place.
+    orig_lumps = bsp_pack.snapshot_lumps(bsp_file)
 
     bsp_ents = bsp_file.read_ent_data()
 
@@ -219,9 +295,8 @@ def main(argv: List[str]) -> None:
             fsys.systems.remove(child_sys)
             fsys.systems.insert(0, child_sys)
 
-    zip_data = BytesIO()
-    zip_data.write(bsp_file.get_lump(BSP_LUMPS.PAKFILE))
-    zipfile = ZipFile(zip_data)
+    orig_pakfile = bsp_file.get_lump(BSP_LUMPS.PAKFILE)
+    zipfile = ZipFile(BytesIO(orig_pakfile))
 
     # Mount the existing packfile, so the cubemap files are recognised.
     fsys.add_sys(ZipFileSystem('<BSP pakfile>', zipfile))
@@ -237,7 +312,8 @@ def main(argv: List[str]) -> None:
     LOGGER.info('Reading our FGD files...')
     fgd = FGD.engine_dbase()
 
-    packlist = PackList(fsys)
+    packlist = CachedPackList(fsys, root_folder / 'bin/bee2/dependency_cache.bin')
+    packlist.load_cache()
     packlist.load_soundscript_manifest(
         str(root_folder / 'bin/bee2/sndscript_cache.vdf')
     )
@@ -246,9 +322,11 @@ def main(argv: List[str]) -> None:
 
     # We need to add all soundscripts in scripts/bee2_snd/
     # This way we can pack those, if required.
-    for soundscript in fsys.walk_folder('scripts/bee2_snd/'):
-        if soundscript.path.endswith('.txt'):
-            packlist.load_soundscript(soundscript, always_include=False)
+    # These were parsed during export, so use that copy.
+    sndscript_db.load_into_packlist(
+        packlist, fsys,
+        root_folder / sndscript_db.DB_FILENAME,
+    )
 
     if is_peti:
         LOGGER.info('Checking for music:')
@@ -261,6 +339,7 @@ def main(argv: List[str]) -> None:
     packlist.pack_from_bsp(bsp_file)
     packlist.pack_fgd(bsp_ents, fgd)
     packlist.eval_dependencies()
+    packlist.save_cache()
     LOGGER.info('Done!')
 
     packlist.write_manifest()
@@ -281,22 +360,16 @@ def main(argv: List[str]) -> None:
                 pack_blacklist.add(child_sys)
 
     if '-no_pack' not in args:
-        # Cubemap files packed into the map already.
-        with bsp_file.packfile() as zipfile:
-            existing = set(zipfile.namelist())
-
         LOGGER.info('Writing to BSP...')
-        packlist.pack_into_zip(
+        # Add onto the cubemap files packed into the map already.
+        packed = bsp_pack.append_packlist(
             bsp_file,
-            ignore_vpk=True,
+            packlist,
+            orig_pakfile,
             whitelist=pack_whitelist,
             blacklist=pack_blacklist,
         )
-
-        with bsp_file.packfile() as zipfile:
-            LOGGER.info('Packed files:\n{}', '\n'.join(
-                set(zipfile.namelist()) - existing
-            ))
+        LOGGER.info('Packed files:\n{}', '\n'.join(packed))
 
     if config.get_bool('General', 'packfile_dump_enable'):
         dump_files(bsp_file, config.get_val(
@@ -308,7 +381,9 @@ def main(argv: List[str]) -> None:
     # Copy new entity data.
     bsp_file.lumps[BSP_LUMPS.ENTITIES].data = BSP.write_ent_data(bsp_ents)
 
-    bsp_file.save()
+    if not bsp_pack.write_lumps(bsp_file, orig_lumps):
+        LOGGER.info('Other lumps modified, saving entire BSP...')
+        bsp_file.save()
     LOGGER.info(' - BSP written!')
 
     if is_peti: